@@ -0,0 +1,105 @@
+"""
+Benchmark de arranque: tiempo de importación del núcleo y hasta la primera ventana.
+
+Cada medición corre en un intérprete nuevo. En las mediciones "en frío" los
+módulos del proyecto se copian a un directorio temporal y se importan sin
+bytecode guardado, así que Python los compila de nuevo; en las "en caliente"
+se usan desde el repositorio con su caché `__pycache__` ya generado.
+
+    python benchmarks/arranque.py --repeticiones 10 --salida arranque.json
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+SCRIPT_IMPORTACION = """
+import time
+t = time.perf_counter()
+import {modulo}
+print(time.perf_counter() - t)
+"""
+
+SCRIPT_VENTANA = """
+import time
+from gui import App
+app = App()
+app.update()
+print(time.time())
+app.saver.cerrar()
+app.destroy()
+"""
+
+
+def _correr(script, directorio=RAIZ, escribir_bytecode=True):
+    entorno = dict(os.environ)
+    entorno.pop("PYTHONDONTWRITEBYTECODE", None)
+    comando = [sys.executable] + ([] if escribir_bytecode else ["-B"]) + ["-c", script]
+    salida = subprocess.run(comando, cwd=directorio, env=entorno, capture_output=True, text=True, check=True)
+    return float(salida.stdout.strip().splitlines()[-1])
+
+def medir_importacion(modulo, repeticiones, en_frio):
+    script = SCRIPT_IMPORTACION.format(modulo=modulo)
+    if not en_frio:
+        _correr(script)
+        return [_correr(script) for _ in range(repeticiones)]
+    tiempos = []
+    for _ in range(repeticiones):
+        with tempfile.TemporaryDirectory() as directorio:
+            for fuente in RAIZ.glob("*.py"):
+                shutil.copy2(fuente, directorio)
+            tiempos.append(_correr(script, directorio, escribir_bytecode=False))
+    return tiempos
+
+def medir_primera_ventana(repeticiones):
+    """Segundos desde que se lanza el proceso hasta que la ventana principal está dibujada."""
+    _correr(SCRIPT_IMPORTACION.format(modulo="nucleo"))
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.time()
+        tiempos.append(_correr(SCRIPT_VENTANA) - inicio)
+    return tiempos
+
+def resumir(tiempos):
+    return {
+        "mediana_ms": statistics.median(tiempos) * 1000,
+        "minimo_ms": min(tiempos) * 1000,
+        "maximo_ms": max(tiempos) * 1000,
+        "repeticiones": len(tiempos),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mide el tiempo de arranque del cotizador.")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--salida", help="Archivo JSON donde guardar los resultados")
+    parser.add_argument("--sin-ventana", action="store_true", help="No medir la primera ventana (sin pantalla)")
+    args = parser.parse_args(argv)
+
+    resultados = {}
+    for modulo in ("nucleo", "cotizador"):
+        resultados[f"import_{modulo}_frio"] = resumir(medir_importacion(modulo, args.repeticiones, en_frio=True))
+        resultados[f"import_{modulo}_caliente"] = resumir(medir_importacion(modulo, args.repeticiones, en_frio=False))
+    if not args.sin_ventana:
+        try:
+            resultados["primera_ventana"] = resumir(medir_primera_ventana(args.repeticiones))
+        except subprocess.CalledProcessError as e:
+            print(f"No se pudo abrir la ventana, se omite esa medición:\n{e.stderr}", file=sys.stderr)
+
+    for nombre, r in resultados.items():
+        print(f"{nombre:<28} mediana {r['mediana_ms']:8.1f} ms   (min {r['minimo_ms']:.1f}, max {r['maximo_ms']:.1f})")
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, indent=4)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+"""
+Cliente de carga para el servicio de cotización (`servicio.py`).
+
+Abre varias conexiones keep-alive contra el servicio local y mide cuántas
+cotizaciones por segundo resuelve, pidiendo de a una (/cotizar) o en lotes
+(/cotizar/lote). No necesita nada fuera de la biblioteca estándar.
+
+    python servicio.py &
+    python benchmarks/carga_servicio.py --conexiones 8 --pedidos 2000
+    python benchmarks/carga_servicio.py --lote 5000 --pedidos 20
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+TRABAJO = {"gramos": 85.5, "horas": 4, "minutos": 30, "precio_kg": 18500}
+
+
+async def _pedir(reader, writer, ruta, cuerpo):
+    writer.write(f"POST {ruta} HTTP/1.1\r\nHost: local\r\nContent-Type: application/json\r\nContent-Length: {len(cuerpo)}\r\n\r\n".encode("latin-1") + cuerpo)
+    await writer.drain()
+    encabezado = await reader.readuntil(b"\r\n\r\n")
+    estado = int(encabezado.split(b" ", 2)[1])
+    largo = next(int(l.split(b":", 1)[1]) for l in encabezado.split(b"\r\n") if l.lower().startswith(b"content-length:"))
+    respuesta = await reader.readexactly(largo)
+    if estado != 200:
+        raise RuntimeError(f"HTTP {estado}: {respuesta.decode('utf-8')}")
+    return respuesta
+
+async def _conexion(host, puerto, pedidos, lote):
+    reader, writer = await asyncio.open_connection(host, puerto)
+    if lote:
+        ruta, cuerpo = "/cotizar/lote", json.dumps({"trabajos": [TRABAJO] * lote}).encode("utf-8")
+    else:
+        ruta, cuerpo = "/cotizar", json.dumps(TRABAJO).encode("utf-8")
+    try:
+        for _ in range(pedidos):
+            await _pedir(reader, writer, ruta, cuerpo)
+    finally:
+        writer.close()
+
+async def medir(host, puerto, conexiones, pedidos, lote):
+    inicio = time.perf_counter()
+    await asyncio.gather(*(_conexion(host, puerto, pedidos, lote) for _ in range(conexiones)))
+    segundos = time.perf_counter() - inicio
+    cotizaciones = conexiones * pedidos * (lote or 1)
+    return cotizaciones, segundos
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prueba de carga del servicio de cotización.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8765)
+    parser.add_argument("--conexiones", type=int, default=4)
+    parser.add_argument("--pedidos", type=int, default=1000, help="Pedidos por conexión")
+    parser.add_argument("--lote", type=int, default=0, help="Trabajos por pedido (0 = /cotizar de a uno)")
+    args = parser.parse_args(argv)
+
+    cotizaciones, segundos = asyncio.run(medir(args.host, args.puerto, args.conexiones, args.pedidos, args.lote))
+    print(f"{cotizaciones} cotizaciones en {segundos:.2f} s -> {cotizaciones / segundos:,.0f} cotizaciones/s")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
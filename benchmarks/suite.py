@@ -0,0 +1,360 @@
+"""
+Suite de benchmarks de los caminos que se ponen lentos a medida que crecen los datos.
+
+Mide la fórmula en lotes grandes, `load_data` y `save_data` con catálogos
+sintéticos de 10, 1.000 y 10.000 filamentos, la búsqueda de filamentos en
+los dos catálogos, el armado de la lista del administrador de filamentos
+(`refresh_filament_list`) con una pantalla virtual y la lectura de G-code y
+STL. De cada caso se guarda la mediana de varias repeticiones.
+
+    python benchmarks/suite.py --guardar benchmarks/linea_base.json
+    python benchmarks/suite.py --comparar benchmarks/linea_base.json --umbral 25
+
+Con `--comparar` la corrida falla (código de salida 1) si algún caso tarda
+más que su línea de base más el umbral, en porcentaje. Se comparan los
+mínimos, que son lo que menos varía con la carga de la máquina. Las líneas de base
+dependen de la máquina: se generan y se comparan en la misma. Los casos que
+no se pueden medir acá (sin NumPy, sin Tk o sin pantalla) se informan y se
+omiten, pero si la línea de base los tiene la comparación también falla: un
+caso que dejó de medirse no puede esconder una regresión. Con
+`--permitir-omitidos` sólo se informan.
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+import catalogo
+import gcode
+import malla
+import motor
+import nucleo
+import tarifario
+
+TAMANOS_CATALOGO = (10, 1000, 10000)
+FILAS_LOTE = 1_000_000
+COTIZACIONES_TARIFARIO = 100_000
+BUSQUEDAS = 1000
+MB_GCODE = 20
+TRIANGULOS_STL = 1_000_000
+VERSION_FORMATO = 1
+MINIMO_REPETICION = 0.05  # segundos: los casos más cortos se corren varias veces por repetición
+
+SCRIPT_LISTA = """
+import json, time
+from gui import App, FilamentManagerWindow
+app = App()
+app.update()
+ventana = FilamentManagerWindow(app, app)
+ventana.update()
+tiempos = []
+for _ in range({repeticiones}):
+    t = time.perf_counter()
+    ventana.refresh_filament_list()
+    ventana.update_idletasks()
+    tiempos.append(time.perf_counter() - t)
+print(json.dumps(tiempos))
+ventana.on_close()
+app.on_closing()
+"""
+
+
+class Omitido(Exception):
+    """El caso no se puede medir en esta máquina."""
+
+
+# --- DATOS SINTÉTICOS ---
+
+def filamentos_sinteticos(cantidad):
+    return [
+        {"id": f"marca_{i}_{tipo.lower()}_{i:08x}", "brand": f"Marca {i}", "type": tipo, "price_kg": str(15000 + (i * 37) % 20000)}
+        for i, tipo in ((i, nucleo.FILAMENT_TYPES[i % len(nucleo.FILAMENT_TYPES)]) for i in range(cantidad))
+    ]
+
+def datos_sinteticos(cantidad):
+    data = nucleo.get_default_data()
+    data["filaments"] = filamentos_sinteticos(cantidad)
+    return data
+
+def escribir_gcode(ruta, megabytes):
+    """G-code sin estadísticas del slicer, para que se recorran todos los movimientos."""
+    bloque = "".join(f"G1 X{(i * 7) % 200:.3f} Y{(i * 13) % 200:.3f} E0.04210 F1800\n" for i in range(10000)).encode("ascii")
+    with open(ruta, "wb") as f:
+        f.write(b"M83\nG1 Z0.2 F600\n")
+        for _ in range(megabytes * 1024 * 1024 // len(bloque) + 1):
+            f.write(bloque)
+
+def escribir_stl(ruta, triangulos):
+    import numpy as np
+
+    rng = np.random.default_rng(0)
+    datos = np.zeros(triangulos, dtype=[("normal", "<f4", (3,)), ("vertices", "<f4", (3, 3)), ("atributo", "<u2")])
+    datos["vertices"] = rng.random((triangulos, 3, 3), dtype=np.float32) * 100
+    with open(ruta, "wb") as f:
+        f.write(b"\0" * 80 + triangulos.to_bytes(4, "little"))
+        f.write(datos.tobytes())
+
+
+# --- CASOS ---
+# Cada función devuelve {nombre: medir}; `medir()` corre una repetición y
+# devuelve sus segundos, sin contar la preparación de los datos.
+
+def casos_formula(carpeta):
+    settings = nucleo.get_default_data()["settings"]
+    tarifas = tarifario.compilar(settings, catalogo.CatalogoMemoria(filamentos_sinteticos(100)))
+    ids = [f["id"] for f in filamentos_sinteticos(100)]
+
+    def lote():
+        try:
+            import numpy as np
+        except ImportError:
+            raise Omitido("falta NumPy")
+        rng = np.random.default_rng(0)
+        gramos, horas, precio_kg = rng.uniform(1, 500, FILAS_LOTE), rng.uniform(0.1, 48, FILAS_LOTE), rng.uniform(10000, 40000, FILAS_LOTE)
+        parametros = motor.parametros_desde_settings(settings)
+        t = time.perf_counter()
+        motor.cotizar_lote(gramos, horas, precio_kg, parametros)
+        return time.perf_counter() - t
+
+    def escalar():
+        t = time.perf_counter()
+        for i in range(COTIZACIONES_TARIFARIO):
+            tarifas.cotizar(10 + i % 300, 0.5 + i % 40, ids[i % len(ids)])
+        return time.perf_counter() - t
+
+    return {f"formula_lote_{FILAS_LOTE}": lote, f"formula_tarifario_{COTIZACIONES_TARIFARIO}": escalar}
+
+def casos_persistencia(carpeta):
+    casos = {}
+    for cantidad in TAMANOS_CATALOGO:
+        ruta = Path(carpeta) / f"config_{cantidad}" / "config_impresion3d.json"
+        data = datos_sinteticos(cantidad)
+
+        def guardar(ruta=ruta, data=data):
+            nucleo.CONFIG_FILE = ruta
+            t = time.perf_counter()
+            nucleo.save_data(data)
+            return time.perf_counter() - t
+
+        def cargar(ruta=ruta, data=data):
+            nucleo.CONFIG_FILE = ruta
+            if not ruta.exists():
+                nucleo.save_data(data)
+            t = time.perf_counter()
+            nucleo.load_data()
+            return time.perf_counter() - t
+
+        casos[f"save_data_{cantidad}"] = guardar
+        casos[f"load_data_{cantidad}"] = cargar
+    return casos
+
+def casos_busqueda(carpeta):
+    casos = {}
+    for cantidad in TAMANOS_CATALOGO:
+        filamentos = filamentos_sinteticos(cantidad)
+        nombres = [catalogo.nombre_filamento(f) for f in filamentos]
+        ids = [f["id"] for f in filamentos]
+
+        def buscar(abrir, nombres=nombres, ids=ids):
+            cat = abrir()
+            try:
+                t = time.perf_counter()
+                for i in range(BUSQUEDAS):
+                    cat.por_nombre(nombres[i * 7919 % len(nombres)])
+                    cat.obtener(ids[i * 104729 % len(ids)])
+                    if i % 10 == 0:
+                        cat.buscar(nombres[i % len(nombres)][:8], 200)
+                return time.perf_counter() - t
+            finally:
+                cat.cerrar()
+
+        def abrir_sqlite(cantidad=cantidad, filamentos=filamentos):
+            cat = catalogo.CatalogoSQLite(str(Path(carpeta) / f"catalogo_{cantidad}.db"))
+            if len(cat) != len(filamentos):
+                cat.importar(filamentos)
+            return cat
+
+        casos[f"busqueda_memoria_{cantidad}"] = lambda filamentos=filamentos, buscar=buscar: buscar(lambda: catalogo.CatalogoMemoria([dict(f) for f in filamentos]))
+        casos[f"busqueda_sqlite_{cantidad}"] = lambda buscar=buscar, abrir=abrir_sqlite: buscar(abrir)
+    return casos
+
+def casos_lectura(carpeta):
+    ruta_gcode = Path(carpeta) / "sintetico.gcode"
+    ruta_stl = Path(carpeta) / "sintetico.stl"
+
+    def leer_gcode():
+        if not ruta_gcode.exists():
+            escribir_gcode(ruta_gcode, MB_GCODE)
+        t = time.perf_counter()
+        gcode.analizar_gcode(ruta_gcode)
+        return time.perf_counter() - t
+
+    def leer_stl():
+        try:
+            import numpy
+        except ImportError:
+            raise Omitido("falta NumPy")
+        if not ruta_stl.exists():
+            escribir_stl(ruta_stl, TRIANGULOS_STL)
+        t = time.perf_counter()
+        malla.analizar_stl(ruta_stl)
+        return time.perf_counter() - t
+
+    return {f"gcode_{MB_GCODE}mb": leer_gcode, f"stl_{TRIANGULOS_STL}_triangulos": leer_stl}
+
+
+def _pantalla_virtual():
+    """(entorno, proceso Xvfb o None) para abrir ventanas; Omitido si no hay pantalla posible."""
+    entorno = dict(os.environ)
+    if entorno.get("DISPLAY") or sys.platform in ("win32", "darwin"):
+        return entorno, None
+    if not shutil.which("Xvfb"):
+        raise Omitido("no hay pantalla ni Xvfb")
+    pantalla = f":{os.getpid() % 1000 + 100}"
+    proceso = subprocess.Popen(["Xvfb", pantalla, "-screen", "0", "1280x1024x24"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    time.sleep(1)
+    entorno["DISPLAY"] = pantalla
+    return entorno, proceso
+
+def medir_lista_filamentos(carpeta, repeticiones):
+    """`refresh_filament_list` con catálogos de cada tamaño, cada uno en un proceso con su propia configuración."""
+    entorno, xvfb = _pantalla_virtual()
+    resultados = {}
+    try:
+        for cantidad in TAMANOS_CATALOGO:
+            base = Path(carpeta) / f"gui_{cantidad}"
+            data = datos_sinteticos(cantidad)
+            data["settings"]["historial_db"] = str(base / "historial.db")
+            nucleo.CONFIG_FILE = base / "Cotizador3D" / "config_impresion3d.json"
+            nucleo.save_data(data)
+            entorno_caso = dict(entorno, LOCALAPPDATA=str(base), HOME=str(base))
+            salida = subprocess.run([sys.executable, "-c", SCRIPT_LISTA.format(repeticiones=repeticiones)],
+                                    cwd=RAIZ, env=entorno_caso, capture_output=True, text=True)
+            if salida.returncode != 0:
+                raise Omitido(f"no se pudo abrir la ventana: {salida.stderr.strip().splitlines()[-1:]}")
+            resultados[f"refresh_filament_list_{cantidad}"] = json.loads(salida.stdout.strip().splitlines()[-1])
+    finally:
+        if xvfb is not None:
+            xvfb.terminate()
+    return resultados
+
+
+# --- RESULTADOS ---
+
+def resumir(tiempos):
+    return {
+        "mediana_ms": statistics.median(tiempos) * 1000,
+        "minimo_ms": min(tiempos) * 1000,
+        "maximo_ms": max(tiempos) * 1000,
+        "repeticiones": len(tiempos),
+    }
+
+def repetir(medir, repeticiones):
+    """
+    Segundos por corrida en cada repetición. Como `timeit`, si una corrida dura
+    menos que MINIMO_REPETICION se promedian varias, para que el ruido del
+    reloj y del sistema no domine los casos cortos.
+    """
+    primera = medir()  # también calienta cachés y prepara archivos
+    veces = min(1000, math.ceil(MINIMO_REPETICION / primera)) if primera < MINIMO_REPETICION else 1
+    return [sum(medir() for _ in range(veces)) / veces for _ in range(repeticiones)]
+
+def correr(repeticiones, filtro=None):
+    """Corre los casos (los que contienen `filtro`, si se indica). Devuelve ({nombre: resumen}, {nombre: motivo omitido})."""
+    resultados, omitidos = {}, {}
+    configuracion = nucleo.CONFIG_FILE
+    with tempfile.TemporaryDirectory() as carpeta:
+        try:
+            for armar in (casos_formula, casos_persistencia, casos_busqueda, casos_lectura):
+                for nombre, medir in armar(carpeta).items():
+                    if filtro and filtro not in nombre:
+                        continue
+                    try:
+                        resultados[nombre] = resumir(repetir(medir, repeticiones))
+                    except Omitido as e:
+                        omitidos[nombre] = str(e)
+                    print(f"{nombre:<36} {_formato(resultados.get(nombre), omitidos.get(nombre))}", file=sys.stderr)
+            if not filtro or any(filtro in f"refresh_filament_list_{n}" for n in TAMANOS_CATALOGO):
+                try:
+                    for nombre, tiempos in medir_lista_filamentos(carpeta, repeticiones).items():
+                        resultados[nombre] = resumir(tiempos)
+                        print(f"{nombre:<36} {_formato(resultados[nombre])}", file=sys.stderr)
+                except Omitido as e:
+                    omitidos["refresh_filament_list"] = str(e)
+                    print(f"{'refresh_filament_list':<36} {_formato(None, str(e))}", file=sys.stderr)
+        finally:
+            nucleo.CONFIG_FILE = configuracion
+    return resultados, omitidos
+
+def _formato(resumen, motivo=None):
+    if resumen is None:
+        return f"omitido ({motivo})"
+    return f"mediana {resumen['mediana_ms']:9.2f} ms   (min {resumen['minimo_ms']:.2f}, max {resumen['maximo_ms']:.2f})"
+
+def comparar(resultados, linea_base, umbral_pct):
+    """Lista de (caso, base_ms, actual_ms, cambio_pct, regresion) para los casos medidos en las dos corridas."""
+    comparacion = []
+    for nombre, base in linea_base["casos"].items():
+        if nombre in resultados:
+            actual = resultados[nombre]["minimo_ms"]
+            cambio = (actual / base["minimo_ms"] - 1) * 100 if base["minimo_ms"] > 0 else 0.0
+            comparacion.append((nombre, base["minimo_ms"], actual, cambio, cambio > umbral_pct))
+    return comparacion
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de fórmula, persistencia, catálogo, lista de filamentos y lectura de archivos.")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--filtro", help="Correr sólo los casos cuyo nombre contiene este texto")
+    parser.add_argument("--guardar", help="Guardar los resultados como línea de base en este JSON")
+    parser.add_argument("--comparar", help="Línea de base (JSON) contra la cual comparar")
+    parser.add_argument("--umbral", type=float, default=25.0, help="Porcentaje de demora tolerado antes de fallar")
+    parser.add_argument("--permitir-omitidos", action="store_true", help="No fallar si un caso de la línea de base no se pudo medir")
+    args = parser.parse_args(argv)
+
+    resultados, omitidos = correr(args.repeticiones, args.filtro)
+    if args.guardar:
+        with open(args.guardar, "w", encoding="utf-8") as f:
+            json.dump({
+                "formato": VERSION_FORMATO,
+                "fecha": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "python": platform.python_version(),
+                "plataforma": platform.platform(),
+                "casos": resultados,
+                "omitidos": omitidos,
+            }, f, indent=4)
+    if not args.comparar:
+        return 0
+
+    with open(args.comparar, "r", encoding="utf-8") as f:
+        linea_base = json.load(f)
+    comparacion = comparar(resultados, linea_base, args.umbral)
+    print(f"\nContra {args.comparar} (umbral {args.umbral:.0f}%):")
+    for nombre, base, actual, cambio, regresion in comparacion:
+        print(f"{'REGRESIÓN' if regresion else 'ok':<10} {nombre:<36} {base:9.2f} ms -> {actual:9.2f} ms  ({cambio:+.1f}%)")
+    sin_medir = sorted(c for c in set(linea_base["casos"]) - set(resultados) if not args.filtro or args.filtro in c)
+    for nombre in sin_medir:
+        print(f"{'SIN MEDIR':<10} {nombre:<36} ({omitidos.get(nombre, 'no existe en esta versión')})")
+    regresiones = sum(1 for *_, regresion in comparacion if regresion)
+    fallo = False
+    if regresiones:
+        print(f"{regresiones} casos más lentos que la línea de base.", file=sys.stderr)
+        fallo = True
+    if sin_medir and not args.permitir_omitidos:
+        print(f"{len(sin_medir)} casos de la línea de base sin medir (--permitir-omitidos para ignorarlos).", file=sys.stderr)
+        fallo = True
+    return 1 if fallo else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+"""
+Caché en disco de las métricas extraídas de archivos de impresión.
+
+Las entradas se identifican por el hash del contenido del archivo más los
+parámetros del análisis (densidad, relleno, ...), así que el mismo archivo
+copiado o renombrado no se vuelve a analizar. Para que un acierto no tenga
+que leer el archivo, además se recuerda qué hash tenía cada ruta con su
+fecha de modificación y tamaño: si `os.stat` coincide, la respuesta sale de
+memoria. Cuando el caché supera `max_bytes` se descartan las entradas
+usadas hace más tiempo.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import persistencia
+
+# --- CONSTANTES ---
+NOMBRE_ARCHIVO = "cache_archivos.json"
+MAX_BYTES = 8 * 1024 * 1024
+TAMANO_BLOQUE_HASH = 8 * 1024 * 1024
+
+
+def hash_contenido(ruta):
+    h = hashlib.blake2b(digest_size=20)
+    with open(ruta, "rb") as f:
+        while bloque := f.read(TAMANO_BLOQUE_HASH):
+            h.update(bloque)
+    return h.hexdigest()
+
+def _firma(ruta):
+    estado = os.stat(ruta)
+    return [estado.st_mtime_ns, estado.st_size]
+
+def firma_y_hash(ruta):
+    """(firma, hash) de un archivo; la firma se toma antes de leerlo. Sirve para calcularlos en otro proceso."""
+    firma = _firma(ruta)
+    return firma, hash_contenido(ruta)
+
+
+class CacheArchivos:
+    """
+    `analizar(ruta, parametros, analizador)` devuelve las métricas guardadas o
+    llama a `analizador()` y guarda su resultado. Es seguro usarlo desde el
+    hilo que hace el análisis; los cambios se escriben con `persistir`.
+    """
+
+    def __init__(self, ruta, max_bytes=MAX_BYTES):
+        self.ruta = ruta
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._lock_escritura = threading.Lock()  # una escritura a la vez, en el orden de las fotos
+        self._entradas = OrderedDict()  # clave -> métricas, de la menos a la más usada
+        self._tamanos = {}
+        self._total = 0  # suma de `_tamanos`
+        self._rutas = {}  # ruta absoluta -> [mtime_ns, tamaño, hash]
+        self._sucio = False
+        self._cargado = False
+
+    def _cargar(self):
+        # Se lee recién en el primer uso para no demorar el arranque de la app.
+        if self._cargado:
+            return
+        self._cargado = True
+        try:
+            with open(self.ruta, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        for clave, metricas in data.get("entradas", {}).items():
+            self._entradas[clave] = metricas
+            self._tamanos[clave] = len(clave) + len(json.dumps(metricas))
+        self._total = sum(self._tamanos.values())
+        self._rutas = data.get("rutas", {})
+
+    @staticmethod
+    def _clave(hash_archivo, parametros):
+        return hash_archivo + ":" + json.dumps(parametros, sort_keys=True, separators=(",", ":"))
+
+    def _hash(self, ruta_archivo, calcular):
+        """Hash del archivo según el índice de rutas; si la firma cambió y `calcular`, lo recalcula."""
+        with self._lock:
+            self._cargar()
+        ruta_archivo = os.path.abspath(ruta_archivo)
+        firma = _firma(ruta_archivo)
+        conocido = self._rutas.get(ruta_archivo)
+        if conocido and conocido[:2] == firma:
+            return conocido[2]
+        if not calcular:
+            return None
+        hash_archivo = hash_contenido(ruta_archivo)
+        with self._lock:
+            self._rutas[ruta_archivo] = firma + [hash_archivo]
+            self._sucio = True
+        return hash_archivo
+
+    def recordar_hash(self, ruta_archivo, firma, hash_archivo):
+        """Anota el hash que se calculó en otro proceso, con la firma (`os.stat`) que tenía el archivo antes de leerlo."""
+        with self._lock:
+            self._cargar()
+            self._rutas[os.path.abspath(ruta_archivo)] = list(firma) + [hash_archivo]
+            self._sucio = True
+
+    def obtener(self, ruta_archivo, parametros, calcular_hash=False):
+        """
+        Métricas guardadas para el archivo, o None. Sin `calcular_hash` sólo
+        consulta el índice de rutas (no lee el archivo).
+        """
+        hash_archivo = self._hash(ruta_archivo, calcular_hash)
+        if hash_archivo is None:
+            return None
+        clave = self._clave(hash_archivo, parametros)
+        with self._lock:
+            metricas = self._entradas.get(clave)
+            if metricas is not None:
+                # El orden de uso sólo vive en memoria: un acierto no obliga a reescribir el archivo.
+                self._entradas.move_to_end(clave)
+            return metricas
+
+    def guardar(self, ruta_archivo, parametros, metricas):
+        clave = self._clave(self._hash(ruta_archivo, True), parametros)
+        with self._lock:
+            self._entradas[clave] = metricas
+            self._entradas.move_to_end(clave)
+            tamano = len(clave) + len(json.dumps(metricas))
+            self._total += tamano - self._tamanos.get(clave, 0)
+            self._tamanos[clave] = tamano
+            self._sucio = True
+            self._descartar_viejas()
+
+    def analizar(self, ruta_archivo, parametros, analizador):
+        metricas = self.obtener(ruta_archivo, parametros, calcular_hash=True)
+        if metricas is None:
+            metricas = analizador()
+            self.guardar(ruta_archivo, parametros, metricas)
+        return metricas
+
+    def _descartar_viejas(self):
+        """
+        Descarta las entradas menos usadas hasta volver a `max_bytes`. Del índice
+        de rutas sólo se quitan los hashes que se quedaron sin ninguna entrada;
+        los que todavía no tienen métricas (recién hasheados) se conservan.
+        """
+        descartados = set()
+        while self._total > self.max_bytes and len(self._entradas) > 1:
+            clave, _ = self._entradas.popitem(last=False)
+            self._total -= self._tamanos.pop(clave)
+            descartados.add(clave.split(":", 1)[0])
+        if descartados:
+            descartados -= {clave.split(":", 1)[0] for clave in self._entradas}
+            self._rutas = {r: v for r, v in self._rutas.items() if v[2] not in descartados}
+
+    def persistir(self):
+        """
+        Escribe el caché en disco si hubo cambios desde la última vez. Mientras
+        escribe, el caché se sigue pudiendo consultar desde otros hilos.
+        """
+        with self._lock_escritura:
+            with self._lock:
+                if not self._sucio:
+                    return
+                data = {"entradas": dict(self._entradas), "rutas": dict(self._rutas)}
+                self._sucio = False
+            try:
+                persistencia.escribir_json_atomico(self.ruta, data, copias=0, indent=None)
+            except Exception as e:
+                with self._lock:
+                    self._sucio = True
+                print(f"Error al guardar el caché de archivos: {e}")
@@ -0,0 +1,314 @@
+"""
+Catálogo de filamentos con índices por id y por nombre visible.
+
+`CatalogoMemoria` indexa la lista `data["filaments"]` del JSON de
+configuración (se sigue guardando con el resto de los datos).
+`CatalogoSQLite` guarda los filamentos en un archivo SQLite y aplica cada
+alta, edición o baja por separado, sin reescribir todo el catálogo; conviene
+cuando hay miles de SKUs. Con SQLite la base es la única copia: la lista del
+JSON se importa al crearla y después se vacía. Ambos exponen la misma interfaz.
+
+El nombre visible es "Marca (Tipo)". Si dos filamentos coinciden, el
+segundo lleva además el final de su id entre corchetes para que el combo
+nunca resuelva un nombre al filamento equivocado.
+"""
+import bisect
+import json
+import os
+import threading
+
+import perfilado
+
+# --- NOMBRES E IDS ---
+
+def nombre_filamento(filamento):
+    return f"{filamento['brand']} ({filamento['type']})"
+
+def nuevo_id(brand, f_type):
+    return f"{brand.lower()}_{f_type.lower()}_{os.urandom(4).hex()}".replace(" ", "_")
+
+def _nombre_desambiguado(filamento):
+    return f"{nombre_filamento(filamento)} [{filamento['id'][-8:]}]"
+
+def _fin_prefijo(clave):
+    return clave + "\U0010ffff"
+
+
+# --- CATÁLOGO EN MEMORIA (JSON) ---
+
+class CatalogoMemoria:
+    """Índices sobre la lista de filamentos del JSON. Modifica esa misma lista."""
+
+    def __init__(self, filamentos):
+        self.filamentos = filamentos
+        self._por_id = {}
+        self._nombres = {}  # id -> nombre visible
+        self._por_nombre = {}  # nombre visible -> id
+        self._claves = []  # (nombre en minúsculas, id), ordenado para búsqueda por prefijo
+        self._posiciones = {}  # id -> índice en `filamentos`
+        for i, filamento in enumerate(filamentos):
+            if not filamento.get("id"):
+                filamento["id"] = nuevo_id(filamento["brand"], filamento["type"])
+            self._indexar(filamento)
+            self._posiciones[filamento["id"]] = i
+        self._claves.sort()
+
+    def _indexar(self, filamento, ordenar=False):
+        nombre = nombre_filamento(filamento)
+        if nombre in self._por_nombre:
+            nombre = _nombre_desambiguado(filamento)
+        self._por_id[filamento["id"]] = filamento
+        self._nombres[filamento["id"]] = nombre
+        self._por_nombre[nombre] = filamento["id"]
+        if ordenar:
+            bisect.insort(self._claves, (nombre.lower(), filamento["id"]))
+        else:
+            self._claves.append((nombre.lower(), filamento["id"]))
+
+    def _desindexar(self, id_filamento):
+        nombre = self._nombres.pop(id_filamento)
+        del self._por_nombre[nombre]
+        del self._por_id[id_filamento]
+        i = bisect.bisect_left(self._claves, (nombre.lower(), id_filamento))
+        del self._claves[i]
+
+    def __len__(self):
+        return len(self._por_id)
+
+    def __iter__(self):
+        return iter(self.filamentos)
+
+    def obtener(self, id_filamento):
+        return self._por_id.get(id_filamento)
+
+    def por_nombre(self, nombre):
+        id_filamento = self._por_nombre.get(nombre)
+        return self._por_id.get(id_filamento) if id_filamento else None
+
+    def nombre(self, id_filamento):
+        return self._nombres.get(id_filamento)
+
+    def nombres(self):
+        return [self._nombres[f["id"]] for f in self.filamentos]
+
+    def precios(self):
+        """[(id, precio por kg), ...] de todos los filamentos."""
+        return [(f["id"], float(f["price_kg"])) for f in self.filamentos]
+
+    def _rango(self, prefijo):
+        clave = prefijo.lower()
+        return bisect.bisect_left(self._claves, (clave,)), bisect.bisect_left(self._claves, (_fin_prefijo(clave),))
+
+    def buscar(self, prefijo="", limite=None):
+        """Nombres visibles que empiezan con `prefijo` (sin distinguir mayúsculas), en orden alfabético."""
+        inicio, fin = self._rango(prefijo)
+        if limite is not None:
+            fin = min(fin, inicio + limite)
+        return [self._nombres[id_filamento] for _, id_filamento in self._claves[inicio:fin]]
+
+    def contar(self, prefijo=""):
+        if not prefijo:
+            return len(self.filamentos)
+        inicio, fin = self._rango(prefijo)
+        return fin - inicio
+
+    def pagina(self, inicio, cantidad, prefijo=""):
+        """
+        Devuelve hasta `cantidad` filamentos a partir de la posición `inicio`:
+        en orden de carga si no hay `prefijo`, o alfabético entre los que coinciden.
+        """
+        if not prefijo:
+            return self.filamentos[inicio:inicio + cantidad]
+        desde, hasta = self._rango(prefijo)
+        return [self._por_id[id_filamento] for _, id_filamento in self._claves[desde + inicio:min(hasta, desde + inicio + cantidad)]]
+
+    def agregar(self, datos):
+        filamento = dict(datos)
+        filamento["id"] = filamento.get("id") or nuevo_id(filamento["brand"], filamento["type"])
+        self._posiciones[filamento["id"]] = len(self.filamentos)
+        self.filamentos.append(filamento)
+        self._indexar(filamento, ordenar=True)
+        return filamento
+
+    def actualizar(self, id_filamento, datos):
+        filamento = self._por_id[id_filamento]
+        self._desindexar(id_filamento)
+        filamento.update(datos)
+        filamento["id"] = id_filamento
+        self._indexar(filamento, ordenar=True)
+        return filamento
+
+    def eliminar(self, id_filamento):
+        """Quita el filamento; el último de la lista pasa a ocupar su lugar."""
+        self._desindexar(id_filamento)
+        i = self._posiciones.pop(id_filamento)
+        ultimo = self.filamentos.pop()
+        if i < len(self.filamentos):
+            self.filamentos[i] = ultimo
+            self._posiciones[ultimo["id"]] = i
+
+    def cerrar(self):
+        pass
+
+
+# --- CATÁLOGO SQLITE ---
+
+class CatalogoSQLite:
+    """
+    Catálogo en un archivo SQLite. Cada cambio se confirma por separado.
+    Se puede usar desde varios hilos: la conexión es una sola y se toma de a uno.
+    """
+
+    COLUMNAS = ("id", "brand", "type", "price_kg")
+
+    def __init__(self, ruta):
+        import sqlite3
+
+        self.ruta = ruta
+        self.nueva = not os.path.exists(ruta)
+        self._lock = threading.RLock()
+        self.conexion = sqlite3.connect(ruta, check_same_thread=False)
+        self.conexion.execute("PRAGMA journal_mode=WAL")
+        self.conexion.executescript("""
+            CREATE TABLE IF NOT EXISTS filamentos (
+                id TEXT PRIMARY KEY,
+                brand TEXT NOT NULL,
+                type TEXT NOT NULL,
+                price_kg REAL NOT NULL,
+                extra TEXT NOT NULL DEFAULT '{}',
+                nombre TEXT NOT NULL UNIQUE,
+                clave TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS filamentos_clave ON filamentos (clave);
+        """)
+
+    def _a_dict(self, fila):
+        if fila is None:
+            return None
+        filamento = dict(zip(self.COLUMNAS, fila[:4]))
+        filamento.update(json.loads(fila[4]))
+        return filamento
+
+    def _filas(self, sql, parametros=()):
+        with self._lock:
+            return self.conexion.execute(sql, parametros).fetchall()
+
+    def _nombre_libre(self, filamento):
+        nombre = nombre_filamento(filamento)
+        ocupado = self._filas("SELECT id FROM filamentos WHERE nombre = ?", (nombre,))
+        if ocupado and ocupado[0][0] != filamento["id"]:
+            nombre = _nombre_desambiguado(filamento)
+        return nombre
+
+    def _valores(self, filamento):
+        extra = {k: v for k, v in filamento.items() if k not in self.COLUMNAS}
+        nombre = self._nombre_libre(filamento)
+        return (filamento["brand"], filamento["type"], float(filamento["price_kg"]), json.dumps(extra), nombre, nombre.lower(), filamento["id"])
+
+    def __len__(self):
+        return self._filas("SELECT COUNT(*) FROM filamentos")[0][0]
+
+    def __iter__(self):
+        return (self._a_dict(fila) for fila in self._filas("SELECT id, brand, type, price_kg, extra FROM filamentos ORDER BY rowid"))
+
+    def obtener(self, id_filamento):
+        filas = self._filas("SELECT id, brand, type, price_kg, extra FROM filamentos WHERE id = ?", (id_filamento,))
+        return self._a_dict(filas[0]) if filas else None
+
+    def por_nombre(self, nombre):
+        filas = self._filas("SELECT id, brand, type, price_kg, extra FROM filamentos WHERE nombre = ?", (nombre,))
+        return self._a_dict(filas[0]) if filas else None
+
+    def nombre(self, id_filamento):
+        filas = self._filas("SELECT nombre FROM filamentos WHERE id = ?", (id_filamento,))
+        return filas[0][0] if filas else None
+
+    def nombres(self):
+        return [fila[0] for fila in self._filas("SELECT nombre FROM filamentos ORDER BY rowid")]
+
+    def precios(self):
+        return self._filas("SELECT id, price_kg FROM filamentos ORDER BY rowid")
+
+    def buscar(self, prefijo="", limite=None):
+        clave = prefijo.lower()
+        sql = "SELECT nombre FROM filamentos WHERE clave >= ? AND clave < ? ORDER BY clave, id"
+        parametros = (clave, _fin_prefijo(clave))
+        if limite is not None:
+            sql += " LIMIT ?"
+            parametros += (limite,)
+        return [fila[0] for fila in self._filas(sql, parametros)]
+
+    def contar(self, prefijo=""):
+        if not prefijo:
+            return len(self)
+        clave = prefijo.lower()
+        return self._filas("SELECT COUNT(*) FROM filamentos WHERE clave >= ? AND clave < ?", (clave, _fin_prefijo(clave)))[0][0]
+
+    def pagina(self, inicio, cantidad, prefijo=""):
+        sql = "SELECT id, brand, type, price_kg, extra FROM filamentos"
+        if prefijo:
+            clave = prefijo.lower()
+            filas = self._filas(sql + " WHERE clave >= ? AND clave < ? ORDER BY clave, id LIMIT ? OFFSET ?", (clave, _fin_prefijo(clave), cantidad, inicio))
+        else:
+            filas = self._filas(sql + " ORDER BY rowid LIMIT ? OFFSET ?", (cantidad, inicio))
+        return [self._a_dict(fila) for fila in filas]
+
+    def _insertar(self, datos):
+        filamento = dict(datos)
+        filamento["id"] = filamento.get("id") or nuevo_id(filamento["brand"], filamento["type"])
+        self.conexion.execute(
+            "INSERT INTO filamentos (brand, type, price_kg, extra, nombre, clave, id) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            self._valores(filamento))
+        return filamento
+
+    def agregar(self, datos):
+        with self._lock, self.conexion:
+            filamento = self._insertar(datos)
+        perfilado.contar(perfilado.CONTADOR_ESCRITURAS)
+        return filamento
+
+    def actualizar(self, id_filamento, datos):
+        with self._lock, self.conexion:
+            filamento = self.obtener(id_filamento)
+            filamento.update(datos)
+            filamento["id"] = id_filamento
+            self.conexion.execute(
+                "UPDATE filamentos SET brand = ?, type = ?, price_kg = ?, extra = ?, nombre = ?, clave = ? WHERE id = ?",
+                self._valores(filamento))
+        perfilado.contar(perfilado.CONTADOR_ESCRITURAS)
+        return filamento
+
+    def eliminar(self, id_filamento):
+        with self._lock, self.conexion:
+            self.conexion.execute("DELETE FROM filamentos WHERE id = ?", (id_filamento,))
+        perfilado.contar(perfilado.CONTADOR_ESCRITURAS)
+
+    def importar(self, filamentos):
+        """Copia una lista de filamentos (por ejemplo la del JSON) dentro de la base, en una sola transacción."""
+        with self._lock, self.conexion:
+            for filamento in filamentos:
+                if not self.obtener(filamento.get("id")):
+                    self._insertar(filamento)
+        perfilado.contar(perfilado.CONTADOR_ESCRITURAS)
+
+    def cerrar(self):
+        with self._lock:
+            self.conexion.close()
+
+
+def abrir_catalogo(data):
+    """
+    Abre el catálogo configurado. Si `settings["catalogo_db"]` tiene una ruta
+    usa SQLite: al crear la base se importan los filamentos del JSON, y la
+    lista `data["filaments"]` queda vacía para que no se guarde una copia
+    vieja (ni reaparezca después de borrar filamentos de la base). Si no,
+    trabaja sobre `data["filaments"]`.
+    """
+    ruta_db = data["settings"].get("catalogo_db")
+    if not ruta_db:
+        return CatalogoMemoria(data["filaments"])
+    catalogo = CatalogoSQLite(ruta_db)
+    if catalogo.nueva and data["filaments"]:
+        catalogo.importar(data["filaments"])
+    data["filaments"] = []
+    return catalogo
@@ -0,0 +1,482 @@
+"""
+Análisis de archivos G-code para completar gramos y tiempo de impresión.
+
+El archivo se abre con mmap y se recorre por bloques, así que la memoria
+usada no depende del tamaño del archivo. Primero se buscan los comentarios
+de estadísticas que dejan los slicers (PrusaSlicer/OrcaSlicer/Bambu Studio
+al principio o al final, Cura y Simplify3D al principio); si faltan datos,
+se suma la extrusión E y se estima el tiempo de movimiento con los F.
+
+Los movimientos se recorren con NumPy: las palabras de cada bloque se separan
+sobre los bytes, los comandos que cambian el modo (G90/G91, M82/M83, G92,
+G28, G4, arcos, cambios de herramienta) se procesan de a uno y los tramos de
+G0/G1 que quedan entre ellos se calculan de una vez. Sin NumPy se recorre
+línea por línea, con el mismo resultado pero varias veces más lento.
+"""
+import math
+import mmap
+import re
+
+import motor
+
+# --- CONSTANTES ---
+TAMANO_BLOQUE = 8 * 1024 * 1024
+TAMANO_CABECERA = 1024 * 1024
+DIAMETRO_FILAMENTO = 1.75
+AVANCE_INICIAL = 1500.0  # mm/min, hasta que el archivo defina su propio F
+
+_NUMEROS = rb"([0-9][0-9., \t]*)"  # sin \s, que seguiría en la línea siguiente
+PATRONES_GRAMOS = [
+    re.compile(rb"total filament weight \[g\]\s*[:=]\s*" + _NUMEROS, re.I),
+    re.compile(rb"filament used \[g\]\s*[:=]\s*" + _NUMEROS, re.I),
+    re.compile(rb"Plastic weights?:\s*" + _NUMEROS + rb"\s*g", re.I),
+]
+PATRONES_LONGITUD_MM = [
+    re.compile(rb"filament used \[mm\]\s*[:=]\s*" + _NUMEROS, re.I),
+    re.compile(rb"Filament length:\s*" + _NUMEROS + rb"\s*mm", re.I),
+]
+PATRON_LONGITUD_M = re.compile(rb"^;Filament used:[ \t]*([0-9][0-9.,m \t]*)", re.M | re.I)
+PATRONES_TIEMPO = [
+    re.compile(rb"total estimated time\s*[:=]\s*([^;\r\n]+)", re.I),
+    re.compile(rb"estimated printing time \(normal mode\)\s*[:=]\s*([^;\r\n]+)", re.I),
+    re.compile(rb"Build time:\s*([^;\r\n]+)", re.I),
+]
+PATRON_TIEMPO_SEGUNDOS = re.compile(rb"^;TIME:\s*([0-9.]+)", re.M)
+PATRONES_CAPAS = [
+    re.compile(rb"total layers? count\s*[:=]\s*(\d+)", re.I),
+    re.compile(rb"total layer number\s*[:=]\s*(\d+)", re.I),
+    re.compile(rb"^;LAYER_COUNT:\s*(\d+)", re.M),
+]
+PATRON_DIAMETRO = re.compile(rb"filament_diameter\s*=\s*([0-9.]+)", re.I)
+PATRON_DURACION = re.compile(rb"([0-9]+(?:\.[0-9]+)?)\s*(days?|hours?|minutes?|seconds?|d|h|m|s)\b", re.I)
+SEGUNDOS_POR_UNIDAD = {b"d": 86400, b"h": 3600, b"m": 60, b"s": 1}
+
+# Códigos que cambian el estado de la máquina (además de T<n>); entre ellos sólo importan los G0/G1.
+CODIGOS_MOVIMIENTO = (b"G0", b"G1", b"G00", b"G01")
+CODIGOS_MODO = (b"G2", b"G3", b"G02", b"G03", b"G4", b"G28", b"G90", b"G91", b"G92", b"M82", b"M83")
+ANCHO_CODIGO = 4
+EJES = b"XYZEF"
+PATRON_COMENTARIO = re.compile(rb";[^\n]*")
+_POTENCIAS_10 = tuple(float(f"1e{k}") for k in range(16))
+MAX_PALABRA = 32  # una palabra más larga (basura binaria) hace recorrer el bloque línea por línea
+MIN_VECTORIZADO = 32  # tramos con menos movimientos se recorren línea por línea
+
+
+# --- CABECERA DEL SLICER ---
+
+def _lista_numeros(texto):
+    return [float(x) for x in re.split(rb"[,\s]+", texto.strip()) if x]
+
+def _buscar(patrones, texto):
+    for patron in patrones:
+        m = patron.search(texto)
+        if m:
+            return m.group(1)
+    return None
+
+def parse_duracion(texto):
+    """Convierte textos como '1d 2h 3m 4s' o '2 hours 5 minutes' a segundos."""
+    return sum(float(n) * SEGUNDOS_POR_UNIDAD[u[:1].lower()] for n, u in PATRON_DURACION.findall(texto))
+
+def leer_cabecera(texto):
+    """
+    Extrae las estadísticas que escriben los slicers en los comentarios.
+    Devuelve un dict sólo con las claves encontradas entre `gramos_por_extrusor`,
+    `longitud_mm_por_extrusor`, `segundos`, `capas` y `diametro`.
+    """
+    datos = {}
+    gramos = _buscar(PATRONES_GRAMOS, texto)
+    if gramos:
+        datos["gramos_por_extrusor"] = _lista_numeros(gramos)
+    longitud = _buscar(PATRONES_LONGITUD_MM, texto)
+    if longitud:
+        datos["longitud_mm_por_extrusor"] = _lista_numeros(longitud)
+    else:
+        m = PATRON_LONGITUD_M.search(texto)
+        if m:
+            datos["longitud_mm_por_extrusor"] = [x * 1000 for x in _lista_numeros(m.group(1).replace(b"m", b""))]
+    tiempo = _buscar(PATRONES_TIEMPO, texto)
+    if tiempo and parse_duracion(tiempo) > 0:
+        datos["segundos"] = parse_duracion(tiempo)
+    else:
+        m = PATRON_TIEMPO_SEGUNDOS.search(texto)
+        if m:
+            datos["segundos"] = float(m.group(1))
+    capas = _buscar(PATRONES_CAPAS, texto)
+    if capas:
+        datos["capas"] = int(capas)
+    diametro = PATRON_DIAMETRO.search(texto)
+    if diametro:
+        datos["diametro"] = _lista_numeros(diametro.group(1))[0]
+    return datos
+
+
+# --- RECORRIDO DE MOVIMIENTOS ---
+
+class _EstadoMovimiento:
+    """Estado de la máquina mientras se recorren las líneas del G-code."""
+
+    def __init__(self):
+        self.x = self.y = self.z = self.e = 0.0
+        self.avance = AVANCE_INICIAL
+        self.xyz_absoluto = True
+        self.e_absoluto = True
+        self.herramienta = 0
+        self.extruido = [0.0]
+        self.segundos = 0.0
+        self.capas_comentario = 0
+        self.capas_z = 0
+        self.z_ultima_capa = 0.0
+
+    def procesar(self, lineas):
+        for linea in lineas:
+            if not linea:
+                continue
+            if linea[0] == 59:  # ';'
+                if linea.startswith(b";LAYER_CHANGE") or linea.startswith(b";LAYER:"):
+                    self.capas_comentario += 1
+                continue
+            palabras = linea.split(b";", 1)[0].split()
+            if not palabras:
+                continue
+            codigo = palabras[0].upper()
+            if codigo in (b"G1", b"G0", b"G01", b"G00", b"G2", b"G3", b"G02", b"G03"):
+                self._mover(palabras)
+            elif codigo == b"G92":
+                self._fijar_posicion(palabras)
+            elif codigo == b"G90":
+                self.xyz_absoluto = self.e_absoluto = True
+            elif codigo == b"G91":
+                self.xyz_absoluto = self.e_absoluto = False
+            elif codigo == b"M82":
+                self.e_absoluto = True
+            elif codigo == b"M83":
+                self.e_absoluto = False
+            elif codigo == b"G4":
+                self._pausa(palabras)
+            elif codigo == b"G28":
+                self.x = self.y = self.z = 0.0
+            elif codigo[:1] == b"T" and codigo[1:].isdigit():
+                self.herramienta = int(codigo[1:])
+                while len(self.extruido) <= self.herramienta:
+                    self.extruido.append(0.0)
+
+    def procesar_bloque(self, bloque):
+        """
+        Procesa un bloque de líneas completas. Con NumPy, los tramos de G0/G1
+        entre dos cambios de modo se calculan de una vez; sin NumPy (o si algún
+        valor no es un número) se recorre línea por línea.
+        """
+        try:
+            import numpy as np
+        except ImportError:
+            self.procesar(bloque.split(b"\n"))
+            return
+        try:
+            inicio_linea, lineas_mov, columnas, lineas_modo = _analizar_bloque(np, bloque)
+        except ValueError:
+            # Línea por línea se saltea sólo la palabra que float() no entiende.
+            self.procesar(bloque.split(b"\n"))
+            return
+        self.capas_comentario += (bloque.count(b"\n;LAYER_CHANGE") + bloque.count(b"\n;LAYER:")
+                                  + bloque.startswith((b";LAYER_CHANGE", b";LAYER:")))
+
+        def linea(i):
+            return bloque[inicio_linea[i]:inicio_linea[i + 1] - 1]
+
+        desde = 0
+        for hasta, linea_modo in zip(np.searchsorted(lineas_mov, lineas_modo).tolist() + [len(lineas_mov)], lineas_modo.tolist() + [None]):
+            if hasta - desde >= MIN_VECTORIZADO:
+                self._mover_columnas(np, *(c[desde:hasta] for c in columnas))
+            elif hasta > desde:
+                self.procesar([linea(i) for i in lineas_mov[desde:hasta].tolist()])
+            if linea_modo is not None:
+                self.procesar([linea(linea_modo)])
+            desde = hasta
+
+    def _mover_columnas(self, np, x, y, z, e, f):
+        """`_mover` para muchos G0/G1 seguidos con el mismo modo; cada columna trae NaN donde falta el eje."""
+        def arrastrar(columna, inicial):
+            # Cada fila toma el último valor indicado hasta ella, o `inicial` si todavía no hubo ninguno.
+            indice = np.where(np.isnan(columna), -1, np.arange(len(columna)))
+            np.maximum.accumulate(indice, out=indice)
+            return np.where(indice >= 0, columna[indice], inicial)
+
+        def acumular(columna, inicial):
+            # Se suma en el mismo orden que línea por línea: inicial + a + b + ...
+            return np.cumsum(np.concatenate(([inicial], np.nan_to_num(columna))))[1:]
+
+        if self.xyz_absoluto:
+            xs, ys, zs = arrastrar(x, self.x), arrastrar(y, self.y), arrastrar(z, self.z)
+        else:
+            xs, ys, zs = acumular(x, self.x), acumular(y, self.y), acumular(z, self.z)
+        if self.e_absoluto:
+            es = arrastrar(e, self.e)
+            de = np.diff(es, prepend=self.e)
+        else:
+            de = np.nan_to_num(e)
+            es = acumular(e, self.e)
+        avance = arrastrar(f, self.avance)
+
+        distancia = np.sqrt(np.diff(xs, prepend=self.x) ** 2 + np.diff(ys, prepend=self.y) ** 2 + np.diff(zs, prepend=self.z) ** 2)
+        distancia = np.where(distancia > 0, distancia, np.abs(de))
+        self.segundos += float(np.sum(distancia / avance)) * 60
+        self.extruido[self.herramienta] += float(de.sum())
+
+        z_extruyendo = zs[de > 0]
+        if len(z_extruyendo):
+            previa = np.maximum.accumulate(np.concatenate(([self.z_ultima_capa], z_extruyendo[:-1])))
+            nuevas = z_extruyendo > previa + 1e-6
+            if nuevas.any():
+                self.capas_z += int(nuevas.sum())
+                self.z_ultima_capa = float(z_extruyendo[nuevas].max())
+        self.x, self.y, self.z, self.e, self.avance = float(xs[-1]), float(ys[-1]), float(zs[-1]), float(es[-1]), float(avance[-1])
+
+    def _mover(self, palabras):
+        x, y, z, e, de = self.x, self.y, self.z, self.e, 0.0
+        for palabra in palabras[1:]:
+            eje = palabra[:1].upper()
+            try:
+                valor = float(palabra[1:])
+            except ValueError:
+                continue
+            if eje == b"X":
+                x = valor if self.xyz_absoluto else x + valor
+            elif eje == b"Y":
+                y = valor if self.xyz_absoluto else y + valor
+            elif eje == b"Z":
+                z = valor if self.xyz_absoluto else z + valor
+            elif eje == b"E":
+                e, de = (valor, valor - self.e) if self.e_absoluto else (self.e + valor, valor)
+            elif eje == b"F" and valor > 0:
+                self.avance = valor
+        # Los arcos (G2/G3) se aproximan por su cuerda.
+        distancia = math.sqrt((x - self.x) ** 2 + (y - self.y) ** 2 + (z - self.z) ** 2) or abs(de)
+        self.segundos += distancia / self.avance * 60
+        if de:
+            self.extruido[self.herramienta] += de
+            self.e = e  # en absoluto, el valor exacto del archivo y no self.e + de con su redondeo
+            if de > 0 and z > self.z_ultima_capa + 1e-6:
+                self.capas_z += 1
+                self.z_ultima_capa = z
+        self.x, self.y, self.z = x, y, z
+
+    def _fijar_posicion(self, palabras):
+        if len(palabras) == 1:
+            self.x = self.y = self.z = self.e = 0.0
+        for palabra in palabras[1:]:
+            eje = palabra[:1].upper()
+            try:
+                valor = float(palabra[1:])
+            except ValueError:
+                continue
+            if eje == b"X": self.x = valor
+            elif eje == b"Y": self.y = valor
+            elif eje == b"Z": self.z = valor
+            elif eje == b"E": self.e = valor
+
+    def _pausa(self, palabras):
+        for palabra in palabras[1:]:
+            eje = palabra[:1].upper()
+            try:
+                valor = float(palabra[1:])
+            except ValueError:
+                continue
+            if eje == b"P": self.segundos += valor / 1000
+            elif eje == b"S": self.segundos += valor
+
+    @property
+    def capas(self):
+        return self.capas_comentario or self.capas_z
+
+
+def _recortar(np, buf, inicio, largo, ancho):
+    """Las palabras que empiezan en `inicio` como array de bytes de `ancho` fijo (las más largas quedan cortadas)."""
+    bytes_ = np.empty((len(inicio), ancho), dtype=np.uint8)
+    for j in range(ancho):
+        bytes_[:, j] = np.where(largo > j, buf[np.minimum(inicio + j, len(buf) - 1)], 0)
+    return bytes_.view(f"S{ancho}").ravel()
+
+def _numeros(np, buf, inicio, largo):
+    """
+    `float()` de cada palabra buf[inicio:inicio + largo]; lanza ValueError si
+    alguna no es un número. Los decimales comunes (signo, hasta 15 cifras y un
+    punto) se calculan columna por columna: la mantisa entera dividida por una
+    potencia de 10 exacta redondea igual que `float()`. Lo demás (exponentes,
+    "inf") pasa por el conversor de NumPy.
+    """
+    mantisa = np.zeros(len(inicio))
+    signo = np.ones(len(inicio))
+    cifras = np.zeros(len(inicio), dtype=np.int64)
+    decimales = np.zeros(len(inicio), dtype=np.int64)
+    punto = np.zeros(len(inicio), dtype=bool)
+    valido = np.ones(len(inicio), dtype=bool)
+    ancho = int(largo.max()) if len(largo) else 0
+    relleno = np.concatenate((buf, np.zeros(ancho, dtype=np.uint8)))  # leer de más no se sale del bloque
+    for j in range(ancho):
+        c = relleno[inicio + j]
+        c[largo <= j] = 0
+        cifra = c - np.uint8(ord("0"))  # los que no son cifras dan la vuelta y quedan en 10 o más
+        digito = cifra < 10
+        es_punto = c == ord(".")
+        mantisa *= np.where(digito, 10.0, 1.0)
+        mantisa += np.where(digito, cifra, 0)
+        cifras += digito
+        decimales += digito & punto
+        valido &= ~(es_punto & punto)
+        punto |= es_punto
+        if j == 0:
+            signo[c == ord("-")] = -1.0
+            valido &= digito | es_punto | (c == ord("-")) | (c == ord("+"))
+        else:
+            valido &= digito | es_punto | (c == 0)
+    valido &= (cifras > 0) & (cifras < len(_POTENCIAS_10))
+    numeros = signo * mantisa / np.array(_POTENCIAS_10)[np.minimum(decimales, len(_POTENCIAS_10) - 1)]
+    otros = np.flatnonzero(~valido)
+    if len(otros):
+        ancho = int(largo[otros].max())
+        if ancho > MAX_PALABRA:
+            raise ValueError("palabra demasiado larga")
+        numeros[otros] = _recortar(np, buf, inicio[otros], largo[otros], ancho).astype(np.float64)
+    return numeros
+
+def _blanquear(m):
+    return b" " * len(m.group())
+
+def _analizar_bloque(np, bloque):
+    """
+    Separa las palabras de un bloque sin pasar por objetos de Python.
+    Devuelve (inicio de cada línea, líneas con G0/G1, columnas de EJES con un
+    valor por G0/G1 o NaN, líneas con cambios de modo). Lanza ValueError si un
+    valor de un G0/G1 no es un número.
+    """
+    # Los comentarios se tapan con espacios para no mover las posiciones.
+    buf = np.frombuffer(PATRON_COMENTARIO.sub(_blanquear, bloque.upper()), dtype=np.uint8)
+    saltos = np.flatnonzero(buf == ord("\n"))
+    palabra = np.ones(len(buf) + 2, dtype=bool)
+    palabra[[0, -1]] = False
+    palabra[1:-1] = buf > ord(" ")  # los bytes de control también separan; en un G-code no aparecen
+    inicio = np.flatnonzero(palabra[1:] > palabra[:-1])
+    largo = np.flatnonzero(palabra[:-1] > palabra[1:]) - inicio
+    linea_palabra = np.searchsorted(saltos, inicio)
+    primera = np.ones(len(inicio), dtype=bool)  # la primera palabra de cada línea es su código
+    primera[1:] = linea_palabra[1:] != linea_palabra[:-1]
+    inicio_linea = np.concatenate(([0], saltos + 1, [len(buf) + 1]))
+
+    codigos = _recortar(np, buf, inicio[primera], np.where(largo[primera] <= ANCHO_CODIGO, largo[primera], 0), ANCHO_CODIGO)
+    lineas_codigo = linea_palabra[primera]
+    lineas_mov = lineas_codigo[np.isin(codigos, CODIGOS_MOVIMIENTO)]
+    lineas_modo = lineas_codigo[np.isin(codigos, CODIGOS_MODO) | (buf[inicio[primera]] == ord("T"))]
+
+    movimiento = np.full(len(inicio_linea), -1)
+    movimiento[lineas_mov] = np.arange(len(lineas_mov))
+    parametro = np.flatnonzero(~primera)
+    parametro = parametro[movimiento[linea_palabra[parametro]] >= 0]
+    parametro = parametro[largo[parametro] > 1]  # una palabra sin valor ("X") se saltea, como línea por línea
+    fila = movimiento[linea_palabra[parametro]]
+    eje = buf[inicio[parametro]]
+    de_eje = np.isin(eje, list(EJES))
+    parametro, fila, eje = parametro[de_eje], fila[de_eje], eje[de_eje]
+    valor = _numeros(np, buf, inicio[parametro] + 1, largo[parametro] - 1)
+
+    columnas = []
+    for letra in EJES:
+        elegidas = np.flatnonzero(eje == letra)
+        numeros = valor[elegidas]
+        if letra == EJES[-1]:  # un F que no es positivo no cambia el avance
+            elegidas, numeros = elegidas[numeros > 0], numeros[numeros > 0]
+        columna = np.full(len(lineas_mov), np.nan)
+        columna[fila[elegidas]] = numeros  # si un eje se repite en la línea, queda el último
+        columnas.append(columna)
+    return inicio_linea, lineas_mov, columnas, lineas_modo
+
+
+def _recorrer(mm, progreso=None):
+    """
+    Recorre el archivo mapeado por bloques cortados en fin de línea. Si en un
+    bloque no hay ningún salto de línea, la línea cortada pasa al bloque
+    siguiente en lugar de partirse en dos.
+    """
+    estado = _EstadoMovimiento()
+    total = len(mm)
+    inicio = 0
+    pendiente = b""  # principio de una línea que no terminó en el bloque anterior
+    while inicio < total:
+        fin = min(inicio + TAMANO_BLOQUE, total)
+        if fin < total:
+            corte = mm.rfind(b"\n", inicio, fin)
+            if corte < 0:
+                pendiente += mm[inicio:fin]
+                inicio = fin
+                continue
+            fin = corte + 1
+        estado.procesar_bloque(pendiente + mm[inicio:fin])
+        pendiente = b""
+        inicio = fin
+        if progreso:
+            progreso(inicio / total)
+    return estado
+
+
+# --- API ---
+
+def gramos_desde_longitud(longitud_mm, densidad, diametro=DIAMETRO_FILAMENTO):
+    """Convierte milímetros de filamento a gramos según diámetro (mm) y densidad (g/cm³)."""
+    area_mm2 = math.pi * (diametro / 2) ** 2
+    return longitud_mm * area_mm2 / 1000 * densidad
+
+def analizar_gcode(ruta, densidad=motor.DENSIDAD_DEFAULT, diametro=None, progreso=None):
+    """
+    Analiza un G-code y devuelve un dict con `gramos`, `horas`,
+    `gramos_por_extrusor`, `capas` (o None) y `origen` ("encabezado",
+    "movimientos" o "mixto", según de dónde salieron los datos).
+
+    `densidad` (g/cm³) sólo se usa cuando el slicer no informa los gramos;
+    en ese caso el resultado trae también `longitud_mm_por_extrusor` y
+    `diametro`, para convertir cada extrusor con la densidad de su propio
+    filamento (ver `gramos_desde_longitud`). `progreso`, si se indica, recibe la fracción leída entre 0 y 1; se llama
+    desde el hilo que ejecuta el análisis.
+    """
+    with open(ruta, "rb") as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            raise ValueError("El archivo G-code está vacío.")
+        with mm:
+            if len(mm) <= 2 * TAMANO_CABECERA:
+                cabecera = leer_cabecera(mm[:])
+            else:
+                cabecera = leer_cabecera(mm[-TAMANO_CABECERA:])
+                cabecera = {**cabecera, **leer_cabecera(mm[:TAMANO_CABECERA])}
+            diametro = diametro or cabecera.get("diametro", DIAMETRO_FILAMENTO)
+            longitudes = None  # sólo si los gramos salen de convertir largos con `densidad`
+            if "longitud_mm_por_extrusor" in cabecera and "gramos_por_extrusor" not in cabecera:
+                longitudes = cabecera["longitud_mm_por_extrusor"]
+                cabecera["gramos_por_extrusor"] = [gramos_desde_longitud(l, densidad, diametro) for l in longitudes]
+
+            if "gramos_por_extrusor" in cabecera and "segundos" in cabecera:
+                origen = "encabezado"
+                capas = cabecera.get("capas")
+                if progreso:
+                    progreso(1.0)
+            else:
+                estado = _recorrer(mm, progreso)
+                origen = "mixto" if ("gramos_por_extrusor" in cabecera or "segundos" in cabecera) else "movimientos"
+                if "gramos_por_extrusor" not in cabecera:
+                    longitudes = [max(l, 0.0) for l in estado.extruido]
+                    cabecera["gramos_por_extrusor"] = [gramos_desde_longitud(l, densidad, diametro) for l in longitudes]
+                cabecera.setdefault("segundos", estado.segundos)
+                capas = cabecera.get("capas") or estado.capas or None
+
+    gramos_por_extrusor = cabecera["gramos_por_extrusor"]
+    resultado = {
+        "gramos": sum(gramos_por_extrusor),
+        "horas": cabecera["segundos"] / 3600,
+        "gramos_por_extrusor": gramos_por_extrusor,
+        "capas": capas,
+        "origen": origen,
+    }
+    if longitudes is not None:
+        resultado["longitud_mm_por_extrusor"] = longitudes
+        resultado["diametro"] = diametro
+    return resultado
@@ -0,0 +1,866 @@
+import customtkinter as ctk
+import threading
+from datetime import datetime
+from tkinter import filedialog, messagebox
+
+import cache_archivos
+import catalogo
+import gcode
+import historial
+import lista_virtual
+import malla
+import motor
+import perfilado
+import persistencia
+import reactivo
+import riesgo
+import tarifario
+import tarifas_luz
+from nucleo import CONFIG_FILE, FILAMENT_TYPES, load_data
+
+# --- CONSTANTES ---
+MAX_COMBO_ITEMS = 200
+RECALC_DELAY_MS = 150  # espera sin teclear antes de recalcular
+HISTORY_POLL_MS = 100  # cada cuánto ver si el historial terminó de escribir
+ERROR_COLOR = "#D32F2F"
+
+
+# --- VENTANA DE EDICIÓN DE FILAMENTO ---
+class FilamentEditorWindow(ctk.CTkToplevel):
+    def __init__(self, master, filament_data=None, on_close_callback=None):
+        super().__init__(master)
+        self.transient(master)
+        self.grab_set()
+        self.on_close_callback = on_close_callback
+        self.filament_data = filament_data
+
+        self.title("Editar Filamento" if filament_data else "Agregar Filamento")
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        
+        self.master.update_idletasks()
+        master_x = master.winfo_x()
+        master_y = master.winfo_y()
+        master_width = master.winfo_width()
+        master_height = master.winfo_height()
+        win_width = 400
+        win_height = 300
+        pos_x = master_x + (master_width // 2) - (win_width // 2)
+        pos_y = master_y + (master_height // 2) - (win_height // 2)
+        self.geometry(f"{win_width}x{win_height}+{pos_x}+{pos_y}")
+        
+        self.label_title = ctk.CTkLabel(self, text="Detalles del Filamento", font=ctk.CTkFont(size=16, weight="bold"))
+        self.label_title.pack(pady=10)
+        self.entry_brand = ctk.CTkEntry(self, placeholder_text="Marca del Filamento")
+        self.entry_brand.pack(pady=10, padx=20, fill="x")
+        self.combobox_type = ctk.CTkComboBox(self, values=FILAMENT_TYPES)
+        self.combobox_type.pack(pady=10, padx=20, fill="x")
+        self.entry_price = ctk.CTkEntry(self, placeholder_text="Precio por KG (ej: 18500.00)")
+        self.entry_price.pack(pady=10, padx=20, fill="x")
+        self.button_save = ctk.CTkButton(self, text="Guardar", command=self.save_filament)
+        self.button_save.pack(pady=20, padx=20)
+
+        if self.filament_data:
+            self.entry_brand.insert(0, self.filament_data.get("brand", ""))
+            self.combobox_type.set(self.filament_data.get("type", "PLA"))
+            self.entry_price.insert(0, str(self.filament_data.get("price_kg", "")))
+
+    def save_filament(self):
+        brand = self.entry_brand.get().strip()
+        f_type = self.combobox_type.get()
+        price_str = self.entry_price.get().strip().replace(",", ".")
+        if not brand or not f_type or not price_str:
+            messagebox.showerror("Error", "Todos los campos son obligatorios.", parent=self)
+            return
+        try:
+            price_kg = float(price_str)
+        except ValueError:
+            messagebox.showerror("Error", "El precio debe ser un número válido.", parent=self)
+            return
+        new_data = {"brand": brand, "type": f_type, "price_kg": price_kg}
+        if self.on_close_callback:
+            self.on_close_callback(new_data, self.filament_data)
+        self.on_close()
+
+    def on_close(self):
+        self.grab_release()
+        self.destroy()
+
+# --- VENTANA DE IMPORTACIÓN DE STL ---
+class StlImportWindow(ctk.CTkToplevel):
+    def __init__(self, master, settings, on_accept_callback=None):
+        super().__init__(master)
+        self.transient(master)
+        self.grab_set()
+        self.settings = settings
+        self.on_accept_callback = on_accept_callback
+
+        self.title("Importar STL")
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        self.master.update_idletasks()
+        master_x = master.winfo_x()
+        master_y = master.winfo_y()
+        master_width = master.winfo_width()
+        master_height = master.winfo_height()
+        win_width = 400
+        win_height = 260
+        pos_x = master_x + (master_width // 2) - (win_width // 2)
+        pos_y = master_y + (master_height // 2) - (win_height // 2)
+        self.geometry(f"{win_width}x{win_height}+{pos_x}+{pos_y}")
+
+        self.label_title = ctk.CTkLabel(self, text="Parámetros de Laminado", font=ctk.CTkFont(size=16, weight="bold"))
+        self.label_title.pack(pady=10)
+        ctk.CTkLabel(self, text="% de Relleno:").pack(padx=20, anchor="w")
+        self.entry_relleno = ctk.CTkEntry(self)
+        self.entry_relleno.pack(pady=(0, 10), padx=20, fill="x")
+        ctk.CTkLabel(self, text="Cantidad de Paredes:").pack(padx=20, anchor="w")
+        self.entry_paredes = ctk.CTkEntry(self)
+        self.entry_paredes.pack(pady=(0, 10), padx=20, fill="x")
+        self.button_accept = ctk.CTkButton(self, text="Elegir archivo STL", command=self.accept)
+        self.button_accept.pack(pady=10, padx=20)
+
+        self.entry_relleno.insert(0, str(settings.get("relleno_pct", "15")))
+        self.entry_paredes.insert(0, str(settings.get("paredes", "2")))
+
+    def accept(self):
+        try:
+            relleno_pct = float(self.entry_relleno.get().strip().replace(",", "."))
+            paredes = int(self.entry_paredes.get().strip())
+        except ValueError:
+            messagebox.showerror("Error", "El relleno y las paredes deben ser números válidos.", parent=self)
+            return
+        if not 0 <= relleno_pct <= 100 or paredes < 0:
+            messagebox.showerror("Error", "El relleno debe estar entre 0 y 100 y las paredes no pueden ser negativas.", parent=self)
+            return
+        path = filedialog.askopenfilename(parent=self, title="Importar STL", filetypes=[("STL", "*.stl"), ("Todos los archivos", "*.*")])
+        if not path:
+            return
+        self.settings["relleno_pct"] = relleno_pct
+        self.settings["paredes"] = paredes
+        if self.on_accept_callback:
+            self.on_accept_callback(path, relleno_pct, paredes)
+        self.on_close()
+
+    def on_close(self):
+        self.grab_release()
+        self.destroy()
+
+# --- VENTANA DE ADMINISTRACIÓN DE FILAMENTOS ---
+class FilamentManagerWindow(ctk.CTkToplevel):
+    def __init__(self, master, app_instance):
+        super().__init__(master)
+        self.app = app_instance
+        self.title("Administrar Filamentos")
+        self.transient(master)
+        self.grab_set()
+
+        self.master.update_idletasks()
+        master_x = master.winfo_x()
+        master_y = master.winfo_y()
+        master_width = master.winfo_width()
+        master_height = master.winfo_height()
+        win_width = 600
+        win_height = 450
+        pos_x = master_x + (master_width // 2) - (win_width // 2)
+        pos_y = master_y + (master_height // 2) - (win_height // 2)
+        self.geometry(f"{win_width}x{win_height}+{pos_x}+{pos_y}")
+
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.main_frame = ctk.CTkFrame(self)
+        self.main_frame.pack(fill="both", expand=True, padx=10, pady=10)
+        self.label_title = ctk.CTkLabel(self.main_frame, text="Mis Filamentos", font=ctk.CTkFont(size=16, weight="bold"))
+        self.label_title.pack(pady=(0, 10))
+        self.search_text = ""
+        self.entry_search = ctk.CTkEntry(self.main_frame, placeholder_text="Buscar filamento...")
+        self.entry_search.pack(fill="x", padx=5, pady=(0, 5))
+        self.entry_search.bind("<KeyRelease>", self.filter_filament_list)
+        self.filament_list = lista_virtual.ListaVirtual(
+            self.main_frame, alto_fila=48, crear_fila=self.create_filament_row, llenar_fila=self.fill_filament_row,
+            contar=lambda: self.app.catalog.contar(self.search_text),
+            obtener=lambda inicio, cantidad: self.app.catalog.pagina(inicio, cantidad, self.search_text))
+        self.filament_list.pack(fill="both", expand=True, padx=5, pady=5)
+        self.button_add = ctk.CTkButton(self.main_frame, text="Agregar Nuevo Filamento", command=self.add_filament)
+        self.button_add.pack(pady=10)
+        self.refresh_filament_list()
+
+    def create_filament_row(self, master):
+        frame = ctk.CTkFrame(master, fg_color=("gray20", "gray20"))
+        frame.label = ctk.CTkLabel(frame, text="", anchor="w")
+        frame.label.pack(side="left", fill="x", expand=True, padx=10)
+        frame.delete_button = ctk.CTkButton(frame, text="Eliminar", width=80, fg_color="#D32F2F", hover_color="#B71C1C")
+        frame.delete_button.pack(side="right", padx=(0, 5), pady=5)
+        frame.edit_button = ctk.CTkButton(frame, text="Editar", width=80)
+        frame.edit_button.pack(side="right", padx=5, pady=5)
+        return frame
+
+    def fill_filament_row(self, frame, filament):
+        info_text = f"{filament['brand']} ({filament['type']}) - ${float(filament['price_kg']):,.2f}/kg"
+        frame.label.configure(text=info_text)
+        frame.delete_button.configure(command=lambda f=filament: self.delete_filament(f))
+        frame.edit_button.configure(command=lambda f=filament: self.edit_filament(f))
+
+    @perfilado.medir()
+    def refresh_filament_list(self):
+        self.filament_list.refrescar()
+
+    @perfilado.medir()
+    def filter_filament_list(self, event=None):
+        self.search_text = self.entry_search.get().strip()
+        self.filament_list.refrescar(volver_al_inicio=True)
+
+    def add_filament(self):
+        FilamentEditorWindow(self, on_close_callback=self.handle_filament_save)
+    
+    def edit_filament(self, filament_data):
+        FilamentEditorWindow(self, filament_data=filament_data, on_close_callback=self.handle_filament_save)
+
+    @perfilado.medir()
+    def handle_filament_save(self, new_data, old_data):
+        if old_data:
+            filament = self.app.catalog.actualizar(old_data['id'], new_data)
+            self.filament_list.refrescar_item(filament)
+        else:
+            filament = self.app.catalog.agregar(new_data)
+            self.refresh_filament_list()
+        self.app.rate_card = self.app.rate_card.con_filamento(filament['id'], filament['price_kg'])
+        self.app.save_app_data()
+        self.app.update_filament_combobox()
+
+    def delete_filament(self, filament_to_delete):
+        if messagebox.askyesno("Confirmar", f"¿Seguro que quieres eliminar el filamento {filament_to_delete['brand']} ({filament_to_delete['type']})?", parent=self):
+            self.app.catalog.eliminar(filament_to_delete['id'])
+            self.app.rate_card = self.app.rate_card.sin_filamento(filament_to_delete['id'])
+            self.app.save_app_data()
+            self.refresh_filament_list()
+            self.app.update_filament_combobox()
+
+    def on_close(self):
+        self.grab_release()
+        self.destroy()
+
+# --- VENTANA DE HISTORIAL DE COTIZACIONES ---
+class HistoryWindow(ctk.CTkToplevel):
+    def __init__(self, master, app_instance):
+        super().__init__(master)
+        self.app = app_instance
+        self.title("Historial de Cotizaciones")
+        self.transient(master)
+        self.grab_set()
+
+        self.master.update_idletasks()
+        master_x = master.winfo_x()
+        master_y = master.winfo_y()
+        master_width = master.winfo_width()
+        master_height = master.winfo_height()
+        win_width = 760
+        win_height = 540
+        pos_x = master_x + (master_width // 2) - (win_width // 2)
+        pos_y = master_y + (master_height // 2) - (win_height // 2)
+        self.geometry(f"{win_width}x{win_height}+{pos_x}+{pos_y}")
+
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.main_frame = ctk.CTkFrame(self)
+        self.main_frame.pack(fill="both", expand=True, padx=10, pady=10)
+        self.label_title = ctk.CTkLabel(self.main_frame, text="Historial de Cotizaciones", font=ctk.CTkFont(size=16, weight="bold"))
+        self.label_title.pack(pady=(0, 10))
+
+        filter_frame = ctk.CTkFrame(self.main_frame, fg_color="transparent")
+        filter_frame.pack(fill="x", padx=5, pady=(0, 5))
+        filter_frame.grid_columnconfigure((0, 1, 2), weight=1)
+        self.entry_from = ctk.CTkEntry(filter_frame, placeholder_text="Desde (AAAA-MM)")
+        self.entry_from.grid(row=0, column=0, padx=(0, 2), sticky="ew")
+        self.entry_to = ctk.CTkEntry(filter_frame, placeholder_text="Hasta (AAAA-MM)")
+        self.entry_to.grid(row=0, column=1, padx=2, sticky="ew")
+        self.combo_type = ctk.CTkComboBox(filter_frame, values=["Todos"] + FILAMENT_TYPES, state="readonly")
+        self.combo_type.set("Todos")
+        self.combo_type.grid(row=0, column=2, padx=2, sticky="ew")
+        self.button_filter = ctk.CTkButton(filter_frame, text="Filtrar", width=80, command=self.apply_filters)
+        self.button_filter.grid(row=0, column=3, padx=(2, 0))
+
+        self.label_summary = ctk.CTkLabel(self.main_frame, text="", justify="left", anchor="w")
+        self.label_summary.pack(fill="x", padx=10, pady=5)
+        self.filters = {}
+        self.pending_refresh = None
+        self.history_list = lista_virtual.ListaVirtual(
+            self.main_frame, alto_fila=36, crear_fila=self.create_history_row, llenar_fila=self.fill_history_row,
+            contar=lambda: self.app.history.contar(**self.filters),
+            obtener=lambda inicio, cantidad: self.app.history.pagina(inicio, cantidad, **self.filters))
+        self.history_list.pack(fill="both", expand=True, padx=5, pady=5)
+        self.button_export = ctk.CTkButton(self.main_frame, text="Exportar CSV", command=self.export_csv)
+        self.button_export.pack(pady=10)
+        self.apply_filters()
+
+    def read_filters(self):
+        filters = {}
+        for key, entry in (("desde", self.entry_from), ("hasta", self.entry_to)):
+            text = entry.get().strip()
+            if text:
+                datetime.strptime(text, "%Y-%m")
+                filters[key] = text
+        if self.combo_type.get() != "Todos":
+            filters["tipo"] = self.combo_type.get()
+        return filters
+
+    @perfilado.medir()
+    def apply_filters(self):
+        try:
+            filters = self.read_filters()
+        except ValueError:
+            messagebox.showerror("Error", "Los meses deben tener el formato AAAA-MM.", parent=self)
+            return
+        if self.pending_refresh is not None:
+            self.after_cancel(self.pending_refresh)
+        self.filters = filters
+        self.show_history()
+
+    def show_history(self):
+        """Muestra lo ya escrito; si quedan cotizaciones en cola, vuelve a mostrar cuando se terminen de escribir."""
+        self.pending_refresh = None
+        if not self.app.history.flush(timeout=0):
+            self.pending_refresh = self.after(HISTORY_POLL_MS, self.refresh_when_written)
+        lines = []
+        for row in self.app.history.resumen("tipo", **self.filters):
+            lines.append(f"{row['tipo'] or 'Sin tipo'}: {row['cantidad']:,} cotizaciones - ingresos $ {row['ingresos']:,.2f} - "
+                         f"ganancia $ {row['ganancia']:,.2f} ({row['margen_pct']:.1f}%)")
+        self.label_summary.configure(text="\n".join(lines) or "No hay cotizaciones para este filtro.")
+        self.history_list.refrescar(volver_al_inicio=True)
+
+    def refresh_when_written(self):
+        if self.app.history.flush(timeout=0):
+            self.show_history()
+        else:
+            self.pending_refresh = self.after(HISTORY_POLL_MS, self.refresh_when_written)
+
+    def create_history_row(self, master):
+        frame = ctk.CTkFrame(master, fg_color=("gray20", "gray20"))
+        frame.label = ctk.CTkLabel(frame, text="", anchor="w")
+        frame.label.pack(side="left", fill="x", expand=True, padx=10)
+        frame.label_price = ctk.CTkLabel(frame, text="", anchor="e", font=ctk.CTkFont(weight="bold"))
+        frame.label_price.pack(side="right", padx=10)
+        return frame
+
+    def fill_history_row(self, frame, quote):
+        filament = quote["filamento"] or quote["filamento_tipo"] or "-"
+        frame.label.configure(text=f"{quote['fecha'][:16]}   {filament}   {quote['gramos']:,.1f} g   {quote['horas']:,.2f} h")
+        frame.label_price.configure(text=f"$ {quote['precio_final']:,.2f}")
+
+    def export_csv(self):
+        path = filedialog.asksaveasfilename(parent=self, title="Exportar historial", defaultextension=".csv", filetypes=[("CSV", "*.csv")])
+        if not path:
+            return
+        filters = dict(self.filters)
+
+        def export(progreso):
+            with open(path, "w", encoding="utf-8", newline="") as f:
+                return self.app.history.exportar_csv(f, progreso, **filters)
+
+        self.app.run_in_background(
+            export, lambda total: messagebox.showinfo("Historial", f"{total:,} cotizaciones exportadas.", parent=self),
+            self.button_export, busy_text="Exportando...", error_title="Error al exportar")
+
+    def on_close(self):
+        if self.pending_refresh is not None:
+            self.after_cancel(self.pending_refresh)
+        self.grab_release()
+        self.destroy()
+
+# --- APLICACIÓN PRINCIPAL ---
+class App(ctk.CTk):
+    @perfilado.medir()
+    def __init__(self):
+        super().__init__()
+        
+        self.data = load_data()
+        self.catalog = catalogo.abrir_catalogo(self.data)
+        self.rate_card = tarifario.compilar(self.data["settings"], self.catalog)
+        self.saver = persistencia.GuardadoDiferido(CONFIG_FILE)
+        self.file_cache = cache_archivos.CacheArchivos(CONFIG_FILE.parent / cache_archivos.NOMBRE_ARCHIVO)
+        self.history = historial.Historial(historial.ruta_historial(self.data["settings"], CONFIG_FILE.parent))
+
+        self.title("Calculadora de Costos de Impresión 3D")
+        self.geometry(self.data["settings"].get("geometry", "950x700"))
+        self.minsize(920, 650)
+
+        ctk.set_appearance_mode("Dark")
+        ctk.set_default_color_theme("blue")
+
+        self.protocol("WM_DELETE_WINDOW", self.on_closing)
+        perfilado.vigilar_bucle(self)
+
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_columnconfigure(1, weight=1)
+        self.grid_rowconfigure(0, weight=1)
+
+        self.frame_inputs = ctk.CTkFrame(self, width=400)
+        self.frame_inputs.grid(row=0, column=0, padx=20, pady=20, sticky="nsew")
+        
+        self.frame_results = ctk.CTkFrame(self, width=400)
+        self.frame_results.grid(row=0, column=1, padx=(0, 20), pady=20, sticky="nsew")
+
+        self.create_inputs_widgets()
+        self.create_results_widgets()
+        self.load_settings_to_ui()
+        self.bind_autosave_events()
+        self.create_live_graph()
+        self.update_filament_combobox()
+        self.clear_results()
+        self.recalculate()
+
+    def create_inputs_widgets(self):
+        frame = self.frame_inputs
+        frame.grid_columnconfigure(1, weight=1)
+        row_idx = 0
+        label_gastos_fijos = ctk.CTkLabel(frame, text="Parámetros Fijos", font=ctk.CTkFont(size=16, weight="bold"))
+        label_gastos_fijos.grid(row=row_idx, column=0, columnspan=2, pady=(10, 15), padx=20); row_idx += 1
+        ctk.CTkLabel(frame, text="Precio Kwh:").grid(row=row_idx, column=0, padx=20, pady=5, sticky="w")
+        self.entry_kwh = ctk.CTkEntry(frame)
+        self.entry_kwh.grid(row=row_idx, column=1, padx=20, pady=5, sticky="ew"); row_idx += 1
+        ctk.CTkLabel(frame, text="Consumo real por hora (W):").grid(row=row_idx, column=0, padx=20, pady=5, sticky="w")
+        self.entry_consumo_w = ctk.CTkEntry(frame)
+        self.entry_consumo_w.grid(row=row_idx, column=1, padx=20, pady=5, sticky="ew"); row_idx += 1
+        ctk.CTkLabel(frame, text="Vida útil de la Máquina (horas):").grid(row=row_idx, column=0, padx=20, pady=5, sticky="w")
+        self.entry_desgaste_horas = ctk.CTkEntry(frame)
+        self.entry_desgaste_horas.grid(row=row_idx, column=1, padx=20, pady=5, sticky="ew"); row_idx += 1
+        ctk.CTkLabel(frame, text="Costo Repuestos:").grid(row=row_idx, column=0, padx=20, pady=5, sticky="w")
+        self.entry_precio_repuestos = ctk.CTkEntry(frame)
+        self.entry_precio_repuestos.grid(row=row_idx, column=1, padx=20, pady=5, sticky="ew"); row_idx += 1
+        ctk.CTkLabel(frame, text="% de Margen de error:").grid(row=row_idx, column=0, padx=20, pady=5, sticky="w")
+        self.entry_margen_error = ctk.CTkEntry(frame)
+        self.entry_margen_error.grid(row=row_idx, column=1, padx=20, pady=5, sticky="ew"); row_idx += 1
+        separator1 = ctk.CTkFrame(frame, height=2, fg_color="gray50")
+        separator1.grid(row=row_idx, column=0, columnspan=2, pady=15, padx=20, sticky="ew"); row_idx += 1
+        label_pieza = ctk.CTkLabel(frame, text="Datos de la Impresión", font=ctk.CTkFont(size=16, weight="bold"))
+        label_pieza.grid(row=row_idx, column=0, columnspan=2, pady=(5, 15), padx=20); row_idx += 1
+        ctk.CTkLabel(frame, text="Filamento a usar:").grid(row=row_idx, column=0, padx=20, pady=5, sticky="w")
+        self.combo_filamento = ctk.CTkComboBox(frame, values=[])
+        self.combo_filamento.grid(row=row_idx, column=1, padx=20, pady=5, sticky="ew"); row_idx += 1
+        self.combo_filamento.bind("<KeyRelease>", self.filter_filament_combobox, add=True)
+        self.button_manage_filaments = ctk.CTkButton(frame, text="Administrar Filamentos", fg_color="gray50", hover_color="gray30", command=self.open_filament_manager)
+        self.button_manage_filaments.grid(row=row_idx, column=0, columnspan=2, pady=10, padx=20); row_idx += 1
+        
+        ctk.CTkLabel(frame, text="Tiempo de impresión:").grid(row=row_idx, column=0, padx=20, pady=5, sticky="w")
+        time_frame = ctk.CTkFrame(frame, fg_color="transparent")
+        time_frame.grid(row=row_idx, column=1, padx=20, pady=5, sticky="ew")
+        time_frame.grid_columnconfigure((0, 1, 2, 3), weight=1)
+        self.entry_dias = ctk.CTkEntry(time_frame, placeholder_text="Días")
+        self.entry_dias.grid(row=0, column=0, padx=(0, 2), sticky="ew")
+        self.entry_horas = ctk.CTkEntry(time_frame, placeholder_text="Horas")
+        self.entry_horas.grid(row=0, column=1, padx=2, sticky="ew")
+        self.entry_minutos = ctk.CTkEntry(time_frame, placeholder_text="Min")
+        self.entry_minutos.grid(row=0, column=2, padx=2, sticky="ew")
+        self.entry_segundos = ctk.CTkEntry(time_frame, placeholder_text="Seg")
+        self.entry_segundos.grid(row=0, column=3, padx=(2, 0), sticky="ew")
+        row_idx += 1
+        ctk.CTkLabel(frame, text="Inicio de impresión:").grid(row=row_idx, column=0, padx=20, pady=5, sticky="w")
+        self.entry_inicio = ctk.CTkEntry(frame, placeholder_text="AAAA-MM-DD HH:MM (vacío = ahora)")
+        self.entry_inicio.grid(row=row_idx, column=1, padx=20, pady=5, sticky="ew"); row_idx += 1
+
+        ctk.CTkLabel(frame, text="Gramos de Filamento:").grid(row=row_idx, column=0, padx=20, pady=5, sticky="w")
+        self.entry_gramos = ctk.CTkEntry(frame)
+        self.entry_gramos.grid(row=row_idx, column=1, padx=20, pady=5, sticky="ew"); row_idx += 1
+        import_frame = ctk.CTkFrame(frame, fg_color="transparent")
+        import_frame.grid(row=row_idx, column=1, padx=20, pady=(0, 5), sticky="ew"); row_idx += 1
+        import_frame.grid_columnconfigure((0, 1), weight=1)
+        self.button_import_gcode = ctk.CTkButton(import_frame, text="Importar G-code", fg_color="gray50", hover_color="gray30", command=self.import_gcode)
+        self.button_import_gcode.grid(row=0, column=0, padx=(0, 2), sticky="ew")
+        self.button_import_stl = ctk.CTkButton(import_frame, text="Importar STL", fg_color="gray50", hover_color="gray30", command=self.import_stl)
+        self.button_import_stl.grid(row=0, column=1, padx=(2, 0), sticky="ew")
+        ctk.CTkLabel(frame, text="Margen de Ganancia (x):").grid(row=row_idx, column=0, padx=20, pady=5, sticky="w")
+        self.entry_ganancia = ctk.CTkEntry(frame, placeholder_text="Ej: 1.5 para 50% de ganancia")
+        self.entry_ganancia.grid(row=row_idx, column=1, padx=20, pady=5, sticky="ew"); row_idx += 1
+        ctk.CTkLabel(frame, text="Costo de Envío:").grid(row=row_idx, column=0, padx=20, pady=5, sticky="w")
+        self.entry_envio = ctk.CTkEntry(frame, placeholder_text="Costo fijo de envío")
+        self.entry_envio.grid(row=row_idx, column=1, padx=20, pady=5, sticky="ew"); row_idx += 1
+        separator2 = ctk.CTkFrame(frame, height=2, fg_color="gray50")
+        separator2.grid(row=row_idx, column=0, columnspan=2, pady=15, padx=20, sticky="ew"); row_idx += 1
+        self.button_calcular = ctk.CTkButton(frame, text="💾 Guardar Cotización", font=ctk.CTkFont(size=14, weight="bold"), height=40, command=self.calculate)
+        self.button_calcular.grid(row=row_idx, column=0, columnspan=2, pady=10, padx=20, sticky="ew"); row_idx += 1
+        self.button_riesgo = ctk.CTkButton(frame, text="🎲 Simular Riesgo", fg_color="gray50", hover_color="gray30", command=self.simulate_risk)
+        self.button_riesgo.grid(row=row_idx, column=0, columnspan=2, pady=(0, 10), padx=20, sticky="ew"); row_idx += 1
+
+    def create_results_widgets(self):
+        frame = self.frame_results
+        frame.grid_columnconfigure(1, weight=1)
+
+        label_resultados = ctk.CTkLabel(frame, text="Resultados del Cálculo", font=ctk.CTkFont(size=20, weight="bold"))
+        label_resultados.grid(row=0, column=0, columnspan=2, pady=(10, 20), padx=20)
+        
+        self.result_labels = {}
+        result_fields = [
+            ("Precio Material:", "material"), ("Precio Luz:", "luz"),
+            ("Desgaste de la máquina:", "desgaste"), ("Margen de Error:", "error"),
+            (f"IVA Luz ({self.data['settings']['iva_luz_pct']}%):", "iva_luz")
+        ]
+        
+        row_idx = 1
+        for text, key in result_fields:
+            label_text = ctk.CTkLabel(frame, text=text, font=ctk.CTkFont(size=14))
+            label_text.grid(row=row_idx, column=0, padx=20, pady=8, sticky="w")
+            value_label = ctk.CTkLabel(frame, text="$ 0.00", font=ctk.CTkFont(size=14, weight="bold"), anchor="e")
+            value_label.grid(row=row_idx, column=1, padx=20, pady=8, sticky="ew")
+            self.result_labels[key] = value_label
+            row_idx += 1
+            
+        separator = ctk.CTkFrame(frame, height=2, fg_color="gray50")
+        separator.grid(row=row_idx, column=0, columnspan=2, pady=10, padx=20, sticky="ew"); row_idx += 1
+        
+        label_costo_text = ctk.CTkLabel(frame, text="COSTO TOTAL:", font=ctk.CTkFont(size=16, weight="bold"))
+        label_costo_text.grid(row=row_idx, column=0, padx=20, pady=10, sticky="w")
+        self.label_costo_valor = ctk.CTkLabel(frame, text="$ 0.00", font=ctk.CTkFont(size=16, weight="bold"), anchor="e")
+        self.label_costo_valor.grid(row=row_idx, column=1, padx=20, pady=10, sticky="ew"); row_idx += 1
+        
+        label_venta_text = ctk.CTkLabel(frame, text="PRECIO DE VENTA:", font=ctk.CTkFont(size=16, weight="bold"))
+        label_venta_text.grid(row=row_idx, column=0, padx=20, pady=10, sticky="w")
+        self.label_venta_valor = ctk.CTkLabel(frame, text="$ 0.00", font=ctk.CTkFont(size=16, weight="bold"), anchor="e")
+        self.label_venta_valor.grid(row=row_idx, column=1, padx=20, pady=10, sticky="ew"); row_idx += 1
+
+        self.label_envio_text = ctk.CTkLabel(frame, text="Costo de Envío:", font=ctk.CTkFont(size=16, weight="bold"))
+        self.label_envio_text.grid(row=row_idx, column=0, padx=20, pady=10, sticky="w")
+        self.label_envio_valor = ctk.CTkLabel(frame, text="$ 0.00", font=ctk.CTkFont(size=16, weight="bold"), anchor="e")
+        self.label_envio_valor.grid(row=row_idx, column=1, padx=20, pady=10, sticky="ew"); row_idx += 1
+
+        total_frame = ctk.CTkFrame(frame, fg_color="#E65100")
+        total_frame.grid(row=row_idx, column=0, columnspan=2, pady=20, padx=20, sticky="ew"); row_idx += 1
+        total_frame.grid_columnconfigure(1, weight=1)
+
+        self.label_total_text = ctk.CTkLabel(total_frame, text="PRECIO FINAL", font=ctk.CTkFont(size=20, weight="bold"))
+        self.label_total_text.grid(row=0, column=0, padx=20, pady=15, sticky="w")
+        self.label_total_valor = ctk.CTkLabel(total_frame, text="$ 0.00", font=ctk.CTkFont(size=22, weight="bold"), anchor="e")
+        self.label_total_valor.grid(row=0, column=1, padx=20, pady=15, sticky="e")
+
+        self.label_status = ctk.CTkLabel(frame, text="", wraplength=380, justify="left")
+        self.label_status.grid(row=row_idx, column=0, columnspan=2, pady=(0, 10), padx=20, sticky="w"); row_idx += 1
+
+        self.button_history = ctk.CTkButton(frame, text="🗂 Historial de Cotizaciones", fg_color="gray50", hover_color="gray30", command=self.open_history)
+        self.button_history.grid(row=row_idx, column=0, columnspan=2, pady=(0, 10), padx=20, sticky="ew"); row_idx += 1
+
+    def create_live_graph(self):
+        """Recálculo en vivo: cada campo alimenta el grafo de `reactivo` y sólo se actualiza lo que cambió."""
+        self.fields = {
+            "precio_kwh": self.entry_kwh, "consumo_w": self.entry_consumo_w,
+            "desgaste_horas": self.entry_desgaste_horas, "precio_repuestos": self.entry_precio_repuestos,
+            "margen_error_pct": self.entry_margen_error, "margen_ganancia_x": self.entry_ganancia,
+            "costo_envio": self.entry_envio, "tiempo_dias": self.entry_dias, "tiempo_horas": self.entry_horas,
+            "tiempo_minutos": self.entry_minutos, "tiempo_segundos": self.entry_segundos,
+            "gramos": self.entry_gramos, "filamento": self.combo_filamento, "inicio": self.entry_inicio,
+        }
+        self.value_labels = dict(self.result_labels, costo_total=self.label_costo_valor, precio_venta=self.label_venta_valor,
+                                 envio=self.label_envio_valor, precio_final=self.label_total_valor)
+        self.graph = reactivo.grafo_cotizacion(self.filament_price, float(self.data["settings"].get("iva_luz_pct", 21)), self.tariff_energy)
+        self.pending_fields = set(self.fields)
+        self.recalc_job = None
+        self.error_fields = set()
+        for field, widget in self.fields.items():
+            widget.bind("<KeyRelease>", lambda event, f=field: self.schedule_recalculation(f), add=True)
+        self.combo_filamento.configure(command=lambda value: self.schedule_recalculation("filamento"))
+
+    def schedule_recalculation(self, field):
+        """Anota el campo cambiado y recalcula cuando se deja de teclear; las teclas seguidas no encolan trabajo."""
+        self.pending_fields.add(field)
+        if self.recalc_job is not None:
+            self.after_cancel(self.recalc_job)
+        self.recalc_job = self.after(RECALC_DELAY_MS, self.recalculate)
+
+    @perfilado.medir()
+    def recalculate(self):
+        if self.recalc_job is not None:
+            self.after_cancel(self.recalc_job)
+            self.recalc_job = None
+        for field in self.pending_fields:
+            self.graph.fijar(f"texto_{field}", self.fields[field].get())
+        self.pending_fields.clear()
+        changes = self.graph.calcular()
+        for key, value in changes.items():
+            if key in self.value_labels:
+                self.value_labels[key].configure(text="$ —" if isinstance(value, reactivo.ErrorCampo) else f"$ {value:,.2f}")
+        if "envio" in changes:
+            self.show_shipping(changes["envio"])
+        self.show_errors()
+
+    def show_shipping(self, costo_envio):
+        if isinstance(costo_envio, float) and costo_envio > 0:
+            self.label_total_text.configure(text="PRECIO FINAL (con envío):")
+            self.label_envio_text.grid()
+            self.label_envio_valor.grid()
+        else:
+            self.label_total_text.configure(text="PRECIO FINAL:")
+            self.label_envio_text.grid_remove()
+            self.label_envio_valor.grid_remove()
+
+    def show_errors(self, include_empty=False):
+        """
+        Marca en rojo los campos con errores y muestra el motivo bajo los
+        resultados. Los campos vacíos sólo se marcan si `include_empty`, para no
+        llenar de rojo una cotización que recién se empieza a cargar.
+        """
+        errors = [v for v in self.graph.valores.values() if isinstance(v, reactivo.ErrorCampo)]
+        fields = {f for e in errors for f in e.campos if include_empty or self.fields[f].get().strip()}
+        for field in fields ^ self.error_fields:
+            widget = self.fields[field]
+            theme = ctk.ThemeManager.theme["CTkComboBox" if widget is self.combo_filamento else "CTkEntry"]
+            widget.configure(border_color=ERROR_COLOR if field in fields else theme["border_color"])
+        self.error_fields = fields
+        shown = next((e for e in errors if fields.intersection(e.campos)), None)
+        self.set_status(str(shown) if shown else "", error=True)
+
+    def set_status(self, text, error=False):
+        self.label_status.configure(text=text, text_color=ERROR_COLOR if error else ("gray10", "gray90"))
+
+    def filament_price(self, name):
+        """Precio por kg del filamento en el tarifario (el mismo con que se guarda la cotización), o None."""
+        filament = self.catalog.por_nombre(name)
+        return self.rate_card.precio_kg(filament["id"]) if filament else None
+
+    def load_settings_to_ui(self):
+        settings = self.data["settings"]
+        self.entry_kwh.insert(0, str(settings.get("precio_kwh", "0")))
+        self.entry_consumo_w.insert(0, str(settings.get("consumo_w", "0")))
+        self.entry_desgaste_horas.insert(0, str(settings.get("desgaste_horas", "0")))
+        self.entry_precio_repuestos.insert(0, str(settings.get("precio_repuestos", "0")))
+        self.entry_margen_error.insert(0, str(settings.get("margen_error_pct", "0")))
+        self.entry_ganancia.insert(0, str(settings.get("margen_ganancia_x", "1.5")))
+        self.entry_envio.insert(0, str(settings.get("costo_envio", "0")))
+    
+    def bind_autosave_events(self):
+        widgets_to_bind = [
+            self.entry_kwh, self.entry_consumo_w, self.entry_desgaste_horas,
+            self.entry_precio_repuestos, self.entry_margen_error, self.entry_ganancia,
+            self.entry_envio
+        ]
+        for widget in widgets_to_bind:
+            widget.bind("<FocusOut>", self.save_settings_from_ui)
+
+    @perfilado.medir()
+    def save_settings_from_ui(self, event=None):
+        try:
+            self.data["settings"]["precio_kwh"] = self.get_float_from_entry(self.entry_kwh, "0")
+            self.data["settings"]["consumo_w"] = self.get_float_from_entry(self.entry_consumo_w, "0")
+            self.data["settings"]["desgaste_horas"] = self.get_float_from_entry(self.entry_desgaste_horas, "0")
+            self.data["settings"]["precio_repuestos"] = self.get_float_from_entry(self.entry_precio_repuestos, "0")
+            self.data["settings"]["margen_error_pct"] = self.get_float_from_entry(self.entry_margen_error, "0")
+            self.data["settings"]["margen_ganancia_x"] = self.get_float_from_entry(self.entry_ganancia, "1.5")
+            self.data["settings"]["costo_envio"] = self.get_float_from_entry(self.entry_envio, "0")
+            self.rate_card = self.rate_card.con_settings(self.data["settings"])
+            self.save_app_data()
+        except (ValueError, TypeError):
+            pass
+
+    @perfilado.medir()
+    def save_app_data(self):
+        self.saver.guardar(self.data)
+        
+    def open_history(self):
+        HistoryWindow(self, app_instance=self)
+
+    def open_filament_manager(self):
+        FilamentManagerWindow(self, app_instance=self)
+
+    @perfilado.medir()
+    def update_filament_combobox(self):
+        if len(self.catalog) > MAX_COMBO_ITEMS:
+            filament_names = self.catalog.buscar("", MAX_COMBO_ITEMS)
+        else:
+            filament_names = self.catalog.nombres()
+        if not filament_names:
+            filament_names = ["No hay filamentos definidos"]
+        current_value = self.combo_filamento.get()
+        self.combo_filamento.configure(values=filament_names)
+        if current_value in filament_names or self.catalog.por_nombre(current_value):
+            self.combo_filamento.set(current_value)
+        else:
+            self.combo_filamento.set(filament_names[0])
+        # El precio del filamento elegido pudo cambiar aunque su nombre sea el mismo.
+        self.graph.invalidar("precio_kg")
+        self.schedule_recalculation("filamento")
+
+    @perfilado.medir()
+    def filter_filament_combobox(self, event=None):
+        """Al escribir en el combo, lo limita a los filamentos que empiezan con lo escrito."""
+        filament_names = self.catalog.buscar(self.combo_filamento.get().strip(), MAX_COMBO_ITEMS)
+        self.combo_filamento.configure(values=filament_names or ["No hay filamentos definidos"])
+
+    def clear_results(self):
+        for label in self.result_labels.values():
+            label.configure(text="$ 0.00")
+        self.label_costo_valor.configure(text="$ 0.00")
+        self.label_venta_valor.configure(text="$ 0.00")
+        self.label_envio_valor.configure(text="$ 0.00")
+        self.label_total_valor.configure(text="$ 0.00")
+        
+        self.label_envio_text.grid_remove()
+        self.label_envio_valor.grid_remove()
+        self.label_total_text.configure(text="PRECIO FINAL")
+
+    def get_float_from_entry(self, entry, default="0"):
+        return float((entry.get() or default).strip().replace(",", "."))
+
+    def get_selected_filament(self):
+        return self.catalog.por_nombre(self.combo_filamento.get())
+
+    def set_entry_text(self, entry, text):
+        entry.delete(0, "end")
+        entry.insert(0, text)
+        for field, widget in self.fields.items():
+            if widget is entry:
+                self.schedule_recalculation(field)
+
+    def run_in_background(self, task, on_done, button, busy_text="Analizando...", error_title="Error al importar"):
+        """
+        Ejecuta `task(progreso)` en un hilo aparte y muestra el avance en el texto
+        de `button`. El hilo sólo escribe en `state`; la ventana lo consulta con
+        `after`, así Tk nunca se toca desde fuera del hilo principal.
+        """
+        state = {"progress": 0.0, "result": None, "error": None, "done": False}
+        original_text = button.cget("text")
+
+        def worker():
+            try:
+                with perfilado.tramo(busy_text.rstrip(". ")):
+                    state["result"] = task(lambda fraction: state.__setitem__("progress", fraction))
+            except Exception as e:
+                state["error"] = e
+            state["done"] = True
+
+        def poll():
+            if not state["done"]:
+                button.configure(text=f"{busy_text} {state['progress']:.0%}")
+                self.after(100, poll)
+                return
+            button.configure(text=original_text, state="normal")
+            if state["error"] is not None:
+                messagebox.showerror(error_title, f"No se pudo completar la operación.\n\nDetalle: {state['error']}")
+            else:
+                on_done(state["result"])
+
+        button.configure(state="disabled")
+        threading.Thread(target=worker, daemon=True).start()
+        self.after(100, poll)
+
+    def import_gcode(self):
+        path = filedialog.askopenfilename(parent=self, title="Importar G-code", filetypes=[("G-code", "*.gcode *.gco *.g"), ("Todos los archivos", "*.*")])
+        if not path:
+            return
+        densidad = motor.densidad_filamento(self.get_selected_filament())
+        parametros = {"tipo": "gcode", "densidad": densidad}
+        self.run_in_background(lambda progreso: self.analyze_cached(path, parametros, lambda: gcode.analizar_gcode(path, densidad, progreso=progreso)), self.apply_print_metrics, self.button_import_gcode)
+
+    def import_stl(self):
+        StlImportWindow(self, self.data["settings"], on_accept_callback=self.start_stl_import)
+
+    def start_stl_import(self, path, relleno_pct, paredes):
+        self.save_app_data()
+        densidad = motor.densidad_filamento(self.get_selected_filament())
+        parametros = {"tipo": "stl", "densidad": densidad, "relleno_pct": relleno_pct, "paredes": paredes}
+        self.run_in_background(lambda progreso: self.analyze_cached(path, parametros, lambda: malla.analizar_stl(path, densidad, relleno_pct, paredes, progreso=progreso)), self.apply_print_metrics, self.button_import_stl)
+
+    @perfilado.medir()
+    def analyze_cached(self, path, parametros, analizador):
+        """Corre en el hilo de importación: usa el caché de archivos y lo guarda si hubo un análisis nuevo."""
+        metrics = self.file_cache.analizar(path, parametros, analizador)
+        self.file_cache.persistir()
+        return metrics
+
+    def apply_print_metrics(self, metrics):
+        """Completa gramos y tiempo de impresión con lo obtenido de un archivo importado."""
+        self.set_entry_text(self.entry_gramos, f"{metrics['gramos']:.2f}")
+        if metrics.get("horas"):
+            for entry, value in zip((self.entry_dias, self.entry_horas, self.entry_minutos, self.entry_segundos), motor.tiempo_desde_horas(metrics["horas"])):
+                self.set_entry_text(entry, str(value))
+
+    def read_quote_inputs(self):
+        """Lee de los campos los datos de la pieza. Lanza ValueError si falta el filamento o hay texto no numérico."""
+        parametros = {
+            "precio_kwh": self.get_float_from_entry(self.entry_kwh),
+            "consumo_w": self.get_float_from_entry(self.entry_consumo_w),
+            "desgaste_horas": self.get_float_from_entry(self.entry_desgaste_horas),
+            "precio_repuestos": self.get_float_from_entry(self.entry_precio_repuestos),
+            "margen_error_pct": self.get_float_from_entry(self.entry_margen_error),
+            "iva_luz_pct": float(self.data["settings"].get("iva_luz_pct", 21)),
+            "margen_ganancia_x": self.get_float_from_entry(self.entry_ganancia),
+            "costo_envio": self.get_float_from_entry(self.entry_envio),
+        }
+        gramos_filamento = self.get_float_from_entry(self.entry_gramos)
+        horas_impresion = motor.horas_desde_tiempo(
+            self.get_float_from_entry(self.entry_dias), self.get_float_from_entry(self.entry_horas),
+            self.get_float_from_entry(self.entry_minutos), self.get_float_from_entry(self.entry_segundos))
+
+        selected_filament = self.get_selected_filament()
+        if not selected_filament: raise ValueError(motor.ERROR_FILAMENTO)
+        precio_kg_filamento = self.rate_card.precio_kg(selected_filament["id"])
+        if precio_kg_filamento is None: raise ValueError(motor.ERROR_FILAMENTO)
+        return gramos_filamento, horas_impresion, precio_kg_filamento, parametros
+
+    def tariff_energy(self, inicio, horas, consumo_w, precio_kwh):
+        """Costo de la luz según la tarifa por franja horaria, o None si se cotiza con el kWh fijo."""
+        tarifa = tarifas_luz.tarifa_desde_settings(dict(self.data["settings"], precio_kwh=precio_kwh))
+        if tarifa is None or horas <= 0:
+            return None
+        return tarifa.costo(tarifas_luz.horas_desde_inicio(inicio), horas, consumo_w)
+
+    def energy_cost(self, horas, parametros):
+        return self.tariff_energy(self.entry_inicio.get(), horas, parametros["consumo_w"], parametros["precio_kwh"])
+
+    @perfilado.medir()
+    def calculate(self):
+        """
+        Guarda en el historial la cotización que se ve en pantalla (los
+        resultados ya están al día), hecha con el tarifario y su versión.
+        """
+        self.recalculate()
+        try:
+            gramos, horas, precio_kg, parametros = self.read_quote_inputs()
+            filament = dict(self.get_selected_filament(), nombre=self.combo_filamento.get())
+            # Lo que todavía no se guardó en la configuración (un campo editado sin salir de él) se cotiza como ajuste.
+            ajustes = {k: v for k, v in parametros.items() if v != self.rate_card.parametros[k]}
+            resultado = self.rate_card.cotizar(gramos, horas, filament["id"], inicio=self.entry_inicio.get(), ajustes=ajustes)
+        except (ValueError, TypeError):
+            self.show_errors(include_empty=True)
+            return
+        self.history.registrar(resultado, gramos, horas, precio_kg, parametros, filament)
+        self.set_status(f"Cotización guardada en el historial: $ {resultado['precio_final']:,.2f}")
+
+    def simulate_risk(self):
+        """Simula el costo real en segundo plano y ofrece usar el multiplicador sugerido."""
+        try:
+            gramos, horas, precio_kg, parametros = self.read_quote_inputs()
+            config = riesgo.config_desde_settings(self.data["settings"])
+            motor.cotizar(gramos, horas, precio_kg, parametros)
+            luz = self.energy_cost(horas, parametros)
+            if luz is not None and parametros["consumo_w"] > 0:
+                # La simulación varía el precio del kWh: se parte del precio promedio de la ventana de impresión.
+                parametros["precio_kwh"] = luz / ((parametros["consumo_w"] / 1000) * horas)
+        except (ValueError, TypeError) as e:
+            messagebox.showerror("Error de Entrada", f"Por favor, verifica que todos los campos contengan números válidos.\n\nDetalle: {e}")
+            return
+        self.run_in_background(lambda progreso: riesgo.simular(gramos, horas, precio_kg, parametros, config),
+                               self.show_risk_result, self.button_riesgo,
+                               busy_text="Simulando...", error_title="Error en la simulación")
+
+    def show_risk_result(self, r):
+        objetivo = self.data["settings"].get("riesgo_perdida_objetivo_pct", "5")
+        texto = (
+            f"Costo con margen de error fijo: $ {r['cotizacion']['costo_total']:,.2f}\n\n"
+            f"Costo simulado ({r['muestras']:,} muestras):\n"
+            f"    P50: $ {r['p50']:,.2f}\n    P90: $ {r['p90']:,.2f}\n    P99: $ {r['p99']:,.2f}\n\n"
+            f"Probabilidad de pérdida con el precio actual: {r['prob_perdida']:.2%}\n"
+            f"Multiplicador para {objetivo}% de pérdida: {r['multiplicador']:.3f}\n\n"
+            f"¿Usar {r['multiplicador']:.3f} como margen de ganancia?")
+        if messagebox.askyesno("Riesgo de la Cotización", texto, parent=self):
+            self.set_entry_text(self.entry_ganancia, f"{r['multiplicador']:.3f}")
+            self.save_settings_from_ui()
+
+    def on_closing(self):
+        """Se ejecuta al cerrar la ventana para guardar el estado."""
+        self.update_idletasks()
+        try:
+            size_only = self.geometry().split('+')[0]
+            self.data["settings"]["geometry"] = size_only
+        except:
+            pass
+        self.save_settings_from_ui()
+        self.saver.cerrar()
+        self.file_cache.persistir()
+        self.history.cerrar()
+        self.catalog.cerrar()
+        perfilado.cerrar()
+        self.destroy()
@@ -0,0 +1,338 @@
+"""
+Historial de cotizaciones.
+
+Cada cotización (datos de entrada, filamento, componentes del costo, precio
+final y versión del tarifario, con fecha y hora) se agrega a un archivo SQLite en modo WAL. Las filas
+no se modifican ni se borran: la base lo impide con triggers. La escritura va
+en un hilo aparte, así que registrar una cotización no frena la ventana.
+
+Junto con cada fila se actualiza, en la misma transacción, un resumen por mes
+y filamento; los totales por mes, tipo o filamento salen de ese resumen y no
+dependen de cuántas cotizaciones haya en la tabla principal.
+
+    python historial.py resumen --por tipo --desde 2026-01 --hasta 2026-06
+    python historial.py exportar contabilidad.csv --desde 2026-01
+"""
+import bisect
+import csv
+import json
+import sys
+import threading
+from datetime import datetime
+
+import motor
+import perfilado
+
+# --- CONSTANTES ---
+NOMBRE_ARCHIVO = "historial.db"
+TAMANO_BLOQUE = 5000
+FORMATO_FECHA = "%Y-%m-%d %H:%M:%S"
+COLUMNAS = (
+    "fecha", "filamento_id", "filamento", "filamento_tipo", "gramos", "horas", "precio_kg", "parametros",
+) + motor.COMPONENTES + ("version_tarifario",)
+AGRUPACIONES = {"mes": "mes", "tipo": "filamento_tipo", "filamento": "filamento_id"}
+
+ESQUEMA = f"""
+    CREATE TABLE IF NOT EXISTS cotizaciones (
+        id INTEGER PRIMARY KEY,
+        fecha TEXT NOT NULL,
+        filamento_id TEXT NOT NULL,
+        filamento TEXT NOT NULL,
+        filamento_tipo TEXT NOT NULL,
+        gramos REAL NOT NULL,
+        horas REAL NOT NULL,
+        precio_kg REAL NOT NULL,
+        parametros TEXT NOT NULL,
+        {", ".join(f"{c} REAL NOT NULL" for c in motor.COMPONENTES)},
+        version_tarifario TEXT NOT NULL DEFAULT ''
+    );
+    CREATE INDEX IF NOT EXISTS cotizaciones_fecha ON cotizaciones (fecha);
+    CREATE INDEX IF NOT EXISTS cotizaciones_tipo ON cotizaciones (filamento_tipo, fecha);
+    CREATE INDEX IF NOT EXISTS cotizaciones_filamento ON cotizaciones (filamento_id, fecha);
+
+    CREATE TABLE IF NOT EXISTS resumen_mensual (
+        mes TEXT NOT NULL,
+        filamento_tipo TEXT NOT NULL,
+        filamento_id TEXT NOT NULL,
+        cantidad INTEGER NOT NULL,
+        gramos REAL NOT NULL,
+        horas REAL NOT NULL,
+        costo_total REAL NOT NULL,
+        precio_venta REAL NOT NULL,
+        precio_final REAL NOT NULL,
+        margen_x REAL NOT NULL,
+        PRIMARY KEY (mes, filamento_tipo, filamento_id)
+    ) WITHOUT ROWID;
+
+    CREATE TRIGGER IF NOT EXISTS cotizaciones_resumen AFTER INSERT ON cotizaciones BEGIN
+        INSERT INTO resumen_mensual VALUES (
+            substr(NEW.fecha, 1, 7), NEW.filamento_tipo, NEW.filamento_id, 1, NEW.gramos, NEW.horas,
+            NEW.costo_total, NEW.precio_venta, NEW.precio_final, COALESCE(NEW.precio_venta / NULLIF(NEW.costo_total, 0), 0))
+        ON CONFLICT DO UPDATE SET
+            cantidad = cantidad + 1, gramos = gramos + excluded.gramos, horas = horas + excluded.horas,
+            costo_total = costo_total + excluded.costo_total, precio_venta = precio_venta + excluded.precio_venta,
+            precio_final = precio_final + excluded.precio_final, margen_x = margen_x + excluded.margen_x;
+    END;
+    CREATE TRIGGER IF NOT EXISTS cotizaciones_sin_cambios BEFORE UPDATE ON cotizaciones BEGIN
+        SELECT RAISE(ABORT, 'El historial de cotizaciones no se puede modificar.');
+    END;
+    CREATE TRIGGER IF NOT EXISTS cotizaciones_sin_borrado BEFORE DELETE ON cotizaciones BEGIN
+        SELECT RAISE(ABORT, 'El historial de cotizaciones no se puede borrar.');
+    END;
+"""
+
+
+def ruta_historial(settings, carpeta):
+    """`settings["historial_db"]` si está configurado; si no, `historial.db` en `carpeta`."""
+    return settings.get("historial_db") or carpeta / NOMBRE_ARCHIVO
+
+def _conectar(ruta):
+    import sqlite3
+
+    conexion = sqlite3.connect(ruta, check_same_thread=False)
+    conexion.execute("PRAGMA journal_mode=WAL")
+    conexion.executescript(ESQUEMA)
+    columnas = {fila[1] for fila in conexion.execute("PRAGMA table_info(cotizaciones)")}
+    if "version_tarifario" not in columnas:
+        # Historiales anteriores al tarifario versionado: sus filas quedan sin versión.
+        try:
+            with conexion:
+                conexion.execute("ALTER TABLE cotizaciones ADD COLUMN version_tarifario TEXT NOT NULL DEFAULT ''")
+        except sqlite3.OperationalError:
+            pass  # otra conexión la agregó primero
+    return conexion
+
+def _filtros(desde=None, hasta=None, tipo=None, filamento_id=None, por_mes=False):
+    """
+    WHERE para la tabla de cotizaciones o, con `por_mes`, para el resumen.
+    `desde` y `hasta` son meses (AAAA-MM) incluidos; también se aceptan fechas.
+    """
+    condiciones, parametros = [], []
+    if desde:
+        condiciones.append("mes >= ?" if por_mes else "fecha >= ?")
+        parametros.append(str(desde)[:7])
+    if hasta:
+        # ':' va después de '-' y de los dígitos: toma todo el mes de `hasta` y ninguno posterior.
+        condiciones.append("mes <= ?" if por_mes else "fecha < ?")
+        parametros.append(str(hasta)[:7] if por_mes else str(hasta)[:7] + ":")
+    if tipo:
+        condiciones.append("filamento_tipo = ?")
+        parametros.append(tipo)
+    if filamento_id:
+        condiciones.append("filamento_id = ?")
+        parametros.append(filamento_id)
+    return (" WHERE " + " AND ".join(condiciones) if condiciones else ""), parametros
+
+
+class Historial:
+    """
+    `registrar` encola la cotización y vuelve enseguida; un hilo la escribe
+    (junto con las que se hayan acumulado) en una sola transacción. `flush`
+    espera a que esté todo escrito y `cerrar` además termina el hilo.
+    La base se abre recién al primer uso para no demorar el arranque.
+    Las consultas usan una conexión propia del hilo que creó el historial
+    (el de la ventana); `exportar_csv` abre otra para poder correr aparte.
+    """
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._condicion = threading.Condition()
+        self._pendientes = []
+        self._escribiendo = False
+        self._cerrado = False
+        self._hilo = None
+        self._lectura = None
+        self._marcas = (None, [], {})  # (filtros, posiciones ordenadas, posición -> (fecha, id) de la fila anterior)
+
+    # --- Escritura ---
+
+    def registrar(self, resultado, gramos, horas, precio_kg, parametros, filamento=None, fecha=None):
+        """Agrega una cotización de `motor.cotizar` o del tarifario con sus datos de entrada."""
+        filamento = filamento or {}
+        fila = (
+            (fecha or datetime.now()).strftime(FORMATO_FECHA),
+            filamento.get("id", ""), filamento.get("nombre", ""), filamento.get("type", ""),
+            gramos, horas, precio_kg, json.dumps(parametros, sort_keys=True),
+        ) + tuple(resultado[c] for c in motor.COMPONENTES) + (resultado.get("version_tarifario", ""),)
+        with self._condicion:
+            if self._cerrado:
+                raise RuntimeError("El historial ya está cerrado.")
+            if self._hilo is None:
+                self._hilo = threading.Thread(target=self._trabajar, name="Historial", daemon=True)
+                self._hilo.start()
+            self._pendientes.append(fila)
+            self._condicion.notify_all()
+
+    def flush(self, timeout=None):
+        """Espera a que se escriban las cotizaciones pendientes. Devuelve False si venció `timeout`."""
+        with self._condicion:
+            return self._condicion.wait_for(lambda: not self._pendientes and not self._escribiendo, timeout)
+
+    def cerrar(self, timeout=None):
+        self.flush(timeout)
+        with self._condicion:
+            self._cerrado = True
+            self._condicion.notify_all()
+        if self._hilo is not None:
+            self._hilo.join(timeout)
+        if self._lectura is not None:
+            self._lectura.close()
+            self._lectura = None
+
+    def _trabajar(self):
+        conexion = _conectar(self.ruta)
+        sql = f"INSERT INTO cotizaciones ({', '.join(COLUMNAS)}) VALUES ({', '.join('?' * len(COLUMNAS))})"
+        try:
+            while True:
+                with self._condicion:
+                    self._condicion.wait_for(lambda: self._pendientes or self._cerrado)
+                    if not self._pendientes:
+                        return
+                    filas, self._pendientes = self._pendientes, []
+                    self._escribiendo = True
+                try:
+                    with conexion:
+                        conexion.executemany(sql, filas)
+                    self._marcas = (None, [], {})  # las filas nuevas corren las posiciones
+                    perfilado.contar(perfilado.CONTADOR_ESCRITURAS)
+                except Exception as e:
+                    print(f"Error al guardar el historial de cotizaciones: {e}")
+                finally:
+                    with self._condicion:
+                        self._escribiendo = False
+                        self._condicion.notify_all()
+        finally:
+            conexion.close()
+
+    # --- Consultas ---
+
+    def _filas(self, sql, parametros=()):
+        if self._lectura is None:
+            self._lectura = _conectar(self.ruta)
+        return self._lectura.execute(sql, parametros).fetchall()
+
+    @staticmethod
+    def _contar(consultar, **filtros):
+        donde, parametros = _filtros(por_mes=True, **filtros)
+        return consultar(f"SELECT COALESCE(SUM(cantidad), 0) FROM resumen_mensual{donde}", parametros)[0][0]
+
+    def contar(self, **filtros):
+        """Cantidad de cotizaciones que cumplen los filtros (`desde`, `hasta`, `tipo`, `filamento_id`)."""
+        return self._contar(self._filas, **filtros)
+
+    def pagina(self, inicio, cantidad, **filtros):
+        """
+        Cotizaciones de la más nueva a la más vieja, como dicts con las COLUMNAS más `id`.
+
+        Se pagina por (fecha, id): cada página recuerda la clave de su última
+        fila, y la siguiente consulta arranca desde la marca más cercana
+        anterior a `inicio` en lugar de saltear todas las filas con OFFSET.
+        Al desplazarse por la lista, cada página cuesta lo mismo sin importar
+        qué tan abajo esté.
+        """
+        donde, parametros = _filtros(**filtros)
+        clave = tuple(sorted(filtros.items()))
+        marcas = self._marcas
+        if marcas[0] != clave:
+            marcas = self._marcas = (clave, [], {})
+        _, posiciones, anteriores = marcas
+        desde = posiciones[bisect.bisect_right(posiciones, inicio) - 1] if posiciones and posiciones[0] <= inicio else 0
+        if desde:
+            donde += (" AND " if donde else " WHERE ") + "(fecha, id) < (?, ?)"
+            parametros = parametros + list(anteriores[desde])
+        filas = self._filas(
+            f"SELECT id, {', '.join(COLUMNAS)} FROM cotizaciones{donde} ORDER BY fecha DESC, id DESC LIMIT ? OFFSET ?",
+            parametros + [cantidad, inicio - desde])
+        fin = inicio + len(filas)
+        if filas and fin not in anteriores:
+            anteriores[fin] = (filas[-1][1], filas[-1][0])
+            bisect.insort(posiciones, fin)
+        return [dict(zip(("id",) + COLUMNAS, fila)) for fila in filas]
+
+    def resumen(self, por="mes", **filtros):
+        """
+        Totales agrupados por `mes`, `tipo` o `filamento`: cantidad, gramos,
+        horas, costo, venta, ingresos (precio final), ganancia, margen sobre la
+        venta y multiplicador de ganancia promedio.
+        """
+        if por not in AGRUPACIONES:
+            raise ValueError(f"Agrupación desconocida: {por}. Opciones: {', '.join(AGRUPACIONES)}")
+        columna = AGRUPACIONES[por]
+        donde, parametros = _filtros(por_mes=True, **filtros)
+        filas = self._filas(
+            f"SELECT {columna}, SUM(cantidad), SUM(gramos), SUM(horas), SUM(costo_total), SUM(precio_venta), "
+            f"SUM(precio_final), SUM(margen_x) FROM resumen_mensual{donde} GROUP BY {columna} ORDER BY {columna}",
+            parametros)
+        resultado = []
+        for clave, cantidad, gramos, horas, costo, venta, ingresos, margen_x in filas:
+            resultado.append({
+                por: clave, "cantidad": cantidad, "gramos": gramos, "horas": horas,
+                "costo_total": costo, "precio_venta": venta, "ingresos": ingresos,
+                "ganancia": venta - costo, "margen_pct": (venta - costo) / venta * 100 if venta else 0.0,
+                "margen_x_promedio": margen_x / cantidad,
+            })
+        return resultado
+
+    def exportar_csv(self, salida, progreso=None, **filtros):
+        """
+        Escribe las cotizaciones (de la más vieja a la más nueva) en `salida`, un
+        archivo de texto abierto, de a bloques: no carga el historial en memoria.
+        Usa su propia conexión para poder correr en otro hilo; `progreso(fraccion)`
+        se llama después de cada bloque. Devuelve las filas escritas.
+        """
+        donde, parametros = _filtros(**filtros)
+        conexion = _conectar(self.ruta)
+        try:
+            esperadas = self._contar(lambda sql, p: conexion.execute(sql, p).fetchall(), **filtros) if progreso else 0
+            cursor = conexion.execute(f"SELECT id, {', '.join(COLUMNAS)} FROM cotizaciones{donde} ORDER BY fecha, id", parametros)
+            writer = csv.writer(salida, lineterminator="\n")
+            writer.writerow(("id",) + COLUMNAS)
+            total = 0
+            while filas := cursor.fetchmany(TAMANO_BLOQUE):
+                writer.writerows(filas)
+                total += len(filas)
+                if progreso and esperadas:
+                    progreso(min(total / esperadas, 1.0))
+            return total
+        finally:
+            conexion.close()
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Consulta y exporta el historial de cotizaciones.")
+    subcomandos = parser.add_subparsers(dest="comando", required=True)
+    resumen = subcomandos.add_parser("resumen", help="Totales agrupados")
+    resumen.add_argument("--por", choices=list(AGRUPACIONES), default="mes")
+    exportar = subcomandos.add_parser("exportar", help="Exporta las cotizaciones a CSV")
+    exportar.add_argument("salida", help="CSV de salida ('-' para stdout)")
+    for sub in (resumen, exportar):
+        sub.add_argument("--desde", help="Mes inicial (AAAA-MM)")
+        sub.add_argument("--hasta", help="Mes final incluido (AAAA-MM)")
+        sub.add_argument("--tipo", help="Tipo de filamento (PLA, PETG, ...)")
+        sub.add_argument("--filamento", dest="filamento_id", help="Id del filamento")
+    args = parser.parse_args(argv)
+
+    from nucleo import CONFIG_FILE, load_data
+    historial = Historial(ruta_historial(load_data()["settings"], CONFIG_FILE.parent))
+    filtros = {"desde": args.desde, "hasta": args.hasta, "tipo": args.tipo, "filamento_id": args.filamento_id}
+    try:
+        if args.comando == "resumen":
+            for fila in historial.resumen(args.por, **filtros):
+                print(f"{fila[args.por] or '-':<24} {fila['cantidad']:>8}  ingresos $ {fila['ingresos']:>14,.2f}  "
+                      f"ganancia $ {fila['ganancia']:>14,.2f}  margen {fila['margen_pct']:5.1f}%  x{fila['margen_x_promedio']:.2f}")
+            return 0
+        salida = sys.stdout if args.salida == "-" else open(args.salida, "w", encoding="utf-8", newline="")
+        try:
+            total = historial.exportar_csv(salida, **filtros)
+        finally:
+            if salida is not sys.stdout:
+                salida.close()
+        print(f"{total} cotizaciones exportadas.", file=sys.stderr)
+        return 0
+    finally:
+        historial.cerrar()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+"""
+Lista virtualizada para customtkinter.
+
+Sólo existen widgets para las filas que entran en pantalla; al desplazarse
+se reutilizan cambiando su contenido, así que abrir una lista de miles de
+elementos cuesta lo mismo que abrir una de diez.
+"""
+import tkinter
+
+import customtkinter as ctk
+
+import perfilado
+
+# --- CONSTANTES ---
+FILAS_POR_PASO_RUEDA = 3
+
+
+class ListaVirtual(ctk.CTkFrame):
+    """
+    `crear_fila(master)` construye una fila vacía (se llama una vez por fila
+    visible); `llenar_fila(fila, item)` le pone los datos de un elemento.
+    `contar()` devuelve la cantidad de elementos y `obtener(inicio, cantidad)`
+    una página de ellos. Los elementos son dicts identificados por `clave`.
+    `alto_fila` es la altura de cada fila incluyendo su separación.
+    """
+
+    def __init__(self, master, alto_fila, crear_fila, llenar_fila, contar, obtener, clave="id", **kwargs):
+        super().__init__(master, **kwargs)
+        self.alto_fila = alto_fila
+        self.crear_fila = crear_fila
+        self.llenar_fila = llenar_fila
+        self.contar = contar
+        self.obtener = obtener
+        self.clave = clave
+        self.inicio = 0
+        self.total = 0
+        self.visibles = 1
+        self.filas = []
+        self.mostrados = []  # copia del elemento que muestra cada fila, o None si está oculta
+
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(0, weight=1)
+        self.cuerpo = ctk.CTkFrame(self, fg_color="transparent")
+        self.cuerpo.grid(row=0, column=0, sticky="nsew")
+        self.cuerpo.grid_columnconfigure(0, weight=1)
+        self.cuerpo.grid_propagate(False)
+        self.barra = ctk.CTkScrollbar(self, command=self.desplazar)
+        self.barra.grid(row=0, column=1, sticky="ns")
+
+        tkinter.Misc.bind(self.cuerpo, "<Configure>", self._al_redimensionar, "+")
+        self._enlazar_rueda(self.cuerpo)
+
+    def _enlazar_rueda(self, widget):
+        # Se enlaza cada widget de tk por separado (no con el bind de CTk, que
+        # reenvía a sus widgets internos) para no recibir el evento dos veces.
+        for secuencia in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            tkinter.Misc.bind(widget, secuencia, self._rueda, "+")
+        for hijo in widget.winfo_children():
+            self._enlazar_rueda(hijo)
+
+    @perfilado.medir()
+    def _al_redimensionar(self, event):
+        alto_fila = self._apply_widget_scaling(self.alto_fila)  # event.height viene en píxeles reales
+        self.visibles = max(1, int(event.height // alto_fila))
+        while len(self.filas) < self.visibles:
+            fila = self.crear_fila(self.cuerpo)
+            fila.grid(row=len(self.filas), column=0, padx=5, pady=5, sticky="ew")
+            fila.grid_remove()
+            self._enlazar_rueda(fila)
+            self.filas.append(fila)
+            self.mostrados.append(None)
+        self._dibujar()
+
+    def _rueda(self, event):
+        if event.num == 4:
+            pasos = -1
+        elif event.num == 5:
+            pasos = 1
+        else:
+            pasos = -1 if event.delta > 0 else 1
+        self.desplazar("scroll", pasos * FILAS_POR_PASO_RUEDA, "units")
+
+    def desplazar(self, accion, *args):
+        """Recibe los comandos de la barra de desplazamiento ('moveto' o 'scroll')."""
+        if accion == "moveto":
+            self.inicio = int(float(args[0]) * self.total)
+        elif accion == "scroll":
+            pasos = int(args[0])
+            self.inicio += pasos * self.visibles if args[1] == "pages" else pasos
+        self._dibujar()
+
+    def refrescar(self, volver_al_inicio=False):
+        """Vuelve a consultar la cantidad y la página visible. No crea widgets."""
+        self.total = self.contar()
+        if volver_al_inicio:
+            self.inicio = 0
+        self._dibujar()
+
+    def refrescar_item(self, item):
+        """Actualiza sólo la fila que está mostrando `item`, si está en pantalla."""
+        for i, mostrado in enumerate(self.mostrados):
+            if mostrado is not None and mostrado[self.clave] == item[self.clave]:
+                self.llenar_fila(self.filas[i], item)
+                self.mostrados[i] = dict(item)
+
+    @perfilado.medir()
+    def _dibujar(self):
+        visibles = min(self.visibles, len(self.filas))
+        self.inicio = max(0, min(self.inicio, self.total - visibles))
+        items = self.obtener(self.inicio, visibles) if visibles else []
+        for i, fila in enumerate(self.filas):
+            item = items[i] if i < len(items) else None
+            if item is None:
+                if self.mostrados[i] is not None:
+                    fila.grid_remove()
+                    self.mostrados[i] = None
+                continue
+            if self.mostrados[i] is None:
+                fila.grid()
+            if item != self.mostrados[i]:
+                self.llenar_fila(fila, item)
+                self.mostrados[i] = dict(item)
+        if self.total:
+            self.barra.set(self.inicio / self.total, min(1.0, (self.inicio + visibles) / self.total))
+        else:
+            self.barra.set(0.0, 1.0)
@@ -0,0 +1,233 @@
+"""
+Cotización de carpetas completas de archivos laminados.
+
+Analiza todos los G-code y STL de una carpeta repartiéndolos entre los
+núcleos con un pool de procesos, los cotiza en una sola pasada vectorizada
+y escribe una tabla CSV consolidada. Los archivos ya analizados salen del
+caché de archivos, así que volver a correrlo sólo analiza los nuevos o
+modificados (el hash de los que cambiaron también se calcula en el pool);
+con `--vigilar` se queda esperando cambios en la carpeta. Un archivo que se
+borra o renombra a mitad de una pasada sale con su error en la tabla.
+
+    python lote_carpeta.py pedido_123/ --filamento "Grilon (PLA)"
+    python lote_carpeta.py pedido_123/ --filamento grilon_pla_1a2b3c4d --vigilar
+
+Con tarifa de luz por franja horaria, todas las impresiones se cotizan
+como si arrancaran en `--inicio` (por defecto, en el momento de cada pasada).
+"""
+import csv
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import cache_archivos
+import motor
+import nucleo
+import tarifario
+import tarifas_luz
+
+# --- CONSTANTES ---
+EXTENSIONES = {".gcode": "gcode", ".gco": "gcode", ".g": "gcode", ".stl": "stl"}
+NOMBRE_SALIDA = "cotizacion.csv"
+INTERVALO_VIGILANCIA = 2.0
+ERROR_SIN_TIEMPO = "El STL no tiene tiempo de impresión; indique --gramos-por-hora para estimarlo."
+
+
+def buscar_archivos(carpeta):
+    """Archivos de impresión de la carpeta (sin subcarpetas), ordenados por nombre."""
+    return sorted(p for p in Path(carpeta).iterdir() if p.is_file() and p.suffix.lower() in EXTENSIONES)
+
+def parametros_analisis(ruta, densidad, relleno_pct, paredes):
+    tipo = EXTENSIONES[ruta.suffix.lower()]
+    if tipo == "stl":
+        return {"tipo": "stl", "densidad": densidad, "relleno_pct": relleno_pct, "paredes": paredes}
+    return {"tipo": "gcode", "densidad": densidad}
+
+def hashear_archivo(ruta):
+    """Corre en un proceso del pool. Devuelve (firma, hash) o {"error": ...}."""
+    try:
+        return cache_archivos.firma_y_hash(ruta)
+    except OSError as e:
+        return {"error": str(e)}
+
+def analizar_archivo(tarea):
+    """Corre en un proceso del pool. Devuelve las métricas o {"error": ...}."""
+    ruta, parametros = tarea
+    try:
+        if parametros["tipo"] == "stl":
+            import malla
+            return malla.analizar_stl(ruta, parametros["densidad"], parametros["relleno_pct"], parametros["paredes"])
+        import gcode
+        return gcode.analizar_gcode(ruta, parametros["densidad"])
+    except Exception as e:
+        return {"error": str(e)}
+
+
+class CotizadorCarpeta:
+    def __init__(self, carpeta, filamento, tarifas, cache, relleno_pct, paredes, gramos_por_hora=None, procesos=None, inicio=None):
+        self.carpeta = Path(carpeta)
+        self.filamento = filamento
+        self.tarifas = tarifas  # tarifario.Tarifario
+        self.cache = cache
+        self.relleno_pct = relleno_pct
+        self.paredes = paredes
+        self.gramos_por_hora = gramos_por_hora
+        self.procesos = procesos or os.cpu_count()
+        self.inicio = inicio  # para la tarifa de luz; None es el momento de cada pasada
+        self.firmas = {}
+
+    def cambios(self):
+        """True si desde la última corrida se agregó, modificó o borró algún archivo."""
+        firmas = {}
+        for ruta in buscar_archivos(self.carpeta):
+            try:
+                estado = ruta.stat()
+            except OSError:  # se borró o renombró entre el listado y el stat
+                continue
+            firmas[ruta] = (estado.st_mtime_ns, estado.st_size)
+        if firmas == self.firmas:
+            return False
+        self.firmas = firmas
+        return True
+
+    def _del_cache(self, rutas, tareas, metricas):
+        """Completa `metricas` con lo que haya en el caché y devuelve las rutas que faltan."""
+        pendientes = []
+        for ruta in rutas:
+            try:
+                guardadas = self.cache.obtener(ruta, tareas[ruta])
+            except OSError as e:
+                metricas[ruta] = {"error": str(e)}
+                continue
+            if guardadas is None:
+                pendientes.append(ruta)
+            else:
+                metricas[ruta] = guardadas
+        return pendientes
+
+    def analizar(self, archivos, pool):
+        """
+        Métricas por archivo: del caché si están, del pool de procesos si no.
+        Primero se consulta el índice de rutas del caché (sólo `os.stat`); los
+        archivos que no figuran se hashean en el pool, por si el mismo
+        contenido ya se analizó con otro nombre, y el resto se analiza ahí.
+        """
+        densidad = motor.densidad_filamento(self.filamento)
+        tareas = {ruta: parametros_analisis(ruta, densidad, self.relleno_pct, self.paredes) for ruta in archivos}
+        metricas = {}
+        pendientes = self._del_cache(archivos, tareas, metricas)
+        if pendientes:
+            for ruta, resultado in zip(pendientes, pool.map(hashear_archivo, [str(r) for r in pendientes])):
+                if isinstance(resultado, dict):
+                    metricas[ruta] = resultado
+                else:
+                    self.cache.recordar_hash(ruta, *resultado)
+            pendientes = self._del_cache([r for r in pendientes if r not in metricas], tareas, metricas)
+        if pendientes:
+            print(f"Analizando {len(pendientes)} de {len(archivos)} archivos con {self.procesos} procesos...", file=sys.stderr)
+            for ruta, resultado in zip(pendientes, pool.map(analizar_archivo, [(str(r), tareas[r]) for r in pendientes])):
+                metricas[ruta] = resultado
+                if "error" not in resultado:
+                    try:
+                        self.cache.guardar(ruta, tareas[ruta], resultado)
+                    except OSError:  # se borró después de analizarlo: la cotización vale, el caché no
+                        pass
+        self.cache.persistir()
+        return metricas
+
+    def cotizar(self, archivos, metricas):
+        """Cotiza todos los archivos juntos. Devuelve las filas de la tabla."""
+        gramos = [metricas[r].get("gramos", float("nan")) for r in archivos]
+        horas = []
+        for r in archivos:
+            if metricas[r].get("horas"):
+                horas.append(metricas[r]["horas"])
+            elif self.gramos_por_hora and "gramos" in metricas[r]:
+                horas.append(metricas[r]["gramos"] / self.gramos_por_hora)
+            else:
+                horas.append(float("nan"))
+        precio_kg = [self.tarifas.precio_kg(self.filamento["id"], float("nan"))] * len(archivos)
+        luz = None
+        if archivos and self.tarifas.tarifa is not None:
+            inicio = tarifas_luz.horas_desde_inicio(self.inicio)
+            luz = self.tarifas.tarifa.costo_lote([inicio] * len(archivos), [h if h > 0 else 0 for h in horas],
+                                                 self.tarifas.parametros["consumo_w"])
+        resultado = motor.cotizar_lote(gramos, horas, precio_kg, self.tarifas.parametros, luz) if archivos else None
+
+        filas = []
+        for i, ruta in enumerate(archivos):
+            m = metricas[ruta]
+            fila = [ruta.name, EXTENSIONES[ruta.suffix.lower()], f"{gramos[i]:.2f}", f"{horas[i]:.4f}"]
+            if resultado["valido"][i]:
+                filas.append(fila + [f"{resultado[c][i]:.2f}" for c in motor.COMPONENTES] + [self.tarifas.version, ""])
+            else:
+                detalle = m.get("error") or (ERROR_SIN_TIEMPO if horas[i] != horas[i] else motor.detalle_error(gramos[i], horas[i], precio_kg[i]) or motor.ERROR_LUZ)
+                filas.append(fila + [""] * (len(motor.COMPONENTES) + 1) + [detalle])
+        return filas
+
+    def correr(self, pool, salida):
+        archivos = list(self.firmas) or buscar_archivos(self.carpeta)
+        inicio = time.perf_counter()
+        filas = self.cotizar(archivos, self.analizar(archivos, pool))
+        temporal = salida.with_name(salida.name + ".tmp")
+        with open(temporal, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["archivo", "tipo", "gramos", "horas"] + list(motor.COMPONENTES) + ["version_tarifario", "detalle_error"])
+            writer.writerows(filas)
+        os.replace(temporal, salida)
+        validas = sum(1 for fila in filas if not fila[-1])
+        print(f"{validas}/{len(filas)} archivos cotizados en {time.perf_counter() - inicio:.1f} s -> {salida}", file=sys.stderr)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Cotiza todos los archivos de impresión de una carpeta.")
+    parser.add_argument("carpeta")
+    parser.add_argument("--filamento", required=True, help="Id o nombre visible del filamento")
+    parser.add_argument("--salida", help=f"CSV de salida (por defecto <carpeta>/{NOMBRE_SALIDA})")
+    parser.add_argument("--procesos", type=int, help="Procesos de análisis (por defecto, uno por núcleo)")
+    parser.add_argument("--gramos-por-hora", type=float, help="Ritmo para estimar el tiempo de los STL")
+    parser.add_argument("--vigilar", action="store_true", help="Seguir cotizando cuando cambien los archivos")
+    parser.add_argument("--inicio", help="Inicio de las impresiones para la tarifa de luz (AAAA-MM-DD HH:MM; por defecto, ahora)")
+    args = parser.parse_args(argv)
+    try:
+        tarifas_luz.horas_desde_inicio(args.inicio)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    data = nucleo.load_data()
+    catalogo = nucleo.abrir_catalogo(data)
+    filamento = catalogo.obtener(args.filamento) or catalogo.por_nombre(args.filamento)
+    tarifas = tarifario.compilar(data["settings"], catalogo)
+    catalogo.cerrar()
+    if not filamento:
+        print(f"Error: {motor.ERROR_FILAMENTO}", file=sys.stderr)
+        return 1
+    settings = data["settings"]
+    cache = cache_archivos.CacheArchivos(nucleo.CONFIG_FILE.parent / cache_archivos.NOMBRE_ARCHIVO)
+    cotizador = CotizadorCarpeta(
+        args.carpeta, filamento, tarifas, cache,
+        motor.parse_float(settings.get("relleno_pct"), "15"), int(motor.parse_float(settings.get("paredes"), "2")),
+        args.gramos_por_hora, args.procesos, args.inicio)
+    salida = Path(args.salida) if args.salida else Path(args.carpeta) / NOMBRE_SALIDA
+
+    with ProcessPoolExecutor(max_workers=cotizador.procesos) as pool:
+        cotizador.cambios()
+        cotizador.correr(pool, salida)
+        if args.vigilar:
+            print("Vigilando la carpeta (Ctrl+C para salir)...", file=sys.stderr)
+            try:
+                while True:
+                    time.sleep(INTERVALO_VIGILANCIA)
+                    if cotizador.cambios():
+                        cotizador.correr(pool, salida)
+            except KeyboardInterrupt:
+                pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+"""
+Estimación de gramos a partir de un STL, para cotizar antes de laminar.
+
+El STL binario se mapea con mmap y se lee con `np.frombuffer` sin copiar
+los triángulos; el volumen y la superficie salen de sumas vectorizadas de
+tetraedros con signo, recorriendo la malla por bloques para que la memoria
+no crezca con la cantidad de triángulos. El STL ASCII se lee en streaming.
+"""
+import mmap
+import re
+
+import motor
+
+# --- CONSTANTES ---
+TRIANGULOS_POR_BLOQUE = 1_000_000
+TAMANO_BLOQUE_ASCII = 16 * 1024 * 1024
+RELLENO_PCT_DEFAULT = 15
+PAREDES_DEFAULT = 2
+ANCHO_LINEA_MM = 0.45
+
+PATRON_VERTICE = re.compile(rb"vertex\s+(\S+)\s+(\S+)\s+(\S+)")
+
+
+def _dtype_binario():
+    import numpy as np
+    return np.dtype([("normal", "<f4", (3,)), ("vertices", "<f4", (3, 3)), ("atributo", "<u2")])
+
+def _acumular(vertices):
+    """Devuelve (volumen con signo, área) de un bloque de triángulos de forma (n, 3, 3)."""
+    import numpy as np
+
+    v = vertices.astype(np.float64)
+    a, b, c = v[:, 0], v[:, 1], v[:, 2]
+    volumen = np.einsum("ij,ij->", a, np.cross(b, c)) / 6
+    area = np.linalg.norm(np.cross(b - a, c - a), axis=1).sum() / 2
+    return volumen, area
+
+def _es_binario(mm):
+    if len(mm) < 84:
+        return False
+    cantidad = int.from_bytes(mm[80:84], "little")
+    return len(mm) == 84 + 50 * cantidad
+
+def _medir_binario(mm, progreso=None):
+    import numpy as np
+
+    cantidad = int.from_bytes(mm[80:84], "little")
+    triangulos = np.frombuffer(mm, dtype=_dtype_binario(), count=cantidad, offset=84)
+    volumen = area = 0.0
+    for inicio in range(0, cantidad, TRIANGULOS_POR_BLOQUE):
+        v, a = _acumular(triangulos["vertices"][inicio:inicio + TRIANGULOS_POR_BLOQUE])
+        volumen += v
+        area += a
+        if progreso:
+            progreso(min(inicio + TRIANGULOS_POR_BLOQUE, cantidad) / cantidad)
+    del triangulos  # libera la vista antes de cerrar el mmap
+    return volumen, area, cantidad
+
+def _medir_ascii(mm, progreso=None):
+    import numpy as np
+
+    total = len(mm)
+    volumen = area = 0.0
+    cantidad = 0
+    inicio = 0
+    while inicio < total:
+        fin = min(inicio + TAMANO_BLOQUE_ASCII, total)
+        if fin < total:
+            corte = mm.rfind(b"endfacet", inicio, fin)
+            if corte > inicio:
+                fin = corte + len(b"endfacet")
+        coordenadas = PATRON_VERTICE.findall(mm[inicio:fin])
+        if coordenadas:
+            vertices = np.array(coordenadas).astype(np.float64)
+            vertices = vertices[:len(vertices) - len(vertices) % 3].reshape(-1, 3, 3)
+            v, a = _acumular(vertices)
+            volumen += v
+            area += a
+            cantidad += len(vertices)
+        inicio = fin
+        if progreso:
+            progreso(inicio / total)
+    return volumen, area, cantidad
+
+
+# --- API ---
+
+def medir_stl(ruta, progreso=None):
+    """
+    Calcula volumen (mm³) y superficie (mm²) de un STL binario o ASCII.
+    Devuelve (volumen, area, triangulos). El volumen es absoluto, así que
+    no importa si la malla tiene las normales invertidas.
+    """
+    with open(ruta, "rb") as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            raise ValueError("El archivo STL está vacío.")
+        with mm:
+            if _es_binario(mm):
+                volumen, area, cantidad = _medir_binario(mm, progreso)
+            elif mm[:5].lower() == b"solid":
+                volumen, area, cantidad = _medir_ascii(mm, progreso)
+            else:
+                raise ValueError("El archivo no es un STL válido.")
+    return abs(volumen), area, cantidad
+
+def estimar_gramos(volumen_mm3, area_mm2, densidad, relleno_pct=RELLENO_PCT_DEFAULT, paredes=PAREDES_DEFAULT, ancho_linea=ANCHO_LINEA_MM):
+    """
+    Estima los gramos de una pieza: una cáscara maciza de `paredes` líneas de
+    `ancho_linea` mm sobre toda la superficie, y el resto del volumen al
+    `relleno_pct` %. `densidad` en g/cm³.
+    """
+    cascara = min(area_mm2 * paredes * ancho_linea, volumen_mm3)
+    interior = volumen_mm3 - cascara
+    material_mm3 = cascara + interior * (relleno_pct / 100)
+    return material_mm3 / 1000 * densidad
+
+def analizar_stl(ruta, densidad=motor.DENSIDAD_DEFAULT, relleno_pct=RELLENO_PCT_DEFAULT, paredes=PAREDES_DEFAULT, progreso=None):
+    """
+    Mide un STL y estima sus gramos. Devuelve un dict con `gramos`,
+    `volumen_cm3`, `area_cm2` y `triangulos`.
+    """
+    volumen, area, cantidad = medir_stl(ruta, progreso)
+    return {
+        "gramos": estimar_gramos(volumen, area, densidad, relleno_pct, paredes),
+        "volumen_cm3": volumen / 1000,
+        "area_cm2": area / 100,
+        "triangulos": cantidad,
+    }
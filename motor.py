@@ -0,0 +1,336 @@
+"""
+Motor de cotización sin interfaz gráfica.
+
+Contiene la misma fórmula que usa la ventana principal (material, luz,
+desgaste, margen de error, IVA de la luz, ganancia y envío) en dos
+variantes: `cotizar` para una sola pieza con floats y `cotizar_lote`
+para columnas completas con NumPy. También expone una CLI que lee un CSV
+de trabajos en bloques y escribe las cotizaciones sin cargar todo en memoria:
+
+    python motor.py trabajos.csv cotizaciones.csv
+"""
+import csv
+import math
+import sys
+
+import tarifas_luz
+
+# --- CONSTANTES ---
+PARAMETROS = (
+    "precio_kwh", "consumo_w", "desgaste_horas", "precio_repuestos",
+    "margen_error_pct", "iva_luz_pct", "margen_ganancia_x", "costo_envio",
+)
+PARAMETROS_DEFAULT = {"iva_luz_pct": "21", "margen_ganancia_x": "1.5"}
+COMPONENTES = (
+    "material", "luz", "desgaste", "error", "iva_luz",
+    "costo_total", "precio_venta", "envio", "precio_final",
+)
+TAMANO_BLOQUE = 65536
+# Densidad típica (g/cm³) por tipo de filamento, para pasar volumen o largo a gramos.
+DENSIDADES = {
+    "PLA": 1.24, "PETG": 1.27, "TPU": 1.21, "ABS": 1.04,
+    "ASA": 1.07, "PLA-CF": 1.29, "PETG-CF": 1.30, "Nylon": 1.14,
+}
+DENSIDAD_DEFAULT = DENSIDADES["PLA"]
+
+ERROR_TIEMPO = "La impresora no materializa objetos de inmediato (aún). El tiempo de impresión debe ser mayor a cero."
+ERROR_FILAMENTO = "Filamento no válido o no seleccionado."
+ERROR_LUZ = "No se pudo calcular el costo de la luz con el consumo y la tarifa indicados."
+ERROR_GRAMOS = "Todavia la materia con masa 0 no se descubre (o quizas sí). Ingrese cuantos gramos de material se utilizará."
+
+
+# --- CONVERSIONES ---
+
+def parse_float(valor, default="0"):
+    """Convierte un texto a float aceptando coma decimal y vacío como `default`."""
+    texto = "" if valor is None else str(valor).strip()
+    return float((texto or default).replace(",", "."))
+
+def parametros_desde_settings(settings):
+    """Extrae de `data["settings"]` los parámetros de la fórmula como floats."""
+    return {clave: parse_float(settings.get(clave), PARAMETROS_DEFAULT.get(clave, "0")) for clave in PARAMETROS}
+
+def horas_desde_tiempo(dias=0, horas=0, minutos=0, segundos=0):
+    """Pasa días/horas/minutos/segundos a horas decimales."""
+    return (dias * 24) + horas + (minutos / 60) + (segundos / 3600)
+
+def tiempo_desde_horas(horas):
+    """Inverso de `horas_desde_tiempo`: devuelve (días, horas, minutos, segundos) enteros."""
+    total = int(round(horas * 3600))
+    dias, resto = divmod(total, 86400)
+    horas, resto = divmod(resto, 3600)
+    minutos, segundos = divmod(resto, 60)
+    return dias, horas, minutos, segundos
+
+def densidad_filamento(filamento):
+    """Densidad (g/cm³) de un filamento del catálogo: la propia si la tiene, si no la de su tipo."""
+    if not filamento:
+        return DENSIDAD_DEFAULT
+    try:
+        return float(filamento["density"])
+    except (KeyError, TypeError, ValueError):
+        return DENSIDADES.get(filamento.get("type"), DENSIDAD_DEFAULT)
+
+
+# --- FÓRMULA ---
+
+# Tasas que dependen sólo de los parámetros: (tasa, entradas, función). Se
+# calculan una vez por configuración (`tasas`, `tarifario`), no por pieza. El
+# desgaste por hora va aparte porque divide por la vida útil.
+TASAS = (
+    ("luz_por_hora", ("consumo_w", "precio_kwh"), lambda consumo_w, precio_kwh: (consumo_w / 1000) * precio_kwh),
+    ("factor_error", ("margen_error_pct",), lambda margen_error_pct: margen_error_pct / 100),
+    ("factor_iva_luz", ("iva_luz_pct",), lambda iva_luz_pct: iva_luz_pct / 100),
+)
+
+# Pasos de la fórmula en orden: (resultado, entradas, función). Las entradas son
+# los PARAMETROS, las TASAS, `desgaste_por_hora`, `gramos`, `horas`,
+# `precio_gramo` o un resultado anterior. `cotizar`, `cotizar_lote`, el
+# tarifario y el recálculo en vivo de la ventana (`reactivo`) se arman a partir
+# de esta tabla; las funciones son sólo aritmética, así que sirven para floats o arrays.
+FORMULA = (
+    ("material", ("gramos", "precio_gramo"), lambda gramos, precio_gramo: gramos * precio_gramo),
+    ("luz", ("horas", "luz_por_hora"), lambda horas, luz_por_hora: horas * luz_por_hora),
+    ("desgaste", ("desgaste_por_hora", "horas"), lambda desgaste_por_hora, horas: desgaste_por_hora * horas),
+    ("costo_base", ("material", "luz", "desgaste"), lambda material, luz, desgaste: material + luz + desgaste),
+    ("error", ("costo_base", "factor_error"), lambda costo_base, factor_error: costo_base * factor_error),
+    ("iva_luz", ("luz", "factor_iva_luz"), lambda luz, factor_iva_luz: luz * factor_iva_luz),
+    ("costo_total", ("costo_base", "error", "iva_luz"), lambda costo_base, error, iva_luz: costo_base + error + iva_luz),
+    ("precio_venta", ("costo_total", "margen_ganancia_x"), lambda costo_total, margen_ganancia_x: costo_total * margen_ganancia_x),
+    ("envio", ("costo_envio",), lambda costo_envio: costo_envio),
+    ("precio_final", ("precio_venta", "envio"), lambda precio_venta, envio: precio_venta + envio),
+)
+
+def desgaste_por_hora(precio_repuestos, desgaste_horas):
+    """Costo de repuestos por hora de uso; cero si la vida útil no es positiva."""
+    return precio_repuestos / desgaste_horas if desgaste_horas > 0 else 0
+
+def precio_gramo(precio_kg):
+    return precio_kg / 1000
+
+def tasas(parametros, desgaste_hora=None):
+    """Los parámetros más las TASAS y el desgaste por hora: todo lo que la fórmula necesita salvo la pieza."""
+    t = {clave: parametros[clave] for clave in PARAMETROS}
+    for nombre, entradas, funcion in TASAS:
+        t[nombre] = funcion(*[t[e] for e in entradas])
+    t["desgaste_por_hora"] = desgaste_por_hora(t["precio_repuestos"], t["desgaste_horas"]) if desgaste_hora is None else desgaste_hora
+    return t
+
+def componentes(gramos, horas, precio_gramo, t, **fijos):
+    """
+    Evalúa FORMULA con tasas ya calculadas. Cada valor de `fijos` que no sea
+    None reemplaza el paso del mismo nombre (por ejemplo `luz` con tarifa por
+    franja, o `material` de una pieza con varios filamentos).
+    """
+    valores = dict(t, gramos=gramos, horas=horas, precio_gramo=precio_gramo)
+    for nombre, entradas, funcion in FORMULA:
+        if fijos.get(nombre) is not None:
+            valores[nombre] = fijos[nombre]
+        else:
+            valores[nombre] = funcion(*[valores[e] for e in entradas])
+    return {clave: valores[clave] for clave in COMPONENTES}
+
+def cotizar(gramos, horas, precio_kg, parametros, luz=None):
+    """
+    Cotiza una sola pieza. Lanza ValueError si el tiempo o los gramos no son
+    positivos. Devuelve un dict con una entrada por cada clave de COMPONENTES.
+    `luz` es el costo de la energía ya calculado (por ejemplo con una tarifa
+    por franja horaria); si no se indica sale de `precio_kwh` fijo.
+    """
+    if horas <= 0: raise ValueError(ERROR_TIEMPO)
+    if gramos <= 0: raise ValueError(ERROR_GRAMOS)
+    return componentes(gramos, horas, precio_gramo(precio_kg), tasas(parametros), luz=luz)
+
+def cotizar_lote(gramos, horas, precio_kg, parametros, luz=None):
+    """
+    Cotiza columnas completas de trabajos en una sola pasada vectorizada.
+
+    `gramos`, `horas` y `precio_kg` son secuencias del mismo largo; cada valor
+    de `parametros` puede ser un escalar o una columna. Devuelve un dict de
+    arrays (uno por clave de COMPONENTES) más `valido`, una máscara booleana.
+    Las filas inválidas (tiempo o gramos no positivos, precio desconocido)
+    quedan en NaN en lugar de cortar el lote entero. `luz`, si se indica, es
+    la columna de costos de energía como en `cotizar`.
+    """
+    import numpy as np
+
+    gramos = np.asarray(gramos, dtype=np.float64)
+    horas = np.asarray(horas, dtype=np.float64)
+    precio_kg = np.asarray(precio_kg, dtype=np.float64)
+    p = {clave: np.asarray(parametros[clave], dtype=np.float64) for clave in PARAMETROS}
+    n = np.broadcast(gramos, horas, precio_kg).shape
+
+    vida_util_horas, repuestos = np.broadcast_arrays(p["desgaste_horas"], p["precio_repuestos"])
+    desgaste_hora = np.divide(repuestos, vida_util_horas, out=np.zeros(vida_util_horas.shape), where=vida_util_horas > 0)
+
+    with np.errstate(invalid="ignore"):
+        if luz is not None:
+            luz = np.asarray(luz, dtype=np.float64)
+        resultado = componentes(gramos, horas, precio_gramo(precio_kg), tasas(p, desgaste_hora), luz=luz)
+        valido = (horas > 0) & (gramos > 0) & np.isfinite(precio_kg)
+        if luz is not None:
+            valido &= np.isfinite(luz)
+    for clave in COMPONENTES:
+        resultado[clave] = np.where(valido, np.broadcast_to(resultado[clave], n), np.nan)
+    resultado["valido"] = np.broadcast_to(valido, n)
+    return resultado
+
+
+# --- CSV EN BLOQUES ---
+
+def _columna(filas, indice, default="0"):
+    """Convierte una columna de texto a floats; devuelve NaN donde no es numérica."""
+    valores = []
+    for fila in filas:
+        try:
+            valores.append(parse_float(fila[indice] if indice < len(fila) else "", default))
+        except ValueError:
+            valores.append(float("nan"))
+    return valores
+
+def _leer_bloques(reader, tamano_bloque):
+    bloque = []
+    for fila in reader:
+        if not fila:
+            continue
+        bloque.append(fila)
+        if len(bloque) >= tamano_bloque:
+            yield bloque
+            bloque = []
+    if bloque:
+        yield bloque
+
+def detalle_error(gramos, horas, precio_kg):
+    """Motivo por el que `cotizar_lote` marcó una fila como inválida."""
+    if not horas > 0: return ERROR_TIEMPO
+    if not gramos > 0: return ERROR_GRAMOS
+    if not math.isfinite(precio_kg): return ERROR_FILAMENTO
+    return ""
+
+def cotizar_csv(entrada, salida, parametros, catalogo=None, tamano_bloque=TAMANO_BLOQUE, delimitador=",", tarifa=None, version=None,
+                precios=None):
+    """
+    Lee trabajos de `entrada` y escribe cotizaciones en `salida` (archivos de texto abiertos).
+
+    Columnas reconocidas: `gramos`; `horas` y/o `dias`, `minutos`, `segundos`;
+    `precio_kg` o `filamento` (id o nombre visible en `catalogo`). Cualquier
+    columna con el nombre de un parámetro de PARAMETROS pisa el valor de
+    `parametros` para esa fila. Se copian las columnas de entrada y se agregan
+    las de COMPONENTES y `detalle_error`. Con una `tarifa` de luz
+    (`tarifas_luz.TarifaLuz`) la energía se cobra según la columna `inicio`
+    (AAAA-MM-DD HH:MM; vacía o ausente es el momento en que empezó la corrida).
+    Con `version` (la del tarifario) se agrega la columna `version_tarifario`
+    en las filas cotizadas; los parámetros pisados por columna quedan en la fila.
+    Con `precios` (el `tarifario.Tarifario` de esa versión) el precio de cada
+    `filamento` sale de ahí y `catalogo` sólo traduce nombres a ids; sin él, se
+    usa el `price_kg` del catálogo.
+    Devuelve la cantidad de filas procesadas.
+    """
+    import numpy as np
+
+    reader = csv.reader(entrada, delimiter=delimitador)
+    writer = csv.writer(salida, delimiter=delimitador, lineterminator="\n")
+    encabezado = [c.strip() for c in next(reader, [])]
+    if "gramos" not in encabezado:
+        raise ValueError("El CSV debe tener una columna 'gramos'.")
+    if "precio_kg" not in encabezado and "filamento" not in encabezado:
+        raise ValueError("El CSV debe tener una columna 'precio_kg' o 'filamento'.")
+    columnas_tiempo = [c for c in ("dias", "horas", "minutos", "segundos") if c in encabezado]
+    if not columnas_tiempo:
+        raise ValueError("El CSV debe tener al menos una columna de tiempo (dias, horas, minutos, segundos).")
+
+    precios_conocidos = {}
+    if tarifa is not None:
+        ahora = tarifas_luz.horas_desde_inicio(None)
+        columna_inicio = encabezado.index("inicio") if "inicio" in encabezado else None
+
+        def inicio_fila(fila):
+            texto = fila[columna_inicio].strip() if columna_inicio is not None and columna_inicio < len(fila) else ""
+            try:
+                return tarifas_luz.horas_desde_inicio(texto) if texto else ahora
+            except ValueError:
+                return np.nan
+
+    def precio_filamento(referencia):
+        if referencia not in precios_conocidos:
+            filamento = catalogo and (catalogo.obtener(referencia) or catalogo.por_nombre(referencia))
+            if not filamento:
+                precios_conocidos[referencia] = np.nan
+            elif precios is not None:
+                precios_conocidos[referencia] = precios.precio_kg(filamento["id"], np.nan)
+            else:
+                precios_conocidos[referencia] = float(filamento["price_kg"])
+        return precios_conocidos[referencia]
+
+    estampa = [] if version is None else ["version_tarifario"]
+    writer.writerow(encabezado + list(COMPONENTES) + estampa + ["detalle_error"])
+    total = 0
+    for filas in _leer_bloques(reader, tamano_bloque):
+        gramos = np.array(_columna(filas, encabezado.index("gramos")))
+        tiempo = {c: np.array(_columna(filas, encabezado.index(c))) for c in columnas_tiempo}
+        horas = horas_desde_tiempo(**tiempo)
+        if "precio_kg" in encabezado:
+            precio_kg = np.array(_columna(filas, encabezado.index("precio_kg"), default="nan"))
+        else:
+            i = encabezado.index("filamento")
+            precio_kg = np.array([precio_filamento(fila[i].strip() if i < len(fila) else "") for fila in filas])
+        p = dict(parametros)
+        for clave in PARAMETROS:
+            if clave in encabezado:
+                columna = np.array(_columna(filas, encabezado.index(clave), default="nan"))
+                p[clave] = np.where(np.isnan(columna), parametros[clave], columna)
+
+        luz = None
+        inicios = [0.0] * len(filas)
+        if tarifa is not None:
+            inicios = [inicio_fila(fila) for fila in filas]
+            with np.errstate(invalid="ignore"):
+                luz = tarifa.costo_lote(inicios, np.where(horas > 0, horas, 0), p["consumo_w"])
+        resultado = cotizar_lote(gramos, horas, precio_kg, p, luz)
+        valores = np.column_stack([resultado[c] for c in COMPONENTES])
+        for fila, v, ok, g, h, pk, inicio in zip(filas, valores.tolist(), resultado["valido"].tolist(), gramos.tolist(), horas.tolist(),
+                                                 precio_kg.tolist(), inicios):
+            if ok:
+                writer.writerow(fila + [f"{x:.2f}" for x in v] + ([version] if estampa else []) + [""])
+            else:
+                detalle = detalle_error(g, h, pk) or (tarifas_luz.ERROR_INICIO if inicio != inicio else ERROR_LUZ)
+                writer.writerow(fila + [""] * (len(COMPONENTES) + len(estampa)) + [detalle])
+        total += len(filas)
+    return total
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Cotiza en lote un CSV de trabajos de impresión 3D.")
+    parser.add_argument("entrada", help="CSV de trabajos ('-' para stdin)")
+    parser.add_argument("salida", help="CSV de cotizaciones ('-' para stdout)")
+    parser.add_argument("--tamano-bloque", type=int, default=TAMANO_BLOQUE, help="Filas por bloque vectorizado")
+    parser.add_argument("--delimitador", default=",", help="Separador de columnas del CSV")
+    args = parser.parse_args(argv)
+
+    import tarifario
+    from nucleo import abrir_catalogo, load_data
+    data = load_data()
+    catalogo = abrir_catalogo(data)
+    tarifas = tarifario.compilar(data["settings"], catalogo)
+
+    entrada = sys.stdin if args.entrada == "-" else open(args.entrada, "r", encoding="utf-8", newline="")
+    salida = sys.stdout if args.salida == "-" else open(args.salida, "w", encoding="utf-8", newline="")
+    try:
+        total = cotizar_csv(entrada, salida, tarifas.parametros, catalogo, args.tamano_bloque, args.delimitador, tarifas.tarifa, tarifas.version,
+                            tarifas)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if entrada is not sys.stdin:
+            entrada.close()
+        if salida is not sys.stdout:
+            salida.close()
+        catalogo.cerrar()
+    print(f"{total} trabajos cotizados.", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
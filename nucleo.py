@@ -0,0 +1,98 @@
+"""
+Núcleo sin interfaz gráfica: configuración, fórmula de cotización y catálogo.
+
+Importar este módulo no carga Tk/customtkinter ni NumPy ni toca el disco,
+así que sirve para scripts que sólo necesitan cotizar.
+"""
+import json
+import os
+from pathlib import Path
+
+import perfilado
+import persistencia
+from catalogo import abrir_catalogo, nombre_filamento
+from motor import (COMPONENTES, PARAMETROS, cotizar, cotizar_lote, densidad_filamento,
+                   horas_desde_tiempo, parametros_desde_settings, tiempo_desde_horas)
+
+# --- LÓGICA DE DATOS Y CONFIGURACIÓN ---
+
+def get_config_file_path():
+    """
+    Construye la ruta completa y segura al archivo de configuración
+    dentro de %LOCALAPPDATA%/Cotizador3D. No crea nada en disco: el
+    directorio se crea recién al guardar.
+    """
+    base_path = os.getenv('LOCALAPPDATA')
+    if not base_path:
+        base_path = Path.home()
+        
+    app_dir = Path(base_path) / "Cotizador3D"
+    
+    return app_dir / "config_impresion3d.json"
+
+# --- CONSTANTES ---
+CONFIG_FILE = get_config_file_path()
+FILAMENT_TYPES = ["PLA", "PETG", "TPU", "ABS", "ASA", "PLA-CF", "PETG-CF", "Nylon"]
+# Claves agregadas después de la primera versión: se completan al cargar configuraciones viejas.
+SETTINGS_AGREGADOS = (
+    "geometry", "costo_envio", "relleno_pct", "paredes",
+    "riesgo_falla_hora_pct", "riesgo_desvio_tiempo_pct", "riesgo_desvio_kwh_pct", "riesgo_perdida_objetivo_pct",
+)
+
+def get_default_data():
+    """Retorna una estructura de datos por defecto."""
+    return {
+        "settings": {
+            "precio_kwh": "199.74640",
+            "consumo_w": "150",
+            "desgaste_horas": "5000",
+            "precio_repuestos": "305000",
+            "margen_error_pct": "10",
+            "iva_luz_pct": "21",
+            "margen_ganancia_x": "1.5",
+            "costo_envio": "0",
+            "relleno_pct": "15",
+            "paredes": "2",
+            "riesgo_falla_hora_pct": "1",
+            "riesgo_desvio_tiempo_pct": "10",
+            "riesgo_desvio_kwh_pct": "10",
+            "riesgo_perdida_objetivo_pct": "5",
+            "geometry": "950x700"
+        },
+        "filaments": []
+    }
+
+@perfilado.medir("load_data")
+def load_data():
+    """
+    Carga la configuración desde un archivo JSON en %LOCALAPPDATA%/Cotizador3D.
+    Si no existe o está corrupto, prueba con las copias de respaldo y, si
+    tampoco sirven, usa valores por defecto.
+    """
+    for path in [CONFIG_FILE] + persistencia.rutas_respaldo(CONFIG_FILE):
+        if not os.path.exists(path):
+            continue
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                content = f.read()
+                if not content:
+                    continue
+                data = json.loads(content)
+                
+                defaults = get_default_data()["settings"]
+                for key in SETTINGS_AGREGADOS:
+                    data["settings"].setdefault(key, defaults[key])
+                if path != CONFIG_FILE:
+                    print(f"Configuración dañada, se recuperó desde {path}")
+                return data
+        except (json.JSONDecodeError, OSError):
+            continue
+    return get_default_data()
+
+@perfilado.medir("save_data")
+def save_data(data):
+    """Guarda los datos en el archivo de configuración de forma atómica."""
+    try:
+        persistencia.escribir_json_atomico(CONFIG_FILE, data)
+    except Exception as e:
+        print(f"Error al guardar el archivo de configuración: {e}")
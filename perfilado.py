@@ -0,0 +1,265 @@
+"""
+Perfilado y trazas de la aplicación.
+
+Cuando alguien dice "se colgó", esto dice dónde se fue el tiempo: mide los
+caminos calientes marcados con `@medir()` o `with tramo(...)`, cuenta widgets
+creados y escrituras a disco, y anota los bloqueos del bucle de eventos de Tk
+más largos que un umbral. Al cerrar imprime un resumen y guarda la traza en el
+formato de Chrome (se abre en chrome://tracing o en ui.perfetto.dev), con una
+fila por hilo.
+
+Está apagado salvo que se pida, y apagado no cuesta nada que se note: una
+función medida sólo agrega una comparación con None y los widgets y el bucle
+de Tk no se tocan. Se prende con la variable de entorno o con `--perfil`:
+
+    COTIZADOR_PERFIL=traza.json python cotizador.py
+    python cotizador.py --perfil traza.json --umbral-bloqueo 50
+    python cotizador.py --perfil            # guarda traza_cotizador.json
+
+COTIZADOR_PERFIL=1 sólo imprime el resumen, sin guardar la traza. La
+variable sólo cuenta en el proceso principal: los procesos de un pool (que la
+heredan) no abren su propia sesión ni pisan la traza al terminar. La traza
+guarda los últimos MAX_EVENTOS eventos; el resumen cuenta todos.
+"""
+import atexit
+import collections
+import contextlib
+import functools
+import json
+import math
+import multiprocessing
+import os
+import sys
+import threading
+import time
+
+# --- CONSTANTES ---
+ENV_PERFIL = "COTIZADOR_PERFIL"  # ruta de la traza, o "1" para sólo el resumen
+ENV_UMBRAL = "COTIZADOR_PERFIL_UMBRAL_MS"
+TRAZA_POR_DEFECTO = "traza_cotizador.json"
+UMBRAL_BLOQUEO_MS = 100.0
+INTERVALO_VIGIA_MS = 50
+MAX_EVENTOS = 100_000  # unos 50 MB; el servicio puede correr días con el perfilado prendido
+SIN_TRAZA = ("1", "true", "si", "sí")
+TRAMO_BLOQUEO = "bloqueo del bucle de Tk"
+CONTADOR_WIDGETS = "widgets creados"
+CONTADOR_ESCRITURAS = "escrituras a disco"
+
+_sesion = None
+_nulo = contextlib.nullcontext()
+
+
+class Sesion:
+    """Eventos y totales de una corrida perfilada. Se puede registrar desde cualquier hilo."""
+
+    def __init__(self, ruta=None, umbral_ms=UMBRAL_BLOQUEO_MS, max_eventos=MAX_EVENTOS):
+        self.ruta = ruta
+        self.umbral_ms = umbral_ms
+        self.pid = os.getpid()
+        self.origen = time.perf_counter_ns()
+        # Eventos de Chrome trace, con tiempos en microsegundos desde `origen`; los más viejos se descartan.
+        self.eventos = collections.deque(maxlen=max_eventos)
+        self.total_eventos = 0
+        self.tramos = {}  # nombre -> [llamadas, total ns, máximo ns]
+        self.contadores = {}
+        self.hilos = {}  # id del hilo -> nombre
+        self._lock = threading.Lock()
+        self._vigia = None  # (ventana, id del after) mientras se vigila el bucle de Tk
+        self._setup_original = None
+
+    def _us(self, ns):
+        return (ns - self.origen) / 1000
+
+    def registrar(self, nombre, inicio, fin, categoria="funcion"):
+        """Anota un tramo medido con `time.perf_counter_ns`."""
+        hilo = threading.get_ident()
+        with self._lock:
+            if hilo not in self.hilos:
+                self.hilos[hilo] = threading.current_thread().name
+            self.eventos.append({"name": nombre, "cat": categoria, "ph": "X", "ts": self._us(inicio),
+                                 "dur": (fin - inicio) / 1000, "pid": self.pid, "tid": hilo})
+            self.total_eventos += 1
+            totales = self.tramos.setdefault(nombre, [0, 0, 0])
+            totales[0] += 1
+            totales[1] += fin - inicio
+            totales[2] = max(totales[2], fin - inicio)
+
+    def contar(self, nombre, cantidad=1):
+        ahora = time.perf_counter_ns()
+        with self._lock:
+            total = self.contadores[nombre] = self.contadores.get(nombre, 0) + cantidad
+            self.eventos.append({"name": nombre, "ph": "C", "ts": self._us(ahora), "pid": self.pid, "args": {"total": total}})
+            self.total_eventos += 1
+
+    def traza(self):
+        """La sesión como dict en el formato JSON de Chrome trace."""
+        with self._lock:
+            nombres = [{"name": "thread_name", "ph": "M", "pid": self.pid, "tid": hilo, "args": {"name": nombre}}
+                       for hilo, nombre in self.hilos.items()]
+            eventos = list(self.eventos)
+        return {"traceEvents": nombres + eventos, "displayTimeUnit": "ms"}
+
+    def exportar(self, ruta):
+        with open(ruta, "w", encoding="utf-8") as f:
+            json.dump(self.traza(), f)
+
+    def resumen(self):
+        """Texto con el tiempo por tramo (de mayor a menor total), los contadores y los bloqueos."""
+        lineas = [f"{'Tramo':<44}{'llamadas':>10}{'total ms':>12}{'media ms':>11}{'máx ms':>10}"]
+        for nombre, (llamadas, total, maximo) in sorted(self.tramos.items(), key=lambda t: -t[1][1]):
+            lineas.append(f"{nombre[:43]:<44}{llamadas:>10}{total / 1e6:>12.1f}{total / llamadas / 1e6:>11.2f}{maximo / 1e6:>10.1f}")
+        for nombre, total in sorted(self.contadores.items()):
+            lineas.append(f"{nombre}: {total}")
+        bloqueos = self.tramos.get(TRAMO_BLOQUEO, [0, 0, 0])
+        lineas.append(f"Bloqueos del bucle de Tk de más de {self.umbral_ms:g} ms: {bloqueos[0]}"
+                      + (f" (el peor, {bloqueos[2] / 1e6:.0f} ms)" if bloqueos[0] else ""))
+        if self.total_eventos > len(self.eventos):
+            lineas.append(f"La traza guarda los últimos {len(self.eventos)} de {self.total_eventos} eventos.")
+        return "\n".join(lineas)
+
+
+# --- ACTIVACIÓN ---
+
+def activo():
+    return _sesion is not None
+
+def activar(ruta=None, umbral_ms=UMBRAL_BLOQUEO_MS):
+    """Empieza a perfilar. `ruta` es dónde guardar la traza al cerrar (None: sólo el resumen)."""
+    global _sesion
+    if _sesion is not None:
+        return _sesion
+    _sesion = Sesion(ruta, umbral_ms)
+    _contar_widgets(_sesion)
+    atexit.register(cerrar)
+    return _sesion
+
+def _umbral_desde_entorno():
+    texto = os.environ.get(ENV_UMBRAL, "").strip()
+    if not texto:
+        return UMBRAL_BLOQUEO_MS
+    try:
+        umbral = float(texto.replace(",", "."))
+    except ValueError:
+        umbral = float("nan")
+    if not (math.isfinite(umbral) and umbral >= 0):
+        print(f"Aviso: {ENV_UMBRAL}={texto!r} no es un número de milisegundos válido; se usa {UMBRAL_BLOQUEO_MS:g}.", file=sys.stderr)
+        return UMBRAL_BLOQUEO_MS
+    return umbral
+
+def activar_desde_entorno():
+    """
+    Activa el perfilado si está definida COTIZADOR_PERFIL. Corre al importar el
+    módulo, así que no lanza excepciones: un umbral inválido sólo avisa. En
+    los procesos hijos (que heredan la variable) no hace nada.
+    """
+    valor = os.environ.get(ENV_PERFIL, "").strip()
+    if not valor or multiprocessing.parent_process() is not None:
+        return None
+    ruta = None if valor.lower() in SIN_TRAZA else valor
+    return activar(ruta, _umbral_desde_entorno())
+
+def cerrar(salida=None):
+    """
+    Termina la sesión: imprime el resumen y guarda la traza. Sin sesión no hace
+    nada; tampoco en un proceso creado con fork, que hereda la sesión del padre.
+    """
+    global _sesion
+    sesion, _sesion = _sesion, None
+    if sesion is None or sesion.pid != os.getpid():
+        return None
+    if sesion._vigia is not None:
+        ventana, trabajo = sesion._vigia
+        try:
+            ventana.after_cancel(trabajo)
+        except Exception:  # la ventana ya se destruyó
+            pass
+    if sesion._setup_original is not None:
+        import tkinter
+        tkinter.BaseWidget._setup = sesion._setup_original
+    salida = salida or sys.stderr
+    print("\n--- Perfilado ---", file=salida)
+    print(sesion.resumen(), file=salida)
+    if sesion.ruta:
+        try:
+            sesion.exportar(sesion.ruta)
+            print(f"Traza guardada en {sesion.ruta}", file=salida)
+        except OSError as e:
+            print(f"No se pudo guardar la traza: {e}", file=salida)
+    return sesion
+
+
+# --- INSTRUMENTOS ---
+
+def medir(nombre=None):
+    """Decorador que mide cada llamada. El nombre por defecto es el `__qualname__` de la función."""
+    def decorar(funcion):
+        etiqueta = nombre or funcion.__qualname__
+
+        @functools.wraps(funcion)
+        def medida(*args, **kwargs):
+            sesion = _sesion
+            if sesion is None:
+                return funcion(*args, **kwargs)
+            inicio = time.perf_counter_ns()
+            try:
+                return funcion(*args, **kwargs)
+            finally:
+                sesion.registrar(etiqueta, inicio, time.perf_counter_ns())
+        return medida
+    return decorar
+
+@contextlib.contextmanager
+def _tramo(sesion, nombre):
+    inicio = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        sesion.registrar(nombre, inicio, time.perf_counter_ns())
+
+def tramo(nombre):
+    """`with tramo("nombre"):` mide un bloque de código."""
+    sesion = _sesion
+    return _nulo if sesion is None else _tramo(sesion, nombre)
+
+def contar(nombre, cantidad=1):
+    sesion = _sesion
+    if sesion is not None:
+        sesion.contar(nombre, cantidad)
+
+def _contar_widgets(sesion):
+    # Todos los widgets de Tk (también los internos de customtkinter) pasan por BaseWidget._setup.
+    tkinter = sys.modules.get("tkinter")
+    if tkinter is None:
+        try:
+            import tkinter
+        except ImportError:
+            return
+    original = sesion._setup_original = tkinter.BaseWidget._setup
+
+    def _setup(widget, master, cnf):
+        sesion.contar(CONTADOR_WIDGETS)
+        return original(widget, master, cnf)
+    tkinter.BaseWidget._setup = _setup
+
+def vigilar_bucle(ventana, intervalo_ms=INTERVALO_VIGIA_MS):
+    """
+    Anota como bloqueo cada vez que el bucle de eventos de `ventana` atiende
+    un `after` más tarde que el umbral de la sesión: mientras el hilo de la
+    interfaz está ocupado, el temporizador no puede correr.
+    """
+    sesion = _sesion
+    if sesion is None:
+        return
+    intervalo_ns = intervalo_ms * 1_000_000
+
+    def tic(esperado):
+        if _sesion is not sesion:
+            return
+        ahora = time.perf_counter_ns()
+        if (ahora - esperado) / 1e6 >= sesion.umbral_ms:
+            sesion.registrar(TRAMO_BLOQUEO, esperado, ahora, "bloqueo")
+        sesion._vigia = (ventana, ventana.after(intervalo_ms, tic, ahora + intervalo_ns))
+    sesion._vigia = (ventana, ventana.after(intervalo_ms, tic, time.perf_counter_ns() + intervalo_ns))
+
+
+activar_desde_entorno()
@@ -0,0 +1,173 @@
+"""
+Persistencia del archivo de configuración.
+
+`escribir_json_atomico` escribe a un temporal y lo renombra sobre el
+original, de modo que un corte a mitad de escritura nunca deja un JSON
+truncado, y rota copias de respaldo del archivo anterior. `GuardadoDiferido`
+junta los pedidos de guardado que llegan seguidos (por ejemplo al recorrer
+campos con Tab) en una sola escritura hecha en un hilo aparte.
+"""
+import contextlib
+import json
+import os
+import shutil
+import stat
+import tempfile
+import threading
+import time
+
+import perfilado
+
+# --- CONSTANTES ---
+DEMORA_GUARDADO = 0.5  # segundos sin cambios antes de escribir
+COPIAS_RESPALDO = 3
+# mkstemp crea el temporal con permisos 0600; un archivo nuevo lleva los de
+# siempre según la umask, que se lee una sola vez porque leerla la cambia.
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+# --- ESCRITURA ATÓMICA ---
+
+def rutas_respaldo(ruta, copias=COPIAS_RESPALDO):
+    """Rutas de las copias de respaldo, de la más reciente a la más vieja."""
+    return [ruta.with_name(f"{ruta.name}.{i}") for i in range(1, copias + 1)]
+
+def _rotar_respaldos(ruta, copias):
+    respaldos = rutas_respaldo(ruta, copias)
+    for origen, destino in zip(reversed(respaldos[:-1]), reversed(respaldos[1:])):
+        if origen.exists():
+            os.replace(origen, destino)
+    shutil.copy2(ruta, respaldos[0])
+
+@perfilado.medir()
+def _permisos(ruta):
+    """Permisos del archivo actual, o los de un archivo nuevo si todavía no existe."""
+    try:
+        return stat.S_IMODE(os.stat(ruta).st_mode)
+    except FileNotFoundError:
+        return 0o666 & ~_UMASK
+
+def escribir_json_atomico(ruta, data, copias=COPIAS_RESPALDO, indent=4):
+    """
+    Guarda `data` como JSON en `ruta` sin dejar nunca el archivo a medio escribir.
+    Antes de reemplazarlo, el contenido anterior pasa a la primera copia de respaldo.
+    Cada escritura usa su propio temporal, así que dos escritores a la vez no se pisan.
+    El archivo conserva sus permisos.
+    """
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    descriptor, temporal = tempfile.mkstemp(prefix=ruta.name + ".", suffix=".tmp", dir=ruta.parent)
+    try:
+        os.chmod(temporal, _permisos(ruta))
+        with open(descriptor, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=indent)
+            f.flush()
+            os.fsync(f.fileno())
+        if copias and ruta.exists():
+            _rotar_respaldos(ruta, copias)
+        os.replace(temporal, ruta)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(temporal)
+        raise
+    perfilado.contar(perfilado.CONTADOR_ESCRITURAS)
+
+
+# --- GUARDADO DIFERIDO ---
+
+def foto_superficial(data):
+    """
+    Copia los dicts y listas de los dos primeros niveles de `data` (por
+    ejemplo `settings` y cada filamento de `filaments`), que es lo que la
+    ventana cambia en el lugar; los textos y números se comparten. Alcanza
+    para serializar la foto en otro hilo mientras la ventana sigue editando.
+    """
+    def copiar(valor):
+        if isinstance(valor, dict):
+            return dict(valor)
+        if isinstance(valor, list):
+            return list(valor)
+        return valor
+
+    foto = {}
+    for clave, valor in data.items():
+        if isinstance(valor, dict):
+            foto[clave] = {k: copiar(v) for k, v in valor.items()}
+        elif isinstance(valor, list):
+            foto[clave] = [copiar(v) for v in valor]
+        else:
+            foto[clave] = valor
+    return foto
+
+
+class GuardadoDiferido:
+    """
+    Escribe la configuración en segundo plano, una sola vez por ráfaga de cambios.
+
+    `guardar` copia los contenedores de los datos (ver `foto_superficial`)
+    y vuelve enseguida; el hilo de escritura espera `demora` segundos sin
+    pedidos nuevos y serializa y guarda sólo la última foto. `cerrar`
+    escribe lo pendiente y termina el hilo.
+    """
+
+    def __init__(self, ruta, demora=DEMORA_GUARDADO, copias=COPIAS_RESPALDO):
+        self.ruta = ruta
+        self.demora = demora
+        self.copias = copias
+        self._condicion = threading.Condition()
+        self._pendiente = None
+        self._vence = 0.0
+        self._escribiendo = False
+        self._urgente = False
+        self._cerrado = False
+        self._hilo = threading.Thread(target=self._trabajar, name="GuardadoDiferido", daemon=True)
+        self._hilo.start()
+
+    @perfilado.medir()
+    def guardar(self, data):
+        foto = foto_superficial(data)
+        with self._condicion:
+            if self._cerrado:
+                escribir_json_atomico(self.ruta, data, self.copias)
+                return
+            self._pendiente = foto
+            self._vence = time.monotonic() + self.demora
+            self._condicion.notify_all()
+
+    def flush(self, timeout=None):
+        """Escribe ya lo pendiente y espera a que termine. Devuelve False si venció `timeout`."""
+        with self._condicion:
+            self._urgente = True
+            self._condicion.notify_all()
+            listo = self._condicion.wait_for(lambda: self._pendiente is None and not self._escribiendo, timeout)
+            self._urgente = False
+            return listo
+
+    def cerrar(self, timeout=None):
+        self.flush(timeout)
+        with self._condicion:
+            self._cerrado = True
+            self._condicion.notify_all()
+        self._hilo.join(timeout)
+
+    def _trabajar(self):
+        while True:
+            with self._condicion:
+                self._condicion.wait_for(lambda: self._pendiente is not None or self._cerrado)
+                if self._pendiente is None:
+                    return
+                while not (self._urgente or self._cerrado):
+                    restante = self._vence - time.monotonic()
+                    if restante <= 0:
+                        break
+                    self._condicion.wait(restante)
+                foto, self._pendiente = self._pendiente, None
+                self._escribiendo = True
+            try:
+                escribir_json_atomico(self.ruta, foto, self.copias)
+            except Exception as e:
+                print(f"Error al guardar el archivo de configuración: {e}")
+            finally:
+                with self._condicion:
+                    self._escribiendo = False
+                    self._condicion.notify_all()
@@ -0,0 +1,230 @@
+"""
+Planificación de trabajos en una granja de impresoras.
+
+Cada impresora tiene su propio consumo, desgaste, repuestos y cola de trabajo
+pendiente (`settings["impresoras"]`; lo que no indique sale de los valores
+generales de `settings`):
+
+    "impresoras": [
+        {"id": "p1", "nombre": "Ender 3 #1", "consumo_w": "120", "cola_horas": "3.5"},
+        {"id": "p2", "nombre": "Bambu X1", "consumo_w": "180", "desgaste_horas": "8000", "precio_repuestos": "150000"}
+    ]
+
+`planificar` reparte los trabajos para terminar todo lo antes posible: primero
+una lista con los trabajos más largos adelante, que van a la impresora que se
+libera antes (un heap de cargas), y después una búsqueda local que pasa o
+intercambia trabajos entre la impresora más cargada y las demás. Para cada
+trabajo devuelve la impresora, cuándo empieza y termina, y el costo de luz y
+desgaste en esa máquina.
+
+    python planificador.py trabajos.csv plan.csv
+"""
+import bisect
+import csv
+import heapq
+import sys
+from datetime import timedelta
+
+import motor
+import tarifas_luz
+
+# --- CONSTANTES ---
+PARAMETROS_IMPRESORA = ("consumo_w", "desgaste_horas", "precio_repuestos")
+IMPRESORA_UNICA = {"id": "principal", "nombre": "Impresora principal"}
+EPSILON = 1e-9
+
+
+def impresoras_desde_settings(settings):
+    """Perfiles de impresora con sus parámetros de fórmula completos; una sola si no hay granja configurada."""
+    generales = motor.parametros_desde_settings(settings)
+    impresoras = []
+    for perfil in settings.get("impresoras") or [IMPRESORA_UNICA]:
+        parametros = dict(generales)
+        for clave in PARAMETROS_IMPRESORA:
+            if clave in perfil:
+                parametros[clave] = motor.parse_float(perfil[clave])
+        vida_util = parametros["desgaste_horas"]
+        desgaste_hora = parametros["precio_repuestos"] / vida_util if vida_util > 0 else 0
+        ident = str(perfil.get("id") or perfil.get("nombre"))
+        impresoras.append({
+            "id": ident,
+            "nombre": perfil.get("nombre", ident),
+            "parametros": parametros,
+            "cola_horas": motor.parse_float(perfil.get("cola_horas")),
+            "desgaste_hora": desgaste_hora,
+            "costo_hora": (parametros["consumo_w"] / 1000) * parametros["precio_kwh"] + desgaste_hora,
+        })
+    return impresoras
+
+
+# --- ASIGNACIÓN ---
+
+def _lista(duraciones, cargas, costos_hora):
+    """Trabajos de mayor a menor, cada uno a la impresora que se libera antes (a igual carga, la más barata)."""
+    maquinas = [[] for _ in cargas]
+    heap = [(carga, costo, i) for i, (carga, costo) in enumerate(zip(cargas, costos_hora))]
+    heapq.heapify(heap)
+    for j in sorted(range(len(duraciones)), key=duraciones.__getitem__, reverse=True):
+        carga, costo, i = heap[0]
+        maquinas[i].append(j)
+        heapq.heapreplace(heap, (carga + duraciones[j], costo, i))
+    for carga, _, i in heap:
+        cargas[i] = carga
+    return maquinas
+
+def _mejor_cambio(duraciones, de, a, hueco):
+    """
+    El mejor movimiento de la máquina `de` a la `a`: pasar un trabajo (None si
+    no se devuelve ninguno) o intercambiar dos. La diferencia pasada `delta`
+    mejora si está en (0, hueco); lo ideal es hueco / 2, que empareja las cargas.
+    """
+    ideal = hueco / 2
+    candidatos = sorted((duraciones[i], i) for i in a)
+    claves = [d for d, _ in candidatos]
+    mejor = None
+    for j in de:
+        dj = duraciones[j]
+        opciones = [(dj, None)]
+        k = bisect.bisect_left(claves, dj - ideal)
+        opciones += [candidatos[x] for x in (k - 1, k) if 0 <= x < len(candidatos)]
+        for di, i in opciones:
+            delta = dj - (di if i is not None else 0)
+            if EPSILON < delta < hueco - EPSILON and (mejor is None or abs(delta - ideal) < abs(mejor[0] - ideal)):
+                mejor = (delta, j, i)
+    return mejor
+
+def _busqueda_local(duraciones, maquinas, cargas, max_iteraciones):
+    """
+    Mejora la asignación quitándole trabajo a la máquina más cargada. Cada paso
+    pasa una diferencia `delta` de una máquina a otra menos cargada sin que
+    ninguna supere la carga previa de la primera, así que la suma de los
+    cuadrados de las cargas baja siempre y la búsqueda termina.
+    """
+    for _ in range(max_iteraciones):
+        orden = sorted(range(len(cargas)), key=cargas.__getitem__)
+        alta = orden[-1]
+        for baja in orden[:-1]:
+            cambio = _mejor_cambio(duraciones, maquinas[alta], maquinas[baja], cargas[alta] - cargas[baja])
+            if cambio:
+                break
+        else:
+            return
+        delta, j, i = cambio
+        maquinas[alta].remove(j)
+        maquinas[baja].append(j)
+        if i is not None:
+            maquinas[baja].remove(i)
+            maquinas[alta].append(i)
+        cargas[alta] -= delta
+        cargas[baja] += delta
+
+def planificar(trabajos, impresoras, mejorar=True, colas=None, tarifa=None, inicio=None, max_iteraciones=None):
+    """
+    Asigna cada trabajo (dict con `horas` y, si se quiere cotizar completo,
+    `gramos` y `precio_kg`) a una de `impresoras` (de `impresoras_desde_settings`).
+
+    `colas` pisa las horas pendientes de cada impresora ({id: horas}). La luz
+    se cobra con `tarifa` (`tarifas_luz.TarifaLuz`) desde `inicio` (datetime;
+    por defecto, ahora) si se indica, o con el kWh fijo si no.
+
+    Devuelve un dict con `makespan_h`, `cargas` ({id: horas}) y `trabajos`: en
+    el mismo orden de entrada, la impresora, `inicio_h`/`fin_h` (horas desde
+    ahora), `fin` (fecha estimada), `luz`, `desgaste` y, si el trabajo tenía
+    gramos y precio, la `cotizacion` completa en esa impresora.
+    """
+    if not impresoras:
+        raise ValueError("No hay impresoras configuradas.")
+    duraciones = [float(t["horas"]) for t in trabajos]
+    if any(not d > 0 for d in duraciones):
+        raise ValueError(motor.ERROR_TIEMPO)
+    colas = colas or {}
+    cola = [motor.parse_float(colas.get(imp["id"], imp["cola_horas"])) for imp in impresoras]
+    cargas = list(cola)
+    maquinas = _lista(duraciones, cargas, [imp["costo_hora"] for imp in impresoras])
+    if mejorar:
+        _busqueda_local(duraciones, maquinas, cargas, max_iteraciones or 10 * len(trabajos) + 100)
+
+    ahora = tarifas_luz.horas_desde_inicio(inicio)
+    resultado = [None] * len(trabajos)
+    for i, impresora in enumerate(impresoras):
+        p = impresora["parametros"]
+        desde = cola[i]
+        # A igual carga total, de menor a mayor duración reduce la espera promedio de cada trabajo.
+        for j in sorted(maquinas[i], key=duraciones.__getitem__):
+            horas = duraciones[j]
+            if tarifa is not None:
+                luz = tarifa.costo(ahora + desde, horas, p["consumo_w"])
+            else:
+                luz = (p["consumo_w"] / 1000) * horas * p["precio_kwh"]
+            fila = {
+                "impresora": impresora["id"],
+                "inicio_h": desde,
+                "fin_h": desde + horas,
+                "fin": tarifas_luz.REFERENCIA + timedelta(hours=ahora + desde + horas),
+                "luz": luz,
+                "desgaste": impresora["desgaste_hora"] * horas,
+            }
+            trabajo = trabajos[j]
+            if "gramos" in trabajo and "precio_kg" in trabajo:
+                fila["cotizacion"] = motor.cotizar(float(trabajo["gramos"]), horas, float(trabajo["precio_kg"]), p, luz)
+            resultado[j] = fila
+            desde += horas
+    return {
+        "makespan_h": max(cargas),
+        "cargas": {imp["id"]: carga for imp, carga in zip(impresoras, cargas)},
+        "trabajos": resultado,
+    }
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Reparte un CSV de trabajos entre las impresoras de la granja.")
+    parser.add_argument("entrada", help="CSV con columnas de tiempo (dias, horas, minutos, segundos) y opcionalmente id, gramos, precio_kg o filamento")
+    parser.add_argument("salida", help="CSV con el plan ('-' para stdout)")
+    parser.add_argument("--sin-mejora", action="store_true", help="Sólo la asignación inicial, sin búsqueda local")
+    args = parser.parse_args(argv)
+
+    from nucleo import abrir_catalogo, load_data
+    data = load_data()
+    catalogo = abrir_catalogo(data)
+    try:
+        with open(args.entrada, "r", encoding="utf-8", newline="") as f:
+            trabajos = []
+            for n, fila in enumerate(csv.DictReader(f), start=1):
+                trabajo = {"id": fila.get("id") or str(n)}
+                trabajo["horas"] = motor.horas_desde_tiempo(*(motor.parse_float(fila.get(c)) for c in ("dias", "horas", "minutos", "segundos")))
+                if fila.get("gramos"):
+                    trabajo["gramos"] = motor.parse_float(fila["gramos"])
+                if fila.get("precio_kg"):
+                    trabajo["precio_kg"] = motor.parse_float(fila["precio_kg"])
+                elif fila.get("filamento"):
+                    filamento = catalogo.obtener(fila["filamento"]) or catalogo.por_nombre(fila["filamento"])
+                    if filamento:
+                        trabajo["precio_kg"] = float(filamento["price_kg"])
+                trabajos.append(trabajo)
+        plan = planificar(trabajos, impresoras_desde_settings(data["settings"]), not args.sin_mejora,
+                          tarifa=tarifas_luz.tarifa_desde_settings(data["settings"]))
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        catalogo.cerrar()
+
+    salida = sys.stdout if args.salida == "-" else open(args.salida, "w", encoding="utf-8", newline="")
+    try:
+        writer = csv.writer(salida, lineterminator="\n")
+        writer.writerow(["id", "impresora", "inicio", "fin", "horas", "luz", "desgaste", "precio_final"])
+        for trabajo, fila in zip(trabajos, plan["trabajos"]):
+            inicio = fila["fin"] - timedelta(hours=trabajo["horas"])
+            precio = f"{fila['cotizacion']['precio_final']:.2f}" if "cotizacion" in fila else ""
+            writer.writerow([trabajo["id"], fila["impresora"], inicio.strftime(tarifas_luz.FORMATO_INICIO), fila["fin"].strftime(tarifas_luz.FORMATO_INICIO),
+                             f"{trabajo['horas']:.4f}", f"{fila['luz']:.2f}", f"{fila['desgaste']:.2f}", precio])
+    finally:
+        if salida is not sys.stdout:
+            salida.close()
+    print(f"{len(trabajos)} trabajos en {len(plan['cargas'])} impresoras; todo terminado en {plan['makespan_h']:.1f} h.", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+"""
+Recálculo en vivo de la cotización con un grafo de dependencias.
+
+Cada campo de la ventana es una entrada del grafo (su texto) y cada tasa de
+`motor.TASAS` y paso de `motor.FORMULA` un nodo que depende de otros. Al
+cambiar un campo sólo se recalculan los nodos que dependen de él, y si un
+nodo queda con el mismo valor la propagación se corta ahí: cambiar el precio
+del kWh recalcula la luz por hora, la luz, el IVA de la luz y los totales,
+pero no el material. `calcular` devuelve sólo los
+nodos que cambiaron, para que la ventana toque únicamente esas etiquetas.
+
+Un campo inválido no corta nada: su nodo queda con un `ErrorCampo` que se
+propaga a los que dependen de él, y la ventana lo muestra junto al campo.
+"""
+import heapq
+import math
+
+import motor
+
+# --- CONSTANTES ---
+CAMPOS_PARAMETROS = ("precio_kwh", "consumo_w", "desgaste_horas", "precio_repuestos", "margen_error_pct", "margen_ganancia_x", "costo_envio")
+CAMPOS_TIEMPO = ("tiempo_dias", "tiempo_horas", "tiempo_minutos", "tiempo_segundos")
+CAMPOS = CAMPOS_PARAMETROS + CAMPOS_TIEMPO + ("gramos", "filamento", "inicio")
+
+
+class ErrorCampo(Exception):
+    """Valor de un nodo que no se pudo calcular; `campos` son los campos a señalar."""
+
+    def __init__(self, mensaje, campos=()):
+        super().__init__(mensaje)
+        self.campos = tuple(campos)
+
+    def __eq__(self, otro):
+        return isinstance(otro, ErrorCampo) and str(self) == str(otro) and self.campos == otro.campos
+
+    def __hash__(self):
+        return hash((str(self), self.campos))
+
+
+class Grafo:
+    """
+    Grafo de cálculo incremental. Los nodos se definen en orden (cada uno
+    después de sus dependencias), así que el orden de definición ya es un
+    orden topológico y alcanza un heap de posiciones para recorrerlos.
+    """
+
+    def __init__(self):
+        self.valores = {}
+        self._nodos = {}  # nombre -> (posición, dependencias, función); las entradas no tienen función
+        self._dependientes = {}
+        self._sucios = []
+
+    def entrada(self, nombre, valor=None):
+        self._nodos[nombre] = (len(self._nodos), (), None)
+        self._dependientes[nombre] = []
+        self.valores[nombre] = valor
+
+    def nodo(self, nombre, dependencias, funcion):
+        for dependencia in dependencias:
+            self._dependientes[dependencia].append(nombre)
+        self._nodos[nombre] = (len(self._nodos), tuple(dependencias), funcion)
+        self._dependientes[nombre] = []
+        self.invalidar(nombre)
+
+    def fijar(self, nombre, valor):
+        """Cambia una entrada. Si el valor es el mismo no hay nada que recalcular."""
+        if self.valores.get(nombre) != valor:
+            self.valores[nombre] = valor
+            for dependiente in self._dependientes[nombre]:
+                self.invalidar(dependiente)
+
+    def invalidar(self, nombre):
+        """Obliga a recalcular un nodo (por ejemplo, si cambió algo de afuera que lee su función)."""
+        heapq.heappush(self._sucios, (self._nodos[nombre][0], nombre))
+
+    def calcular(self):
+        """Recalcula lo pendiente. Devuelve {nombre: valor} de los nodos cuyo valor cambió."""
+        cambios = {}
+        visitados = set()
+        while self._sucios:
+            _, nombre = heapq.heappop(self._sucios)
+            if nombre in visitados:
+                continue
+            visitados.add(nombre)
+            _, dependencias, funcion = self._nodos[nombre]
+            if funcion is None:
+                continue
+            argumentos = [self.valores[d] for d in dependencias]
+            error = next((a for a in argumentos if isinstance(a, ErrorCampo)), None)
+            if error is not None:
+                valor = error
+            else:
+                try:
+                    valor = funcion(*argumentos)
+                except ErrorCampo as e:
+                    valor = e
+            if nombre in self.valores and self.valores[nombre] == valor:
+                continue
+            self.valores[nombre] = cambios[nombre] = valor
+            for dependiente in self._dependientes[nombre]:
+                heapq.heappush(self._sucios, (self._nodos[dependiente][0], dependiente))
+        return cambios
+
+
+# --- GRAFO DE LA COTIZACIÓN ---
+
+def _numero(campo):
+    def convertir(texto):
+        try:
+            valor = motor.parse_float(texto)
+        except ValueError:
+            valor = math.nan
+        if not math.isfinite(valor):  # "nan" e "inf" los acepta float() pero no son números válidos acá
+            raise ErrorCampo(f"'{texto.strip()}' no es un número válido.", (campo,))
+        return valor
+    return convertir
+
+def _positivo(mensaje, campos):
+    def validar(valor):
+        if not valor > 0:
+            raise ErrorCampo(mensaje, campos)
+        return valor
+    return validar
+
+def grafo_cotizacion(precio_filamento, iva_luz_pct, energia=None):
+    """
+    Arma el grafo de la ventana principal. Las entradas se llaman
+    `texto_<campo>` (un campo por nombre de CAMPOS) y reciben el texto tal
+    cual; los nodos de resultado se llaman como en `motor.COMPONENTES`.
+
+    `precio_filamento(nombre)` devuelve el precio por kg o None.
+    `energia(inicio, horas, consumo_w, precio_kwh)` devuelve el costo de la luz
+    con tarifa por franja horaria, o None para usar el kWh fijo.
+    """
+    grafo = Grafo()
+    for campo in CAMPOS:
+        grafo.entrada(f"texto_{campo}", "")
+    grafo.entrada("iva_luz_pct", iva_luz_pct)
+
+    for campo in CAMPOS_PARAMETROS + CAMPOS_TIEMPO:
+        grafo.nodo(campo, (f"texto_{campo}",), _numero(campo))
+    grafo.nodo("gramos", ("texto_gramos",), lambda texto: _positivo(motor.ERROR_GRAMOS, ("gramos",))(_numero("gramos")(texto)))
+    grafo.nodo("horas", CAMPOS_TIEMPO, lambda *tiempo: _positivo(motor.ERROR_TIEMPO, CAMPOS_TIEMPO)(motor.horas_desde_tiempo(*tiempo)))
+
+    def precio_kg(nombre):
+        precio = precio_filamento(nombre)
+        if precio is None:
+            raise ErrorCampo(motor.ERROR_FILAMENTO, ("filamento",))
+        return precio
+    grafo.nodo("precio_kg", ("texto_filamento",), precio_kg)
+    grafo.nodo("precio_gramo", ("precio_kg",), motor.precio_gramo)
+    grafo.nodo("desgaste_por_hora", ("precio_repuestos", "desgaste_horas"), motor.desgaste_por_hora)
+    for nombre, entradas, funcion in motor.TASAS:
+        grafo.nodo(nombre, entradas, funcion)
+
+    for nombre, entradas, funcion in motor.FORMULA:
+        if nombre == "luz" and energia is not None:
+            def luz(texto_inicio, consumo_w, precio_kwh, horas, luz_por_hora, fija=funcion):
+                try:
+                    costo = energia(texto_inicio, horas, consumo_w, precio_kwh)
+                except ValueError as e:
+                    raise ErrorCampo(str(e), ("inicio",))
+                return fija(horas, luz_por_hora) if costo is None else costo
+            grafo.nodo(nombre, ("texto_inicio", "consumo_w", "precio_kwh") + entradas, luz)
+        else:
+            grafo.nodo(nombre, entradas, funcion)
+    return grafo
@@ -0,0 +1,140 @@
+"""
+Simulación de Monte Carlo del costo real de una impresión.
+
+El margen de error fijo (`margen_error_pct`) cubre la incertidumbre con un
+único porcentaje. Acá se sortean, para cada muestra, el tiempo real de
+impresión, el precio de la luz y las impresiones fallidas que hubo que
+repetir, y se mide la distribución del costo resultante: percentiles
+P50/P90/P99, probabilidad de perder plata con el precio actual y el
+multiplicador de ganancia que hace falta para que esa probabilidad no pase
+de un objetivo.
+
+    python riesgo.py --gramos 85.5 --horas 4.5 --filamento "Grilon (PLA)"
+
+Modelo de cada muestra:
+- tiempo real = tiempo estimado x un factor lognormal de media 1 y desvío
+  `riesgo_desvio_tiempo_pct`; lo mismo para el precio del kWh con
+  `riesgo_desvio_kwh_pct`.
+- cada intento falla con probabilidad 1 - (1 - p)^horas, donde p es
+  `riesgo_falla_hora_pct`: cuanto más larga la impresión, más chances de que
+  algo salga mal. La cantidad de fallas antes del intento bueno es geométrica.
+- una falla se corta en un punto uniforme del intento y desperdicia esa
+  fracción de material, luz y desgaste. Las fallas de una misma muestra
+  comparten el punto de corte: la media es exacta y la varianza queda algo
+  por encima de la real, así que el resultado es conservador.
+"""
+import sys
+
+import motor
+
+# --- CONSTANTES ---
+CONFIG_RIESGO = (
+    "riesgo_falla_hora_pct", "riesgo_desvio_tiempo_pct",
+    "riesgo_desvio_kwh_pct", "riesgo_perdida_objetivo_pct",
+)
+CONFIG_RIESGO_DEFAULT = {
+    "riesgo_falla_hora_pct": "1", "riesgo_desvio_tiempo_pct": "10",
+    "riesgo_desvio_kwh_pct": "10", "riesgo_perdida_objetivo_pct": "5",
+}
+MUESTRAS = 1_000_000
+PERCENTILES = (50, 90, 99)
+
+
+def config_desde_settings(settings):
+    """Extrae de `data["settings"]` la configuración de la simulación como floats."""
+    return {clave: motor.parse_float(settings.get(clave), CONFIG_RIESGO_DEFAULT[clave]) for clave in CONFIG_RIESGO}
+
+def _factor_lognormal(rng, desvio_pct, n):
+    """Factores multiplicativos de media 1 y coeficiente de variación `desvio_pct`."""
+    import numpy as np
+
+    if desvio_pct <= 0:
+        return np.ones(n)
+    sigma2 = np.log1p((desvio_pct / 100) ** 2)
+    return rng.lognormal(-sigma2 / 2, np.sqrt(sigma2), n)
+
+def simular(gramos, horas, precio_kg, parametros, config, muestras=MUESTRAS, semilla=None):
+    """
+    Simula `muestras` veces el costo de la pieza. `parametros` son los de
+    `motor.cotizar` y `config` los de `config_desde_settings`. Lanza
+    ValueError con los mismos mensajes que `motor.cotizar`.
+
+    Devuelve un dict con `p50`, `p90`, `p99` y `costo_medio` (costos sin el
+    margen de error fijo, que la simulación reemplaza), `prob_perdida` (con el
+    `precio_venta` actual), `multiplicador` (el `margen_ganancia_x` que lleva
+    la probabilidad de pérdida al objetivo) y la cotización fija en `cotizacion`.
+    """
+    import numpy as np
+
+    cotizacion = motor.cotizar(gramos, horas, precio_kg, parametros)
+    falla_hora = config["riesgo_falla_hora_pct"] / 100
+    objetivo = config["riesgo_perdida_objetivo_pct"] / 100
+    if not 0 <= falla_hora < 1:
+        raise ValueError("La probabilidad de falla por hora debe estar entre 0 y 100 (sin incluir 100).")
+    if not 0 < objetivo < 1:
+        raise ValueError("La probabilidad de pérdida objetivo debe estar entre 0 y 100 (sin incluir los extremos).")
+
+    rng = np.random.default_rng(semilla)
+    horas_reales = horas * _factor_lognormal(rng, config["riesgo_desvio_tiempo_pct"], muestras)
+    precio_kwh = parametros["precio_kwh"] * _factor_lognormal(rng, config["riesgo_desvio_kwh_pct"], muestras)
+
+    # Costo de un intento completo con la misma fórmula del motor, pero sin margen de error.
+    luz = (parametros["consumo_w"] / 1000) * horas_reales * precio_kwh
+    desgaste_por_hora = cotizacion["desgaste"] / horas
+    costo_intento = cotizacion["material"] + luz * (1 + parametros["iva_luz_pct"] / 100) + desgaste_por_hora * horas_reales
+
+    # Fallas antes del intento bueno: geométrica con probabilidad de éxito (1 - p)^horas.
+    exito = np.exp(horas_reales * np.log1p(-falla_hora))
+    fallas = rng.geometric(exito) - 1
+    costo = costo_intento * (1 + fallas * rng.random(muestras))
+
+    p50, p90, p99, cuantil_objetivo = np.percentile(costo, PERCENTILES + (100 * (1 - objetivo),))
+    return {
+        "p50": float(p50), "p90": float(p90), "p99": float(p99),
+        "costo_medio": float(costo.mean()),
+        "prob_perdida": float(np.count_nonzero(costo > cotizacion["precio_venta"]) / muestras),
+        "multiplicador": float(cuantil_objetivo / cotizacion["costo_total"]),
+        "cotizacion": cotizacion,
+        "muestras": muestras,
+    }
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Simula el riesgo de pérdida de una cotización.")
+    parser.add_argument("--gramos", type=float, required=True)
+    parser.add_argument("--horas", type=float, required=True, help="Tiempo de impresión en horas decimales")
+    precio = parser.add_mutually_exclusive_group(required=True)
+    precio.add_argument("--filamento", help="Id o nombre visible del filamento")
+    precio.add_argument("--precio-kg", type=float)
+    parser.add_argument("--muestras", type=int, default=MUESTRAS)
+    parser.add_argument("--semilla", type=int)
+    args = parser.parse_args(argv)
+
+    from nucleo import abrir_catalogo, load_data
+    data = load_data()
+    precio_kg = args.precio_kg
+    if args.filamento is not None:
+        catalogo = abrir_catalogo(data)
+        filamento = catalogo.obtener(args.filamento) or catalogo.por_nombre(args.filamento)
+        catalogo.cerrar()
+        if not filamento:
+            print(f"Error: {motor.ERROR_FILAMENTO}", file=sys.stderr)
+            return 1
+        precio_kg = float(filamento["price_kg"])
+    try:
+        r = simular(args.gramos, args.horas, precio_kg, motor.parametros_desde_settings(data["settings"]),
+                    config_desde_settings(data["settings"]), args.muestras, args.semilla)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    print(f"Costo fijo (con margen de error): $ {r['cotizacion']['costo_total']:,.2f}")
+    for p in PERCENTILES:
+        print(f"Costo P{p}: $ {r[f'p{p}']:,.2f}")
+    print(f"Probabilidad de pérdida con el precio actual: {r['prob_perdida']:.2%}")
+    print(f"Multiplicador sugerido: {r['multiplicador']:.3f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
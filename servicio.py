@@ -0,0 +1,314 @@
+"""
+Servicio HTTP local de cotización para la tienda web.
+
+Usa sólo asyncio de la biblioteca estándar, no necesita conexión a
+internet y mantiene las conexiones abiertas (keep-alive) entre pedidos.
+Cotiza con la misma fórmula y la misma configuración que la app; si
+`config_impresion3d.json` cambia, se recarga sin reiniciar el servicio.
+Cada cotización lleva la `version_tarifario` con la que se hizo.
+
+    python servicio.py --puerto 8765
+
+Endpoints (todas las respuestas son JSON):
+    GET  /salud                       estado y versiones de la configuración y del tarifario
+    GET  /filamentos?prefijo=gri      catálogo de filamentos
+    POST /cotizar                     un trabajo -> una cotización
+    POST /cotizar/lote                {"trabajos": [...]} -> {"cotizaciones": [...]}
+    POST /cotizar/trabajo             {"piezas": [...]} -> un trabajo de varias piezas y materiales
+    POST /planificar                  {"trabajos": [...], "colas": {id: horas}} -> plan de la granja
+
+Un trabajo es un objeto con `gramos`, el tiempo (`horas` y/o `dias`,
+`minutos`, `segundos`), `filamento` (id o nombre visible) o `precio_kg`,
+opcionalmente `inicio` (AAAA-MM-DD HH:MM, para la tarifa de luz por franja
+horaria; por defecto, ahora) y cualquier parámetro de `motor.PARAMETROS`
+para pisar el de la configuración. Las piezas de /cotizar/trabajo son las de
+`trabajos.py`, sin `gcode`; el pedido puede llevar un `inicio` para todas.
+"""
+import asyncio
+import json
+import os
+import sys
+from urllib.parse import parse_qs, urlsplit
+
+import motor
+import nucleo
+import planificador
+import tarifario
+import tarifas_luz
+import trabajos
+
+# --- CONSTANTES ---
+HOST = "127.0.0.1"
+PUERTO = 8765
+INTERVALO_RECARGA = 1.0  # segundos entre controles de cambios en la configuración
+TAMANO_MAXIMO_CUERPO = 64 * 1024 * 1024
+RAZONES = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class ErrorPedido(Exception):
+    """Error atribuible al pedido del cliente; se responde con `estado`."""
+
+    def __init__(self, mensaje, estado=400):
+        super().__init__(mensaje)
+        self.estado = estado
+
+
+# --- SERVICIO ---
+
+class ServicioCotizacion:
+    def __init__(self):
+        self.version_config = None
+        self.catalogo = None
+        self.recargar_si_cambio()
+
+    def recargar_si_cambio(self):
+        """Vuelve a leer la configuración si cambió su fecha o tamaño. Devuelve True si recargó."""
+        try:
+            estado = os.stat(nucleo.CONFIG_FILE)
+            version = (estado.st_mtime_ns, estado.st_size)
+        except OSError:
+            version = None
+        if version == self.version_config and self.catalogo is not None:
+            return False
+        data = nucleo.load_data()
+        if self.catalogo is not None:
+            self.catalogo.cerrar()
+        self.impresoras = planificador.impresoras_desde_settings(data["settings"])
+        self.catalogo = nucleo.abrir_catalogo(data)
+        self.tarifario = tarifario.compilar(data["settings"], self.catalogo)
+        self.version_config = version
+        return True
+
+    async def vigilar_config(self):
+        while True:
+            await asyncio.sleep(INTERVALO_RECARGA)
+            try:
+                self.recargar_si_cambio()
+            except Exception as e:
+                print(f"Error al recargar la configuración: {e}", file=sys.stderr)
+
+    # --- Trabajos ---
+
+    def _precio_kg(self, trabajo):
+        """El `precio_kg` explícito del trabajo o, si no, el de su filamento en el tarifario (NaN si no existe)."""
+        if "precio_kg" in trabajo:
+            return motor.parse_float(trabajo["precio_kg"], "nan")
+        return self.tarifario.precio_kg(self._filamento_id(trabajo), float("nan"))
+
+    def _filamento_id(self, trabajo):
+        referencia = str(trabajo.get("filamento", ""))
+        filamento = self.catalogo.obtener(referencia) or self.catalogo.por_nombre(referencia)
+        return filamento["id"] if filamento else None
+
+    def _horas(self, trabajo):
+        return motor.horas_desde_tiempo(*(motor.parse_float(trabajo.get(c)) for c in ("dias", "horas", "minutos", "segundos")))
+
+    def cotizar(self, trabajo):
+        if not isinstance(trabajo, dict):
+            raise ErrorPedido("El trabajo debe ser un objeto JSON.")
+        try:
+            ajustes = {k: motor.parse_float(trabajo[k]) for k in motor.PARAMETROS if k in trabajo}
+            precio_kg = self._precio_kg(trabajo) if "precio_kg" in trabajo else None
+            if precio_kg != precio_kg:
+                raise ValueError(motor.ERROR_FILAMENTO)
+            filamento_id = None if "precio_kg" in trabajo else self._filamento_id(trabajo)
+            return self.tarifario.cotizar(motor.parse_float(trabajo.get("gramos")), self._horas(trabajo), filamento_id, precio_kg,
+                                          trabajo.get("inicio"), ajustes)
+        except (ValueError, TypeError) as e:
+            raise ErrorPedido(str(e))
+
+    def _leer_trabajo(self, trabajo):
+        """(gramos, horas, precio_kg, ajustes, inicio en horas) de un trabajo del lote. Lanza ValueError o TypeError."""
+        if not isinstance(trabajo, dict):
+            raise ValueError("El trabajo debe ser un objeto JSON.")
+        ajustes = {k: motor.parse_float(trabajo[k]) for k in motor.PARAMETROS if k in trabajo}
+        inicio = tarifas_luz.horas_desde_inicio(trabajo.get("inicio")) if self.tarifario.tarifa is not None else 0.0
+        return motor.parse_float(trabajo.get("gramos")), self._horas(trabajo), self._precio_kg(trabajo), ajustes, inicio
+
+    def cotizar_lote(self, trabajos):
+        """
+        Cotiza todos los trabajos en una sola pasada vectorizada. Un trabajo
+        inválido no frena a los demás: vuelve con `error` en su lugar.
+        """
+        if not isinstance(trabajos, list):
+            raise ErrorPedido("'trabajos' debe ser una lista de objetos JSON.")
+        tarifas = self.tarifario
+        filas, errores = [], {}
+        for i, trabajo in enumerate(trabajos):
+            try:
+                filas.append(self._leer_trabajo(trabajo))
+            except (ValueError, TypeError) as e:
+                errores[i] = str(e)
+                filas.append((float("nan"), 0.0, float("nan"), {}, 0.0))
+        gramos, horas, precio_kg, ajustes, inicios = (list(columna) for columna in zip(*filas)) if filas else ([], [], [], [], [])
+        parametros = dict(tarifas.parametros)
+        for clave in motor.PARAMETROS:
+            if any(clave in a for a in ajustes):
+                parametros[clave] = [a.get(clave, tarifas.parametros[clave]) for a in ajustes]
+        luz = None
+        if tarifas.tarifa is not None:
+            luz = tarifas.tarifa.costo_lote(inicios, [max(h, 0) for h in horas], parametros["consumo_w"])
+        resultado = motor.cotizar_lote(gramos, horas, precio_kg, parametros, luz)
+        columnas = [resultado[c].tolist() for c in motor.COMPONENTES]
+        cotizaciones = []
+        for i, valido in enumerate(resultado["valido"].tolist()):
+            if valido and i not in errores:
+                cotizacion = dict(zip(motor.COMPONENTES, (columna[i] for columna in columnas)))
+                cotizacion["version_tarifario"] = tarifas.version + (tarifario.SUFIJO_AJUSTES if ajustes[i] else "")
+                cotizaciones.append(cotizacion)
+            else:
+                cotizaciones.append({"error": errores.get(i) or motor.detalle_error(gramos[i], horas[i], precio_kg[i])})
+        return cotizaciones
+
+    def cotizar_trabajo(self, pedido):
+        """Cotiza un trabajo de varias piezas de una vez, con desglose por pieza y por material."""
+        try:
+            piezas = trabajos.leer_pedido(pedido, lambda r: self.catalogo.obtener(r) or self.catalogo.por_nombre(r))
+            return trabajos.cotizar_trabajo(piezas, self.tarifario, pedido.get("inicio"))
+        except (ValueError, TypeError) as e:
+            raise ErrorPedido(str(e))
+
+    def planificar(self, pedido):
+        """Reparte los trabajos entre las impresoras; cada uno vuelve con su impresora, fin estimado y cotización."""
+        trabajos = pedido.get("trabajos") if isinstance(pedido, dict) else None
+        if not isinstance(trabajos, list) or not all(isinstance(t, dict) for t in trabajos):
+            raise ErrorPedido("'trabajos' debe ser una lista de objetos JSON.")
+        colas = pedido.get("colas") or {}
+        if not isinstance(colas, dict):
+            raise ErrorPedido("'colas' debe ser un objeto JSON {impresora: horas}.")
+        try:
+            normalizados = []
+            for t in trabajos:
+                trabajo = {"horas": self._horas(t)}
+                if "gramos" in t:
+                    trabajo["gramos"] = motor.parse_float(t["gramos"])
+                    trabajo["precio_kg"] = self._precio_kg(t)
+                    if trabajo["precio_kg"] != trabajo["precio_kg"]:
+                        raise ValueError(motor.ERROR_FILAMENTO)
+                normalizados.append(trabajo)
+            plan = planificador.planificar(normalizados, self.impresoras, colas=colas, tarifa=self.tarifario.tarifa)
+        except (ValueError, TypeError) as e:
+            raise ErrorPedido(str(e))
+        for fila in plan["trabajos"]:
+            fila["fin"] = fila["fin"].strftime(tarifas_luz.FORMATO_INICIO)
+            if "cotizacion" in fila:
+                fila["cotizacion"]["version_tarifario"] = self.tarifario.version
+        return plan
+
+    # --- HTTP ---
+
+    def despachar(self, metodo, ruta, cuerpo):
+        url = urlsplit(ruta)
+        if url.path == "/salud":
+            self._exigir(metodo, "GET")
+            return {"estado": "ok", "version_config": self.version_config, "version_tarifario": self.tarifario.version,
+                    "filamentos": len(self.catalogo)}
+        if url.path == "/filamentos":
+            self._exigir(metodo, "GET")
+            prefijo = parse_qs(url.query).get("prefijo", [""])[0]
+            return {"filamentos": [dict(f, nombre=self.catalogo.nombre(f["id"])) for f in self.catalogo.pagina(0, len(self.catalogo), prefijo)]}
+        if url.path == "/cotizar":
+            self._exigir(metodo, "POST")
+            return self.cotizar(self._json(cuerpo))
+        if url.path == "/cotizar/lote":
+            self._exigir(metodo, "POST")
+            pedido = self._json(cuerpo)
+            return {"cotizaciones": self.cotizar_lote(pedido.get("trabajos") if isinstance(pedido, dict) else None)}
+        if url.path == "/cotizar/trabajo":
+            self._exigir(metodo, "POST")
+            return self.cotizar_trabajo(self._json(cuerpo))
+        if url.path == "/planificar":
+            self._exigir(metodo, "POST")
+            return self.planificar(self._json(cuerpo))
+        raise ErrorPedido(f"No existe {url.path}", 404)
+
+    def _exigir(self, metodo, esperado):
+        if metodo != esperado:
+            raise ErrorPedido(f"Método no permitido, se esperaba {esperado}", 405)
+
+    def _json(self, cuerpo):
+        try:
+            return json.loads(cuerpo or b"null")
+        except ValueError as e:
+            raise ErrorPedido(f"JSON inválido: {e}")
+
+    async def atender(self, reader, writer):
+        """Atiende una conexión, pedido tras pedido, hasta que el cliente la cierre."""
+        try:
+            while True:
+                try:
+                    encabezado = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                lineas = encabezado.decode("latin-1").split("\r\n")
+                try:
+                    metodo, ruta, protocolo = lineas[0].split(" ", 2)
+                except ValueError:
+                    break
+                headers = {}
+                for linea in lineas[1:]:
+                    nombre, _, valor = linea.partition(":")
+                    if nombre:
+                        headers[nombre.strip().lower()] = valor.strip()
+                conexion = headers.get("connection", "").lower()
+                mantener = conexion == "keep-alive" or (protocolo == "HTTP/1.1" and conexion != "close")
+
+                largo = headers.get("content-length") or "0"
+                largo = int(largo) if largo.isascii() and largo.isdigit() else None
+                if largo is None:
+                    # Sin un largo válido no se sabe dónde termina el cuerpo: se responde y se cierra.
+                    estado, respuesta, mantener = 400, {"error": "Content-Length inválido."}, False
+                elif largo > TAMANO_MAXIMO_CUERPO:
+                    estado, respuesta, mantener = 413, {"error": "Cuerpo demasiado grande."}, False
+                else:
+                    cuerpo = await reader.readexactly(largo) if largo else b""
+                    try:
+                        estado, respuesta = 200, self.despachar(metodo, ruta, cuerpo)
+                    except ErrorPedido as e:
+                        estado, respuesta = e.estado, {"error": str(e)}
+                    except Exception as e:
+                        estado, respuesta = 500, {"error": f"Error inesperado: {e}"}
+
+                datos = json.dumps(respuesta, ensure_ascii=False).encode("utf-8")
+                writer.write(
+                    f"HTTP/1.1 {estado} {RAZONES[estado]}\r\n"
+                    f"Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(datos)}\r\n"
+                    f"Connection: {'keep-alive' if mantener else 'close'}\r\n\r\n".encode("latin-1") + datos)
+                await writer.drain()
+                if not mantener:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+async def servir(host=HOST, puerto=PUERTO):
+    servicio = ServicioCotizacion()
+    servidor = await asyncio.start_server(servicio.atender, host, puerto)
+    vigilancia = asyncio.create_task(servicio.vigilar_config())
+    print(f"Servicio de cotización escuchando en http://{host}:{puerto}", file=sys.stderr)
+    try:
+        async with servidor:
+            await servidor.serve_forever()
+    finally:
+        vigilancia.cancel()
+        servicio.catalogo.cerrar()
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Servicio HTTP local de cotización.")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--puerto", type=int, default=PUERTO)
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(servir(args.host, args.puerto))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,164 @@
+"""
+Tarifario precompilado y versionado.
+
+Todo lo que la fórmula necesita y no depende de la pieza (luz por hora,
+desgaste por hora, factores de error e IVA, precio por gramo de cada
+filamento, tarifa de luz por franja) se calcula una sola vez al compilar el
+tarifario, y cotizar una pieza queda en un par de multiplicaciones y sumas.
+
+El tarifario es inmutable: `con_settings`, `con_filamento` y `sin_filamento`
+devuelven uno nuevo y sólo recalculan lo que cambió (con la misma
+configuración, `con_settings` devuelve el mismo objeto). Su `version` sale del
+contenido y no de un contador: dos tarifarios con los mismos parámetros y
+precios tienen la misma versión en cualquier máquina, y se estampa en cada
+cotización (`version_tarifario`) para poder auditar con qué precios se hizo.
+
+La versión es "<parámetros>.<catálogo>": un hash de 8 bytes de los
+parámetros y la tarifa de luz, y el XOR de un hash por filamento (id y
+precio), que se actualiza en O(1) al agregar, editar o borrar uno. Para
+decidir si hay que recompilar se comparan los parámetros mismos, no el hash.
+
+    python tarifario.py
+"""
+import hashlib
+import json
+import sys
+from types import MappingProxyType
+
+import motor
+import perfilado
+import tarifas_luz
+
+# --- CONSTANTES ---
+SETTINGS_TARIFA = ("tarifa_luz", "fases_consumo")  # además de motor.PARAMETROS
+SUFIJO_AJUSTES = "+ajustes"
+
+
+def _hash(texto, bytes_=8):
+    return int.from_bytes(hashlib.blake2b(texto.encode("utf-8"), digest_size=bytes_).digest(), "big")
+
+def _huella_filamento(id_filamento, precio_kg):
+    return _hash(json.dumps([id_filamento, precio_kg]))
+
+def _config_settings(parametros, settings):
+    """Texto canónico de todo lo que de `settings` afecta los precios."""
+    return json.dumps([parametros, [settings.get(c) for c in SETTINGS_TARIFA]], sort_keys=True)
+
+
+class Tarifario:
+    """
+    Tasas y precios por gramo listos para cotizar. No se construye
+    directamente: se arma con `compilar` y se actualiza con `con_settings`,
+    `con_filamento` y `sin_filamento`.
+    """
+
+    def __init__(self, parametros, tarifa, config, precios, huella, tasas=None):
+        self.parametros = MappingProxyType(parametros)
+        self.tasas = MappingProxyType(tasas or motor.tasas(parametros))
+        self.tarifa = tarifa
+        self._config = config  # `_config_settings` con que se armó
+        self._precios = precios  # id -> (precio por kg, precio por gramo); no se modifica después de armarlo
+        self._huella = huella
+        self.version = f"{_hash(config):016x}.{huella:016x}"
+
+    def __len__(self):
+        return len(self._precios)
+
+    # --- Actualizaciones ---
+
+    def con_settings(self, settings):
+        """El tarifario con los parámetros de `settings`; el mismo si no cambió nada que afecte precios."""
+        parametros = motor.parametros_desde_settings(settings)
+        config = _config_settings(parametros, settings)
+        if config == self._config:
+            return self
+        return Tarifario(parametros, tarifas_luz.tarifa_desde_settings(settings), config, self._precios, self._huella)
+
+    def con_filamento(self, id_filamento, precio_kg):
+        """El tarifario con el filamento agregado o con su precio actualizado."""
+        precio_kg = float(precio_kg)
+        huella = self._huella ^ _huella_filamento(id_filamento, precio_kg)
+        if id_filamento in self._precios:
+            huella ^= _huella_filamento(id_filamento, self._precios[id_filamento][0])
+        precios = dict(self._precios)
+        precios[id_filamento] = (precio_kg, motor.precio_gramo(precio_kg))
+        return self._con_precios(precios, huella)
+
+    def sin_filamento(self, id_filamento):
+        if id_filamento not in self._precios:
+            return self
+        precios = dict(self._precios)
+        precio_kg, _ = precios.pop(id_filamento)
+        return self._con_precios(precios, self._huella ^ _huella_filamento(id_filamento, precio_kg))
+
+    def _con_precios(self, precios, huella):
+        return Tarifario(dict(self.parametros), self.tarifa, self._config, precios, huella, self.tasas)
+
+    # --- Cotización ---
+
+    def precio_kg(self, id_filamento, default=None):
+        """Precio por kg con que se compiló el filamento, o `default` si no está en el tarifario."""
+        precios = self._precios.get(id_filamento)
+        return default if precios is None else precios[0]
+
+    def precio_gramo(self, id_filamento):
+        if id_filamento not in self._precios:
+            raise ValueError(motor.ERROR_FILAMENTO)
+        return self._precios[id_filamento][1]
+
+    def cotizar(self, gramos, horas, filamento_id=None, precio_kg=None, inicio=None, ajustes=None):
+        """
+        Cotiza una pieza con el filamento `filamento_id` (o un `precio_kg`
+        suelto). `inicio` es para la tarifa de luz por franja (vacío es ahora).
+        `ajustes` pisa parámetros sólo para esta cotización; su versión lleva
+        el sufijo "+ajustes". Lanza ValueError como `motor.cotizar` y devuelve
+        sus mismos componentes más `version_tarifario`.
+        """
+        if horas <= 0: raise ValueError(motor.ERROR_TIEMPO)
+        if gramos <= 0: raise ValueError(motor.ERROR_GRAMOS)
+        precio_gramo = self.precio_gramo(filamento_id) if precio_kg is None else motor.precio_gramo(precio_kg)
+        tasas, version = self.tasas, self.version
+        if ajustes:
+            tasas, version = motor.tasas({**self.parametros, **ajustes}), version + SUFIJO_AJUSTES
+        luz = None
+        if self.tarifa is not None:
+            luz = self.tarifa.costo(tarifas_luz.horas_desde_inicio(inicio), horas, tasas["consumo_w"])
+        resultado = motor.componentes(gramos, horas, precio_gramo, tasas, luz=luz)
+        resultado["version_tarifario"] = version
+        return resultado
+
+
+@perfilado.medir()
+def compilar(settings, catalogo):
+    """Compila el tarifario de `data["settings"]` y un catálogo de `catalogo.abrir_catalogo`."""
+    parametros = motor.parametros_desde_settings(settings)
+    precios, huella = {}, 0
+    for id_filamento, precio_kg in catalogo.precios():
+        precios[id_filamento] = (precio_kg, motor.precio_gramo(precio_kg))
+        huella ^= _huella_filamento(id_filamento, precio_kg)
+    return Tarifario(parametros, tarifas_luz.tarifa_desde_settings(settings), _config_settings(parametros, settings), precios, huella)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Muestra la versión y las tasas del tarifario actual.")
+    parser.parse_args(argv)
+
+    from nucleo import abrir_catalogo, load_data
+    data = load_data()
+    catalogo = abrir_catalogo(data)
+    try:
+        tarifario = compilar(data["settings"], catalogo)
+    finally:
+        catalogo.cerrar()
+    print(f"Versión del tarifario: {tarifario.version}")
+    print(f"Filamentos: {len(tarifario)}")
+    for clave in ("luz_por_hora", "desgaste_por_hora", "factor_error", "factor_iva_luz"):
+        print(f"{clave}: {tarifario.tasas[clave]:.6g}")
+    if tarifario.tarifa is not None:
+        print("Luz con tarifa por franja horaria.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+"""
+Tarifas de luz por franja horaria.
+
+La tarifa se describe en `settings["tarifa_luz"]` con franjas para días
+hábiles y para fin de semana; cada franja rige desde su hora hasta la de la
+siguiente (la última sigue hasta la primera del día siguiente):
+
+    "tarifa_luz": {
+        "habiles": [{"desde": "00:00", "precio_kwh": "150"}, {"desde": "07:00", "precio_kwh": "220"},
+                    {"desde": "23:00", "precio_kwh": "150"}],
+        "fin_de_semana": [{"desde": "00:00", "precio_kwh": "150"}]
+    }
+
+Opcionalmente `settings["fases_consumo"]` indica las fases del comienzo de la
+impresión con otro consumo, por ejemplo el calentamiento de cama y hotend:
+
+    "fases_consumo": [{"horas": "0.15", "consumo_w": "350"}]
+
+Al armar la tarifa se precalcula el costo acumulado de un kW desde el lunes a
+las 00:00 en cada cambio de franja. Como el precio es constante dentro de
+cada franja, ese acumulado es lineal entre cambios y el costo exacto de
+cualquier ventana de impresión sale de restar dos valores interpolados: no
+depende de cuántas horas, días o semanas dure la impresión.
+"""
+import bisect
+from datetime import datetime, timedelta
+
+import motor
+
+# --- CONSTANTES ---
+HORAS_SEMANA = 7 * 24
+REFERENCIA = datetime(2024, 1, 1)  # un lunes a las 00:00; los instantes se miden en horas desde acá
+FORMATO_INICIO = "%Y-%m-%d %H:%M"
+ERROR_INICIO = "La fecha de inicio debe tener el formato AAAA-MM-DD HH:MM."
+
+
+def horas_desde_inicio(inicio):
+    """
+    Pasa un datetime (o texto AAAA-MM-DD HH:MM; vacío es ahora) a horas desde
+    REFERENCIA. Un inicio con zona horaria (2026-01-01T10:00+02:00) se pasa a
+    la hora local, que es la de las franjas.
+    """
+    if not isinstance(inicio, datetime):
+        texto = "" if inicio is None else str(inicio).strip()
+        try:
+            inicio = datetime.fromisoformat(texto) if texto else datetime.now()
+        except ValueError:
+            raise ValueError(ERROR_INICIO)
+    if inicio.tzinfo is not None:
+        inicio = inicio.astimezone().replace(tzinfo=None)
+    return (inicio - REFERENCIA) / timedelta(hours=1)
+
+def _hora_del_dia(texto):
+    horas, _, minutos = str(texto).strip().partition(":")
+    valor = int(horas) + int(minutos or 0) / 60
+    if not 0 <= valor <= 24:
+        raise ValueError(f"Hora de franja fuera de rango: {texto}")
+    return valor
+
+def _franjas_del_dia(franjas):
+    """[(hora, precio), ...] de un tipo de día, ordenadas por hora."""
+    if not franjas:
+        raise ValueError("La tarifa de luz necesita al menos una franja por tipo de día.")
+    return sorted((_hora_del_dia(f["desde"]), motor.parse_float(f["precio_kwh"])) for f in franjas)
+
+
+class TarifaLuz:
+    """
+    Precio de la luz a lo largo de la semana. `costo(inicio, horas, consumo_w)`
+    es el costo de la energía (sin IVA) de una impresión que arranca `inicio`
+    horas después de REFERENCIA; `costo_lote` hace lo mismo con columnas.
+    """
+
+    def __init__(self, franjas_semana, fases=()):
+        """`franjas_semana`: [(hora de la semana, precio_kwh), ...] con la primera en 0."""
+        self.inicios = [h for h, _ in franjas_semana] + [HORAS_SEMANA]
+        self.precios = [p for _, p in franjas_semana]
+        self.acumulado = [0.0]
+        for i, precio in enumerate(self.precios):
+            self.acumulado.append(self.acumulado[-1] + precio * (self.inicios[i + 1] - self.inicios[i]))
+        self.total_semana = self.acumulado[-1]
+        self.fases = tuple(fases)  # ((horas, consumo_w), ...)
+
+    @classmethod
+    def fija(cls, precio_kwh, fases=()):
+        return cls([(0.0, precio_kwh)], fases)
+
+    @classmethod
+    def desde_config(cls, habiles, fin_de_semana=None, fases=()):
+        dias = [_franjas_del_dia(habiles if dia < 5 or not fin_de_semana else fin_de_semana) for dia in range(7)]
+        franjas = []
+        for dia, pares in enumerate(dias):
+            if pares[0][0] > 0:  # hasta la primera franja sigue la última del día anterior (el lunes, la del domingo)
+                franjas.append((dia * 24, dias[dia - 1][-1][1]))
+            franjas.extend((dia * 24 + hora, precio) for hora, precio in pares if hora < 24)
+        return cls(franjas, fases)
+
+    def _acumulado(self, t):
+        semanas, resto = divmod(t, HORAS_SEMANA)
+        i = bisect.bisect_right(self.inicios, resto) - 1
+        return semanas * self.total_semana + self.acumulado[i] + self.precios[i] * (resto - self.inicios[i])
+
+    def _acumulado_lote(self, t):
+        import numpy as np
+
+        semanas, resto = np.divmod(t, HORAS_SEMANA)
+        return semanas * self.total_semana + np.interp(resto, self.inicios, self.acumulado)
+
+    def _tramos(self, horas, consumo_w, minimo):
+        """(desde, hasta, consumo_w) de cada fase, relativos al inicio y recortados a la duración."""
+        desde = 0
+        for duracion, consumo_fase in self.fases:
+            hasta = minimo(desde + duracion, horas)
+            yield desde, hasta, consumo_fase
+            desde = hasta
+        yield desde, horas, consumo_w
+
+    def costo(self, inicio, horas, consumo_w):
+        return sum(
+            (consumo / 1000) * (self._acumulado(inicio + hasta) - self._acumulado(inicio + desde))
+            for desde, hasta, consumo in self._tramos(horas, consumo_w, min))
+
+    def costo_lote(self, inicio, horas, consumo_w):
+        import numpy as np
+
+        inicio = np.asarray(inicio, dtype=np.float64)
+        horas = np.asarray(horas, dtype=np.float64)
+        total = 0
+        for desde, hasta, consumo in self._tramos(horas, np.asarray(consumo_w, dtype=np.float64), np.minimum):
+            total = total + (consumo / 1000) * (self._acumulado_lote(inicio + hasta) - self._acumulado_lote(inicio + desde))
+        return total
+
+
+def tarifa_desde_settings(settings):
+    """
+    La tarifa configurada en `settings`, o None si no hay franjas ni fases:
+    en ese caso la luz se sigue cotizando con `precio_kwh` fijo.
+    """
+    tarifa = settings.get("tarifa_luz") or {}
+    fases = tuple((motor.parse_float(f["horas"]), motor.parse_float(f["consumo_w"])) for f in settings.get("fases_consumo") or ())
+    if tarifa.get("habiles"):
+        return TarifaLuz.desde_config(tarifa["habiles"], tarifa.get("fin_de_semana"), fases)
+    if fases:
+        return TarifaLuz.fija(motor.parse_float(settings.get("precio_kwh")), fases)
+    return None
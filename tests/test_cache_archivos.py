@@ -0,0 +1,118 @@
+"""
+Caché de métricas de archivos de impresión.
+
+    python -m pytest tests/test_cache_archivos.py
+"""
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+import cache_archivos
+
+
+class CacheArchivosTest(unittest.TestCase):
+    def setUp(self):
+        carpeta = tempfile.TemporaryDirectory()
+        self.addCleanup(carpeta.cleanup)
+        self.carpeta = Path(carpeta.name)
+        self.ruta_cache = self.carpeta / cache_archivos.NOMBRE_ARCHIVO
+
+    def archivo(self, nombre, contenido):
+        ruta = self.carpeta / nombre
+        ruta.write_bytes(contenido)
+        return ruta
+
+    def test_acierto_por_contenido(self):
+        cache = cache_archivos.CacheArchivos(self.ruta_cache)
+        llamadas = []
+        analizar = lambda: llamadas.append(1) or {"gramos": 12.5}
+        original = self.archivo("a.gcode", b"G1 X1 E1\n")
+        copia = self.archivo("b.gcode", b"G1 X1 E1\n")
+        self.assertEqual(cache.analizar(original, {"densidad": 1.24}, analizar), {"gramos": 12.5})
+        self.assertEqual(cache.analizar(copia, {"densidad": 1.24}, analizar), {"gramos": 12.5})
+        self.assertEqual(len(llamadas), 1)
+        self.assertIsNone(cache.obtener(original, {"densidad": 1.27}))
+        cache.persistir()
+        otra = cache_archivos.CacheArchivos(self.ruta_cache)
+        self.assertEqual(otra.obtener(original, {"densidad": 1.24}), {"gramos": 12.5})
+
+    def test_los_aciertos_no_reescriben_el_archivo(self):
+        cache = cache_archivos.CacheArchivos(self.ruta_cache)
+        ruta = self.archivo("a.gcode", b"G1 X1 E1\n")
+        cache.guardar(ruta, {}, {"gramos": 1})
+        cache.persistir()
+        with mock.patch.object(cache_archivos.persistencia, "escribir_json_atomico") as escribir:
+            for _ in range(3):
+                self.assertEqual(cache.obtener(ruta, {}), {"gramos": 1})
+            cache.persistir()
+        escribir.assert_not_called()
+
+    def test_archivo_modificado(self):
+        cache = cache_archivos.CacheArchivos(self.ruta_cache)
+        ruta = self.archivo("a.gcode", b"G1 X1 E1\n")
+        cache.guardar(ruta, {}, {"gramos": 1})
+        ruta.write_bytes(b"G1 X1 E2 ; otro\n")
+        self.assertIsNone(cache.obtener(ruta, {}, calcular_hash=True))
+
+    def test_descarta_las_menos_usadas(self):
+        cache = cache_archivos.CacheArchivos(self.ruta_cache, max_bytes=400)
+        rutas = [self.archivo(f"{i}.gcode", b"%d" % i) for i in range(10)]
+        for ruta in rutas:
+            cache.guardar(ruta, {}, {"gramos": 1.0})
+            cache.obtener(rutas[0], {})
+        self.assertIsNotNone(cache.obtener(rutas[0], {}))
+        self.assertIsNotNone(cache.obtener(rutas[-1], {}))
+        self.assertIsNone(cache.obtener(rutas[1], {}, calcular_hash=True))
+
+    def test_guardar_conserva_los_hashes_sin_metricas(self):
+        cache = cache_archivos.CacheArchivos(self.ruta_cache, max_bytes=400)
+        rutas = [self.archivo(f"{i}.gcode", b"%d" % i) for i in range(10)]
+        for ruta in rutas:
+            cache.recordar_hash(ruta, *cache_archivos.firma_y_hash(ruta))
+        with mock.patch.object(cache_archivos, "hash_contenido") as hashear:
+            for ruta in rutas:
+                cache.guardar(ruta, {}, {"gramos": 1.0})
+        hashear.assert_not_called()
+        self.assertEqual(cache._total, sum(cache._tamanos.values()))
+        self.assertLessEqual(cache._total, 400)
+        self.assertIsNone(cache.obtener(rutas[0], {}))  # descartada: su ruta también
+        self.assertIsNotNone(cache.obtener(rutas[-1], {}))
+
+    def test_escrituras_simultaneas(self):
+        caches = [cache_archivos.CacheArchivos(self.ruta_cache) for _ in range(2)]
+        rutas = [self.archivo(f"{i}.gcode", b"%d" % i) for i in range(40)]
+        errores = []
+
+        def escribir(cache, desde):
+            try:
+                for ruta in rutas[desde::4]:
+                    cache.guardar(ruta, {}, {"gramos": float(ruta.stem)})
+                    cache.persistir()
+            except Exception as e:
+                errores.append(e)
+        hilos = [threading.Thread(target=escribir, args=(caches[i % 2], i)) for i in range(4)]
+        salida = io.StringIO()  # `persistir` informa los errores de escritura por pantalla
+        with contextlib.redirect_stdout(salida):
+            for hilo in hilos:
+                hilo.start()
+            for hilo in hilos:
+                hilo.join()
+        self.assertEqual(errores, [])
+        self.assertEqual(salida.getvalue(), "")
+        with open(self.ruta_cache, encoding="utf-8") as f:
+            self.assertIn("entradas", json.load(f))
+        self.assertEqual([n for n in os.listdir(self.carpeta) if n.endswith(".tmp")], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
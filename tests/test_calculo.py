@@ -0,0 +1,210 @@
+"""
+Valores dorados de la cotización.
+
+Fijan lo que hoy devuelve el cálculo de la ventana principal (`App.calculate`)
+para un conjunto de piezas y configuraciones: cualquier cambio en la fórmula,
+el tarifario, el recálculo en vivo o la tarifa de luz que mueva un precio hace
+fallar estas pruebas. Si el cambio es a propósito, se regeneran los valores y
+se revisa la diferencia en `golden_calculo.json`:
+
+    python -m pytest tests
+    python tests/test_calculo.py --regenerar
+"""
+import json
+import math
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+import catalogo
+import motor
+import nucleo
+import reactivo
+import tarifario
+import tarifas_luz
+from test_gui import hay_pantalla
+
+ARCHIVO_DORADO = Path(__file__).with_name("golden_calculo.json")
+FILAMENTO = {"id": "grilon_pla_00000001", "brand": "Grilon", "type": "PLA"}
+TOLERANCIA = 1e-9
+
+# Piezas y configuraciones de referencia: lo que se cargaría en la ventana.
+CASOS = [
+    {"nombre": "configuracion_por_defecto", "settings": {}, "gramos": "85.5", "tiempo": ["0", "4", "30", "0"], "precio_kg": "18500"},
+    {"nombre": "sin_desgaste_con_envio", "settings": {"desgaste_horas": "0", "margen_error_pct": "0", "costo_envio": "2500"},
+     "gramos": "120", "tiempo": ["0", "6", "0", "0"], "precio_kg": "21000"},
+    {"nombre": "pieza_chica", "settings": {"margen_ganancia_x": "3"}, "gramos": "0.8", "tiempo": ["0", "0", "6", "0"], "precio_kg": "45000"},
+    {"nombre": "trabajo_largo", "settings": {"consumo_w": "350", "precio_repuestos": "1200000"},
+     "gramos": "5000", "tiempo": ["5", "0", "0", "0"], "precio_kg": "22000"},
+    {"nombre": "coma_decimal", "settings": {"precio_kwh": "199,5", "margen_error_pct": "12,5"},
+     "gramos": "33,3", "tiempo": ["0", "1", "15", "30"], "precio_kg": "19999,99"},
+    {"nombre": "tarifa_por_franja", "settings": {
+        "tarifa_luz": {"habiles": [{"desde": "00:00", "precio_kwh": "150"}, {"desde": "07:00", "precio_kwh": "220"},
+                                   {"desde": "23:00", "precio_kwh": "150"}],
+                       "fin_de_semana": [{"desde": "00:00", "precio_kwh": "120"}]},
+        "fases_consumo": [{"horas": "0.15", "consumo_w": "350"}]},
+     "gramos": "240", "tiempo": ["0", "9", "0", "0"], "precio_kg": "18500", "inicio": "2026-03-06 20:00"},
+]
+
+
+def settings_del_caso(caso):
+    return dict(nucleo.get_default_data()["settings"], **caso["settings"])
+
+def entradas_del_caso(caso):
+    """(gramos, horas, precio_kg, parametros, luz) como los lee la ventana."""
+    settings = settings_del_caso(caso)
+    horas = motor.horas_desde_tiempo(*(motor.parse_float(t) for t in caso["tiempo"]))
+    parametros = motor.parametros_desde_settings(settings)
+    tarifa = tarifas_luz.tarifa_desde_settings(settings)
+    luz = tarifa.costo(tarifas_luz.horas_desde_inicio(caso["inicio"]), horas, parametros["consumo_w"]) if tarifa else None
+    return motor.parse_float(caso["gramos"]), horas, motor.parse_float(caso["precio_kg"]), parametros, luz
+
+def tarifario_del_caso(caso):
+    filamento = dict(FILAMENTO, price_kg=caso["precio_kg"].replace(",", "."))
+    return tarifario.compilar(settings_del_caso(caso), catalogo.CatalogoMemoria([filamento]))
+
+def calcular_caso(caso):
+    gramos, horas, _, _, _ = entradas_del_caso(caso)
+    return tarifario_del_caso(caso).cotizar(gramos, horas, FILAMENTO["id"], inicio=caso.get("inicio"))
+
+def cargar_dorados():
+    with open(ARCHIVO_DORADO, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def regenerar():
+    dorados = {}
+    for caso in CASOS:
+        resultado = calcular_caso(caso)
+        dorados[caso["nombre"]] = {
+            "componentes": {c: resultado[c] for c in motor.COMPONENTES},
+            "version_tarifario": resultado["version_tarifario"],
+        }
+    with open(ARCHIVO_DORADO, "w", encoding="utf-8", newline="\n") as f:
+        json.dump(dorados, f, indent=4)
+        f.write("\n")
+
+
+class CasoDorado(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.dorados = cargar_dorados()
+
+    def assertComponentes(self, obtenidos, esperados, caso):
+        for clave in motor.COMPONENTES:
+            with self.subTest(caso=caso, componente=clave):
+                self.assertTrue(math.isclose(float(obtenidos[clave]), esperados[clave], rel_tol=TOLERANCIA, abs_tol=TOLERANCIA),
+                                f"{obtenidos[clave]!r} != {esperados[clave]!r}")
+
+
+class FormulaTest(CasoDorado):
+    def test_todos_los_casos_tienen_valor_dorado(self):
+        self.assertEqual(sorted(self.dorados), sorted(c["nombre"] for c in CASOS))
+
+    def test_motor_cotizar(self):
+        for caso in CASOS:
+            gramos, horas, precio_kg, parametros, luz = entradas_del_caso(caso)
+            self.assertComponentes(motor.cotizar(gramos, horas, precio_kg, parametros, luz), self.dorados[caso["nombre"]]["componentes"], caso["nombre"])
+
+    def test_tarifario(self):
+        for caso in CASOS:
+            resultado = calcular_caso(caso)
+            esperado = self.dorados[caso["nombre"]]
+            self.assertComponentes(resultado, esperado["componentes"], caso["nombre"])
+            self.assertEqual(resultado["version_tarifario"], esperado["version_tarifario"])
+
+    def test_tarifario_incremental_igual_al_compilado(self):
+        caso = CASOS[0]
+        vacio = tarifario.compilar(settings_del_caso(caso), catalogo.CatalogoMemoria([]))
+        incremental = vacio.con_filamento("otro", 1000).con_filamento(FILAMENTO["id"], caso["precio_kg"]).sin_filamento("otro")
+        self.assertEqual(incremental.version, self.dorados[caso["nombre"]]["version_tarifario"])
+
+    def test_recalculo_en_vivo(self):
+        for caso in CASOS:
+            settings = settings_del_caso(caso)
+            tarifa = tarifas_luz.tarifa_desde_settings(settings)
+
+            def energia(inicio, horas, consumo_w, precio_kwh):
+                return tarifa.costo(tarifas_luz.horas_desde_inicio(inicio), horas, consumo_w) if tarifa and horas > 0 else None
+
+            grafo = reactivo.grafo_cotizacion(lambda nombre: motor.parse_float(caso["precio_kg"]), motor.parse_float(settings["iva_luz_pct"]), energia)
+            for campo in reactivo.CAMPOS_PARAMETROS:
+                grafo.fijar(f"texto_{campo}", str(settings.get(campo, "")))
+            for campo, texto in zip(reactivo.CAMPOS_TIEMPO, caso["tiempo"]):
+                grafo.fijar(f"texto_{campo}", texto)
+            grafo.fijar("texto_gramos", caso["gramos"])
+            grafo.fijar("texto_filamento", "Grilon (PLA)")
+            grafo.fijar("texto_inicio", caso.get("inicio", ""))
+            grafo.calcular()
+            self.assertComponentes(grafo.valores, self.dorados[caso["nombre"]]["componentes"], caso["nombre"])
+
+    def test_cotizar_lote(self):
+        try:
+            import numpy  # noqa: F401
+        except ImportError:
+            self.skipTest("falta NumPy")
+        entradas = [entradas_del_caso(c) for c in CASOS]
+        columnas = {clave: [e[3][clave] for e in entradas] for clave in motor.PARAMETROS}
+        luz = [e[4] if e[4] is not None else (e[3]["consumo_w"] / 1000) * e[1] * e[3]["precio_kwh"] for e in entradas]
+        resultado = motor.cotizar_lote([e[0] for e in entradas], [e[1] for e in entradas], [e[2] for e in entradas], columnas, luz)
+        for i, caso in enumerate(CASOS):
+            self.assertComponentes({c: resultado[c][i] for c in motor.COMPONENTES}, self.dorados[caso["nombre"]]["componentes"], caso["nombre"])
+
+
+class VentanaTest(CasoDorado):
+    """`App.calculate` de punta a punta: lo que queda en el historial y en pantalla."""
+
+    def setUp(self):
+        try:
+            import gui
+        except ImportError as e:
+            self.skipTest(f"falta {e.name}")
+        if not hay_pantalla():
+            self.skipTest("no hay pantalla")
+        carpeta = tempfile.TemporaryDirectory()
+        self.addCleanup(carpeta.cleanup)
+        self.config = Path(carpeta.name) / "config_impresion3d.json"
+        self.gui = gui
+
+    def abrir(self, caso):
+        data = nucleo.get_default_data()
+        data["settings"].update(settings_del_caso(caso))
+        data["filaments"] = [dict(FILAMENTO, price_kg=caso["precio_kg"].replace(",", "."))]
+        with mock.patch.object(nucleo, "CONFIG_FILE", self.config):
+            nucleo.save_data(data)
+        with mock.patch.object(nucleo, "CONFIG_FILE", self.config), mock.patch.object(self.gui, "CONFIG_FILE", self.config):
+            app = self.gui.App()
+        app.withdraw()
+        return app
+
+    def test_calculate(self):
+        for caso in CASOS:
+            app = self.abrir(caso)
+            try:
+                for entry, texto in zip((app.entry_dias, app.entry_horas, app.entry_minutos, app.entry_segundos), caso["tiempo"]):
+                    app.set_entry_text(entry, texto)
+                app.set_entry_text(app.entry_gramos, caso["gramos"])
+                app.set_entry_text(app.entry_inicio, caso.get("inicio", ""))
+                app.combo_filamento.set("Grilon (PLA)")
+                app.schedule_recalculation("filamento")
+                app.calculate()
+                app.history.flush()
+                guardada = app.history.pagina(0, 1)[0]
+            finally:
+                with mock.patch.object(nucleo, "CONFIG_FILE", self.config):
+                    app.on_closing()
+            esperado = self.dorados[caso["nombre"]]
+            self.assertComponentes(guardada, esperado["componentes"], caso["nombre"])
+            self.assertEqual(guardada["version_tarifario"], esperado["version_tarifario"])
+
+
+if __name__ == "__main__":
+    if "--regenerar" in sys.argv:
+        regenerar()
+        print(f"Valores dorados escritos en {ARCHIVO_DORADO}")
+    else:
+        unittest.main()
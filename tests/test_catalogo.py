@@ -0,0 +1,110 @@
+"""
+Catálogo de filamentos: índices en memoria y base SQLite.
+
+    python -m pytest tests/test_catalogo.py
+"""
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+import catalogo
+
+
+def filamentos(cantidad):
+    return [{"id": f"f{i}", "brand": f"Marca{i}", "type": "PLA", "price_kg": 1000 + i} for i in range(cantidad)]
+
+
+class CatalogoMemoriaTest(unittest.TestCase):
+    def test_eliminar_mantiene_los_indices(self):
+        lista = filamentos(5)
+        cat = catalogo.CatalogoMemoria(lista)
+        cat.eliminar("f1")
+        cat.eliminar("f4")
+        cat.agregar({"id": "f9", "brand": "Nueva", "type": "PETG", "price_kg": 5})
+        cat.eliminar("f0")
+        self.assertEqual(sorted(f["id"] for f in lista), ["f2", "f3", "f9"])
+        self.assertEqual(len(cat), 3)
+        self.assertIsNone(cat.obtener("f0"))
+        self.assertEqual(cat.buscar("marca"), ["Marca2 (PLA)", "Marca3 (PLA)"])
+        for id_filamento in ("f2", "f3", "f9"):
+            cat.eliminar(id_filamento)
+        self.assertEqual(lista, [])
+
+    def test_nombres_repetidos(self):
+        cat = catalogo.CatalogoMemoria([{"id": "a_00000001", "brand": "X", "type": "PLA", "price_kg": 1},
+                                        {"id": "b_00000002", "brand": "X", "type": "PLA", "price_kg": 2}])
+        self.assertEqual(cat.por_nombre("X (PLA)")["id"], "a_00000001")
+        self.assertEqual(cat.por_nombre("X (PLA) [00000002]")["id"], "b_00000002")
+
+
+class PaginasTest(unittest.TestCase):
+    """Las dos implementaciones devuelven las mismas páginas."""
+
+    def catalogos(self):
+        lista = filamentos(30) + [{"id": "g1", "brand": "Grilon", "type": "PETG", "price_kg": 1}]
+        carpeta = tempfile.TemporaryDirectory()
+        self.addCleanup(carpeta.cleanup)
+        sqlite = catalogo.CatalogoSQLite(str(Path(carpeta.name) / "catalogo.db"))
+        self.addCleanup(sqlite.cerrar)
+        sqlite.importar([dict(f) for f in lista])
+        return catalogo.CatalogoMemoria([dict(f) for f in lista]), sqlite
+
+    def test_paginas(self):
+        for cat in self.catalogos():
+            with self.subTest(catalogo=type(cat).__name__):
+                self.assertEqual(cat.contar(), 31)
+                self.assertEqual([f["id"] for f in cat.pagina(10, 3)], ["f10", "f11", "f12"])
+                self.assertEqual(cat.contar("marca1"), 11)
+                self.assertEqual([f["id"] for f in cat.pagina(1, 2, "marca1")], ["f10", "f11"])
+                self.assertEqual([f["id"] for f in cat.pagina(0, 5, "GRI")], ["g1"])
+                self.assertEqual(cat.pagina(40, 5), [])
+
+
+class CatalogoSQLiteTest(unittest.TestCase):
+    def setUp(self):
+        carpeta = tempfile.TemporaryDirectory()
+        self.addCleanup(carpeta.cleanup)
+        self.data = {"settings": {"catalogo_db": str(Path(carpeta.name) / "catalogo.db")}, "filaments": filamentos(3)}
+
+    def test_la_base_reemplaza_la_lista_del_json(self):
+        cat = catalogo.abrir_catalogo(self.data)
+        self.assertEqual(self.data["filaments"], [])
+        self.assertEqual(len(cat), 3)
+        for f in list(cat):
+            cat.eliminar(f["id"])
+        cat.cerrar()
+        self.data["filaments"] = filamentos(3)  # un JSON viejo no vuelve a importarse
+        cat = catalogo.abrir_catalogo(self.data)
+        self.addCleanup(cat.cerrar)
+        self.assertEqual(len(cat), 0)
+
+    def test_varios_hilos(self):
+        cat = catalogo.abrir_catalogo(self.data)
+        self.addCleanup(cat.cerrar)
+        errores = []
+
+        def trabajar(n):
+            try:
+                for i in range(50):
+                    f = cat.agregar({"brand": f"H{n}", "type": f"T{i}", "price_kg": i})
+                    cat.actualizar(f["id"], {"price_kg": i + 1})
+                    cat.buscar(f"h{n}")
+                    cat.eliminar(f["id"])
+            except Exception as e:
+                errores.append(e)
+        hilos = [threading.Thread(target=trabajar, args=(n,)) for n in range(4)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        self.assertEqual(errores, [])
+        self.assertEqual(len(cat), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+"""
+Lectura de G-code: cabeceras de los slicers y el recorrido de movimientos,
+que con NumPy tiene que dar lo mismo que línea por línea.
+
+    python -m pytest tests/test_gcode.py
+"""
+import math
+import random
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+import gcode
+
+
+def gcode_al_azar(semilla, lineas=3000):
+    """G-code sintético con cambios de modo, comentarios y palabras mal formadas."""
+    azar = random.Random(semilla)
+    salida, z = [], 0.2
+    for _ in range(lineas):
+        k = azar.random()
+        if k < 0.02:
+            salida.append(azar.choice(["G90", "G91", "M82", "M83", "G92 E0", "G28", "G4 P200", "T1", "t0", "G2 X10 Y10 I5 J5 E0.3"]))
+        elif k < 0.04:
+            salida.append(azar.choice([";LAYER_CHANGE", ";LAYER:3", "; comentario", "M104 S200", ""]))
+        elif k < 0.06:
+            z += 0.2
+            salida.append(f"G1 Z{z:.2f} F600")
+        else:
+            palabras = [azar.choice(["G1", "G1", "G1", "G0", "g1", "G01"])]
+            for eje, (desde, hasta) in zip("XYEF", ((-5, 200), (-5, 200), (-0.5, 2), (0, 3000))):
+                if azar.random() < 0.6:
+                    palabras.append(f"{eje}{azar.uniform(desde, hasta):.4f}")
+            if azar.random() < 0.02:
+                palabras.append("X")
+            if azar.random() < 0.05:
+                palabras.append(";c X9")
+            salida.append(" ".join(palabras))
+    return ("\r\n" if semilla % 2 else "\n").join(salida).encode()
+
+def estado(e):
+    return (e.x, e.y, e.z, e.e, e.avance, e.xyz_absoluto, e.e_absoluto, e.herramienta,
+            e.segundos, e.capas_comentario, e.capas_z, *e.extruido)
+
+
+class CabeceraTest(unittest.TestCase):
+    def test_los_numeros_no_siguen_en_la_linea_siguiente(self):
+        datos = gcode.leer_cabecera(b"; filament used [g] = 12.5\n; 3 walls\n; filament used [mm] = 4000,\n; 2\n")
+        self.assertEqual(datos["gramos_por_extrusor"], [12.5])
+        self.assertEqual(datos["longitud_mm_por_extrusor"], [4000.0])
+
+    def test_varios_extrusores(self):
+        datos = gcode.leer_cabecera(b"; filament used [g] = 10.0, 2.5\n; total estimated time: 1h 30m 0s\n")
+        self.assertEqual(datos["gramos_por_extrusor"], [10.0, 2.5])
+        self.assertEqual(datos["segundos"], 5400)
+
+
+class MovimientosTest(unittest.TestCase):
+    def setUp(self):
+        try:
+            import numpy  # noqa: F401
+        except ImportError:
+            self.skipTest("falta NumPy")
+
+    def test_bloque_igual_que_linea_por_linea(self):
+        for minimo in (1, gcode.MIN_VECTORIZADO):
+            for semilla in range(20):
+                texto = gcode_al_azar(semilla)
+                lineas = gcode._EstadoMovimiento()
+                lineas.procesar(texto.split(b"\n"))
+                with mock.patch.object(gcode, "MIN_VECTORIZADO", minimo):
+                    bloque = gcode._EstadoMovimiento()
+                    bloque.procesar_bloque(texto)
+                for a, b in zip(estado(lineas), estado(bloque)):
+                    with self.subTest(minimo=minimo, semilla=semilla):
+                        self.assertTrue(math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-9), f"{a!r} != {b!r}")
+
+    def test_numeros_como_float(self):
+        import numpy as np
+        palabras = [b"1", b"-0", b"12.5", b"-.5", b"+3.", b"0.1", b"123456789012345", b"1234567890123456",
+                    b"00012.5", b"1e3", b"-2.5E-3", b"inf", b"3.14159265358979"]
+        texto = b" ".join(palabras)
+        inicio = np.cumsum([0] + [len(p) + 1 for p in palabras[:-1]])
+        numeros = gcode._numeros(np, np.frombuffer(texto, dtype=np.uint8), inicio, np.array([len(p) for p in palabras]))
+        self.assertEqual(numeros.tolist(), [float(p) for p in palabras])
+        self.assertTrue(math.copysign(1, numeros[1]) < 0)
+
+    def test_valor_invalido_lanza_error(self):
+        import numpy as np
+        with self.assertRaises(ValueError):
+            gcode._numeros(np, np.frombuffer(b"1.2.3", dtype=np.uint8), np.array([0]), np.array([5]))
+
+    def test_analizar_sin_cabecera(self):
+        with tempfile.TemporaryDirectory() as carpeta:
+            ruta = Path(carpeta) / "pieza.gcode"
+            ruta.write_bytes(b"G90\nM82\nG92 E0\n" + b"".join(b"G1 X%d Y0 E%d F6000\n" % (10 * i, i) for i in range(1, 101)))
+            datos = gcode.analizar_gcode(ruta, densidad=1.24)
+        self.assertEqual(datos["origen"], "movimientos")
+        self.assertAlmostEqual(datos["gramos"], gcode.gramos_desde_longitud(100, 1.24))
+        self.assertAlmostEqual(datos["horas"], 1000 / 6000 / 60)
+
+    def test_lineas_mas_largas_que_el_bloque(self):
+        texto = b"G90\nM82\n" + b"".join(b"G1 X%d.000000 Y0.000000 E%d.000000 F6000\n" % (10 * i, i) for i in range(1, 101))
+        with tempfile.TemporaryDirectory() as carpeta:
+            ruta = Path(carpeta) / "pieza.gcode"
+            ruta.write_bytes(texto)
+            entero = gcode.analizar_gcode(ruta)
+            for tamano in (7, 16, 64):
+                with self.subTest(tamano=tamano), mock.patch.object(gcode, "TAMANO_BLOQUE", tamano):
+                    datos = gcode.analizar_gcode(ruta)
+                    self.assertAlmostEqual(datos["gramos"], entero["gramos"])
+                    self.assertAlmostEqual(datos["horas"], entero["horas"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,156 @@
+"""
+Ventanas de customtkinter: que se puedan abrir y que sus botones lleguen a la
+lógica. Se omiten si falta customtkinter o no hay pantalla.
+
+    python -m pytest tests/test_gui.py
+"""
+import sys
+import tempfile
+import types
+import unittest
+from pathlib import Path
+from unittest import mock
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+import nucleo
+
+
+def hay_pantalla():
+    """True si Tk puede abrir una ventana acá."""
+    try:
+        import tkinter
+    except ImportError:
+        return False
+    try:
+        raiz = tkinter.Tk()
+    except tkinter.TclError:  # sin DISPLAY o sin servidor gráfico
+        return False
+    raiz.destroy()
+    return True
+
+
+class VentanaBase(unittest.TestCase):
+    """Abre la App con la configuración en una carpeta temporal."""
+
+    filamentos = []
+
+    def setUp(self):
+        try:
+            import gui
+        except ImportError as e:
+            self.skipTest(f"falta {e.name}")
+        if not hay_pantalla():
+            self.skipTest("no hay pantalla")
+        self.gui = gui
+        carpeta = tempfile.TemporaryDirectory()
+        self.addCleanup(carpeta.cleanup)
+        self.config = Path(carpeta.name) / "config_impresion3d.json"
+        data = nucleo.get_default_data()
+        data["filaments"] = [dict(f) for f in self.filamentos]
+        with mock.patch.object(nucleo, "CONFIG_FILE", self.config):
+            nucleo.save_data(data)
+        for modulo in (nucleo, gui):
+            parche = mock.patch.object(modulo, "CONFIG_FILE", self.config)
+            parche.start()
+            self.addCleanup(parche.stop)
+        self.app = gui.App()
+        self.app.withdraw()
+        self.addCleanup(self.app.on_closing)
+
+
+class EditorFilamentoTest(VentanaBase):
+    filamentos = [{"id": "grilon_pla_00000001", "brand": "Grilon", "type": "PLA", "price_kg": 18500.0}]
+
+    def abrir_editor(self, filamento=None):
+        manager = self.gui.FilamentManagerWindow(self.app, app_instance=self.app)
+        editor = self.gui.FilamentEditorWindow(manager, filament_data=filamento, on_close_callback=manager.handle_filament_save)
+        return manager, editor
+
+    def test_cotizador_expone_el_editor(self):
+        import cotizador
+        self.assertIs(cotizador.FilamentEditorWindow, self.gui.FilamentEditorWindow)
+
+    def test_agregar_filamento(self):
+        manager, editor = self.abrir_editor()
+        editor.entry_brand.insert(0, "Printalot")
+        editor.combobox_type.set("PETG")
+        editor.entry_price.insert(0, "21000,5")
+        editor.save_filament()
+        filamento = self.app.catalog.por_nombre("Printalot (PETG)")
+        self.assertIsNotNone(filamento)
+        self.assertEqual(float(filamento["price_kg"]), 21000.5)
+        self.assertAlmostEqual(self.app.rate_card.precio_gramo(filamento["id"]), 21.0005)
+        self.assertIn("Printalot (PETG)", self.app.combo_filamento.cget("values"))
+        manager.on_close()
+
+    def test_editar_filamento_actualiza_el_tarifario(self):
+        version = self.app.rate_card.version
+        manager, editor = self.abrir_editor(self.app.catalog.obtener("grilon_pla_00000001"))
+        self.assertEqual(editor.entry_brand.get(), "Grilon")
+        editor.entry_price.delete(0, "end")
+        editor.entry_price.insert(0, "20000")
+        editor.save_filament()
+        self.assertEqual(float(self.app.catalog.obtener("grilon_pla_00000001")["price_kg"]), 20000.0)
+        self.assertAlmostEqual(self.app.rate_card.precio_gramo("grilon_pla_00000001"), 20.0)
+        self.assertNotEqual(self.app.rate_card.version, version)
+        manager.on_close()
+
+
+class ListaVirtualTest(unittest.TestCase):
+    def setUp(self):
+        try:
+            import customtkinter as ctk
+            import lista_virtual
+        except ImportError as e:
+            self.skipTest(f"falta {e.name}")
+        if not hay_pantalla():
+            self.skipTest("no hay pantalla")
+        self.ctk = ctk
+        self.raiz = ctk.CTk()
+        self.raiz.withdraw()
+        self.addCleanup(self.raiz.destroy)
+        self.items = [{"id": i, "nombre": f"f{i}"} for i in range(1000)]
+        self.creadas = []
+        self.lista = lista_virtual.ListaVirtual(self.raiz, 40, self.crear_fila, self.llenar_fila,
+                                                lambda: len(self.items), lambda inicio, cantidad: self.items[inicio:inicio + cantidad])
+
+    def crear_fila(self, master):
+        fila = self.ctk.CTkLabel(master, text="")
+        self.creadas.append(fila)
+        return fila
+
+    def llenar_fila(self, fila, item):
+        fila.configure(text=item["nombre"])
+
+    def redimensionar(self, alto):
+        self.lista._al_redimensionar(types.SimpleNamespace(height=self.lista._apply_widget_scaling(alto)))
+
+    def textos(self):
+        return [fila.cget("text") for fila, item in zip(self.lista.filas, self.lista.mostrados) if item is not None]
+
+    def test_solo_crea_las_filas_visibles(self):
+        self.lista.refrescar()
+        self.redimensionar(200)
+        self.assertEqual(len(self.creadas), 5)
+        self.assertEqual(self.textos(), ["f0", "f1", "f2", "f3", "f4"])
+        self.lista.desplazar("moveto", "0.5")
+        self.assertEqual(self.textos()[0], "f500")
+        self.lista.desplazar("scroll", "1", "pages")
+        self.assertEqual(self.textos()[0], "f505")
+        self.lista.desplazar("moveto", "1")
+        self.assertEqual(self.textos()[-1], "f999")
+        self.redimensionar(200)
+        self.assertEqual(len(self.creadas), 5)
+
+    def test_refrescar_item(self):
+        self.lista.refrescar()
+        self.redimensionar(120)
+        self.items[1] = {"id": 1, "nombre": "cambiado"}
+        self.lista.refrescar_item(self.items[1])
+        self.assertEqual(self.textos(), ["f0", "cambiado", "f2"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+"""
+Historial de cotizaciones: escritura en segundo plano, páginas, resúmenes y exportación.
+
+    python -m pytest tests/test_historial.py
+"""
+import csv
+import io
+import sqlite3
+import sys
+import tempfile
+import threading
+import unittest
+from datetime import datetime, timedelta
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+import historial
+import motor
+
+PLA = {"id": "pla_1", "nombre": "Grilon (PLA)", "type": "PLA"}
+PETG = {"id": "petg_1", "nombre": "Printalot (PETG)", "type": "PETG"}
+
+
+def resultado(precio):
+    componentes = dict.fromkeys(motor.COMPONENTES, 1.0)
+    componentes.update(costo_total=precio / 2, precio_venta=precio, precio_final=precio)
+    return componentes
+
+
+class HistorialTest(unittest.TestCase):
+    def setUp(self):
+        carpeta = tempfile.TemporaryDirectory()
+        self.addCleanup(carpeta.cleanup)
+        self.historial = historial.Historial(Path(carpeta.name) / historial.NOMBRE_ARCHIVO)
+        self.addCleanup(self.historial.cerrar)
+        # Dos por día desde enero, con fechas repetidas para probar el desempate por id.
+        base = datetime(2026, 1, 1, 12)
+        for i in range(300):
+            filamento = PLA if i % 3 else PETG
+            self.historial.registrar(resultado(100 + i), 10, 1, 18500, {}, filamento, fecha=base + timedelta(days=i // 2))
+        self.assertTrue(self.historial.flush(timeout=10))
+
+    def paginas_por_offset(self, **filtros):
+        donde, parametros = historial._filtros(**filtros)
+        with sqlite3.connect(self.historial.ruta) as conexion:
+            return [fila[0] for fila in conexion.execute(f"SELECT id FROM cotizaciones{donde} ORDER BY fecha DESC, id DESC", parametros)]
+
+    def test_paginas_como_con_offset(self):
+        for filtros in ({}, {"tipo": "PLA"}, {"desde": "2026-02", "hasta": "2026-03"}):
+            esperado = self.paginas_por_offset(**filtros)
+            with self.subTest(filtros=filtros):
+                self.assertEqual(self.historial.contar(**filtros), len(esperado))
+                # Como la lista virtual: avanza de a una fila, a veces salta y a veces vuelve.
+                for inicio in list(range(0, 40)) + [150, 151, 90, 0, len(esperado) - 5, len(esperado) + 3]:
+                    obtenidos = [fila["id"] for fila in self.historial.pagina(inicio, 12, **filtros)]
+                    self.assertEqual(obtenidos, esperado[inicio:inicio + 12], f"inicio={inicio}")
+
+    def test_filas_nuevas_corren_las_paginas(self):
+        self.historial.pagina(0, 12)
+        self.historial.pagina(12, 12)
+        self.historial.registrar(resultado(1), 1, 1, 1, {}, PLA, fecha=datetime(2027, 1, 1))
+        self.historial.flush()
+        pagina = self.historial.pagina(12, 12)
+        self.assertEqual([f["id"] for f in pagina], self.paginas_por_offset()[12:24])
+
+    def test_resumen(self):
+        por_tipo = {fila["tipo"]: fila for fila in self.historial.resumen("tipo")}
+        self.assertEqual(por_tipo["PETG"]["cantidad"], 100)
+        self.assertEqual(por_tipo["PLA"]["cantidad"], 200)
+        self.assertAlmostEqual(por_tipo["PLA"]["margen_pct"], 50.0)
+        self.assertEqual([fila["mes"] for fila in self.historial.resumen("mes", hasta="2026-02")], ["2026-01", "2026-02"])
+        with self.assertRaises(ValueError):
+            self.historial.resumen("color")
+
+    def test_no_se_puede_modificar(self):
+        with sqlite3.connect(self.historial.ruta) as conexion:
+            with self.assertRaises(sqlite3.DatabaseError):
+                conexion.execute("DELETE FROM cotizaciones")
+
+    def test_exportar_en_otro_hilo(self):
+        salida, progreso, errores = io.StringIO(), [], []
+
+        def exportar():
+            try:
+                self.historial.exportar_csv(salida, progreso.append, tipo="PLA")
+            except Exception as e:
+                errores.append(e)
+        hilo = threading.Thread(target=exportar)
+        hilo.start()
+        while hilo.is_alive():  # mientras tanto la ventana sigue consultando
+            self.historial.pagina(0, 12)
+            self.historial.contar()
+        hilo.join()
+        self.assertEqual(errores, [])
+        filas = list(csv.DictReader(io.StringIO(salida.getvalue())))
+        self.assertEqual(len(filas), 200)
+        self.assertEqual(filas[0]["fecha"], "2026-01-01 12:00:00")
+        self.assertEqual(progreso[-1], 1.0)
+
+    def test_cerrado(self):
+        self.historial.cerrar()
+        with self.assertRaises(RuntimeError):
+            self.historial.registrar(resultado(1), 1, 1, 1, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+"""
+Cotización de carpetas: caché, hash en el pool y archivos que desaparecen.
+
+    python -m pytest tests/test_lote_carpeta.py
+"""
+import csv
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+import cache_archivos
+import catalogo
+import lote_carpeta
+import nucleo
+import tarifario
+
+FILAMENTO = {"id": "grilon_pla_00000001", "brand": "Grilon", "type": "PLA", "price_kg": 18500.0}
+
+
+class PoolEnLinea:
+    """Hace de pool de procesos en el mismo hilo y anota qué se le pidió."""
+
+    def __init__(self):
+        self.llamadas = []
+
+    def map(self, funcion, tareas):
+        tareas = list(tareas)
+        self.llamadas.append((funcion.__name__, len(tareas)))
+        return [funcion(t) for t in tareas]
+
+
+def gcode_con_cabecera(gramos, horas):
+    return f"; filament used [g] = {gramos}\n; total estimated time: {horas}h 0m 0s\nG1 X1 E1\n".encode()
+
+
+class CotizadorCarpetaTest(unittest.TestCase):
+    def setUp(self):
+        try:
+            import numpy  # noqa: F401
+        except ImportError:
+            self.skipTest("falta NumPy")
+        carpeta = tempfile.TemporaryDirectory()
+        self.addCleanup(carpeta.cleanup)
+        self.carpeta = Path(carpeta.name) / "pedido"
+        self.carpeta.mkdir()
+        (self.carpeta / "a.gcode").write_bytes(gcode_con_cabecera(10, 1))
+        (self.carpeta / "b.gcode").write_bytes(gcode_con_cabecera(20, 2))
+        settings = nucleo.get_default_data()["settings"]
+        tarifas = tarifario.compilar(settings, catalogo.CatalogoMemoria([dict(FILAMENTO)]))
+        self.cache = cache_archivos.CacheArchivos(Path(carpeta.name) / cache_archivos.NOMBRE_ARCHIVO)
+        self.cotizador = lote_carpeta.CotizadorCarpeta(self.carpeta, FILAMENTO, tarifas, self.cache, 15, 2)
+        self.salida = Path(carpeta.name) / "cotizacion.csv"
+
+    def correr(self):
+        pool = PoolEnLinea()
+        self.cotizador.cambios()
+        with mock.patch("sys.stderr"):
+            self.cotizador.correr(pool, self.salida)
+        with open(self.salida, encoding="utf-8", newline="") as f:
+            return pool.llamadas, {fila["archivo"]: fila for fila in csv.DictReader(f)}
+
+    def test_la_segunda_corrida_sale_del_cache(self):
+        llamadas, filas = self.correr()
+        self.assertEqual(llamadas, [("hashear_archivo", 2), ("analizar_archivo", 2)])
+        self.assertEqual(filas["b.gcode"]["gramos"], "20.00")
+        self.assertEqual(filas["b.gcode"]["detalle_error"], "")
+        llamadas, _ = self.correr()
+        self.assertEqual(llamadas, [])
+
+    def test_cada_archivo_nuevo_se_hashea_una_vez(self):
+        for i in range(3):
+            (self.carpeta / f"c{i}.gcode").write_bytes(gcode_con_cabecera(30 + i, 1))
+        with mock.patch.object(cache_archivos, "hash_contenido", wraps=cache_archivos.hash_contenido) as hashear:
+            llamadas, filas = self.correr()
+        self.assertEqual(hashear.call_count, 5)
+        self.assertEqual(llamadas, [("hashear_archivo", 5), ("analizar_archivo", 5)])
+        self.assertEqual(filas["c2.gcode"]["gramos"], "32.00")
+
+    def test_mismo_contenido_con_otro_nombre(self):
+        self.correr()
+        (self.carpeta / "b.gcode").rename(self.carpeta / "c.gcode")
+        llamadas, filas = self.correr()
+        self.assertEqual(llamadas, [("hashear_archivo", 1)])
+        self.assertEqual(sorted(filas), ["a.gcode", "c.gcode"])
+
+    def test_tarifa_por_franja(self):
+        settings = dict(nucleo.get_default_data()["settings"], consumo_w="100", iva_luz_pct="0",
+                        tarifa_luz={"habiles": [{"desde": "00:00", "precio_kwh": "100"}, {"desde": "08:00", "precio_kwh": "300"}],
+                                    "fin_de_semana": [{"desde": "00:00", "precio_kwh": "50"}]})
+        self.cotizador.tarifas = tarifario.compilar(settings, catalogo.CatalogoMemoria([dict(FILAMENTO)]))
+        self.cotizador.inicio = "2026-03-09 07:00"  # lunes: una hora a 100 y otra a 300
+        _, filas = self.correr()
+        self.assertEqual(filas["a.gcode"]["luz"], "10.00")
+        self.assertEqual(filas["b.gcode"]["luz"], "40.00")
+        self.assertEqual(filas["b.gcode"]["version_tarifario"], self.cotizador.tarifas.version)
+
+    def test_precio_del_tarifario(self):
+        self.cotizador.filamento = dict(FILAMENTO, price_kg=1)  # el catálogo cambió después de compilar
+        _, filas = self.correr()
+        self.assertEqual(filas["a.gcode"]["material"], "185.00")
+
+    def test_archivo_borrado_durante_la_pasada(self):
+        archivos = lote_carpeta.buscar_archivos(self.carpeta)
+        (self.carpeta / "b.gcode").unlink()  # entre el listado y el stat
+        with mock.patch.object(lote_carpeta, "buscar_archivos", return_value=archivos):
+            self.assertTrue(self.cotizador.cambios())
+        self.assertEqual([r.name for r in self.cotizador.firmas], ["a.gcode"])
+        metricas = self.cotizador.analizar(archivos, PoolEnLinea())
+        self.assertIn("error", metricas[self.carpeta / "b.gcode"])
+        self.assertEqual(metricas[self.carpeta / "a.gcode"]["gramos"], 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
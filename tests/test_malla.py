@@ -0,0 +1,90 @@
+"""
+Gramos estimados desde un STL: volumen y superficie de mallas binarias y ASCII.
+
+    python -m pytest tests/test_malla.py
+"""
+import struct
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+import malla
+
+# Cubo de 10 mm por lado: 12 triángulos con las normales hacia afuera.
+VERTICES_CUBO = [(x, y, z) for x in (0, 10) for y in (0, 10) for z in (0, 10)]
+CARAS_CUBO = [(0, 1, 3), (0, 3, 2), (4, 6, 7), (4, 7, 5), (0, 4, 5), (0, 5, 1),
+              (2, 3, 7), (2, 7, 6), (0, 2, 6), (0, 6, 4), (1, 5, 7), (1, 7, 3)]
+
+
+def triangulos(invertir=False):
+    for cara in CARAS_CUBO:
+        yield [VERTICES_CUBO[i] for i in (reversed(cara) if invertir else cara)]
+
+def stl_binario(invertir=False):
+    datos = b"cubo".ljust(80, b" ") + struct.pack("<I", len(CARAS_CUBO))
+    for triangulo in triangulos(invertir):
+        datos += struct.pack("<12fH", 0, 0, 0, *(c for v in triangulo for c in v), 0)
+    return datos
+
+def stl_ascii():
+    lineas = ["solid cubo"]
+    for triangulo in triangulos():
+        lineas += ["  facet normal 0 0 0", "    outer loop"]
+        lineas += [f"      vertex {x} {y} {z}" for x, y, z in triangulo]
+        lineas += ["    endloop", "  endfacet"]
+    return ("\n".join(lineas + ["endsolid cubo"]) + "\n").encode()
+
+
+class MallaTest(unittest.TestCase):
+    def setUp(self):
+        try:
+            import numpy  # noqa: F401
+        except ImportError:
+            self.skipTest("falta NumPy")
+        carpeta = tempfile.TemporaryDirectory()
+        self.addCleanup(carpeta.cleanup)
+        self.carpeta = Path(carpeta.name)
+
+    def medir(self, datos):
+        ruta = self.carpeta / "pieza.stl"
+        ruta.write_bytes(datos)
+        return malla.medir_stl(ruta)
+
+    def test_binario_y_ascii(self):
+        for nombre, datos in (("binario", stl_binario()), ("invertido", stl_binario(True)), ("ascii", stl_ascii())):
+            with self.subTest(nombre):
+                volumen, area, cantidad = self.medir(datos)
+                self.assertAlmostEqual(volumen, 1000)
+                self.assertAlmostEqual(area, 600)
+                self.assertEqual(cantidad, 12)
+
+    def test_ascii_en_varios_bloques(self):
+        original = malla.TAMANO_BLOQUE_ASCII
+        malla.TAMANO_BLOQUE_ASCII = 300
+        self.addCleanup(setattr, malla, "TAMANO_BLOQUE_ASCII", original)
+        self.assertEqual(self.medir(stl_ascii())[2], 12)
+        self.assertAlmostEqual(self.medir(stl_ascii())[0], 1000)
+
+    def test_archivos_invalidos(self):
+        for datos in (b"", b"no es un stl"):
+            with self.subTest(datos=datos):
+                with self.assertRaises(ValueError):
+                    self.medir(datos)
+
+    def test_estimar_gramos(self):
+        # Cáscara de 600 mm² * 2 paredes * 0.45 mm = 540 mm³; el resto al 15 %.
+        self.assertAlmostEqual(malla.estimar_gramos(1000, 600, 1.24), (540 + 460 * 0.15) / 1000 * 1.24)
+        self.assertAlmostEqual(malla.estimar_gramos(1000, 600, 1.24, paredes=10), 1.24)
+        ruta = self.carpeta / "cubo.stl"
+        ruta.write_bytes(stl_binario())
+        resultado = malla.analizar_stl(ruta, 1.24, relleno_pct=100)
+        self.assertAlmostEqual(resultado["gramos"], 1.24)
+        self.assertAlmostEqual(resultado["volumen_cm3"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
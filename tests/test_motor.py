@@ -0,0 +1,130 @@
+"""
+Fórmula sin interfaz: una pieza, columnas completas y cotización en lote desde CSV.
+
+    python -m pytest tests/test_motor.py
+"""
+import csv
+import io
+import sys
+import unittest
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+import catalogo
+import motor
+import tarifas_luz
+
+PARAMETROS = {"precio_kwh": 200.0, "consumo_w": 150.0, "desgaste_horas": 5000.0, "precio_repuestos": 100000.0,
+              "margen_error_pct": 10.0, "iva_luz_pct": 21.0, "margen_ganancia_x": 1.5, "costo_envio": 3000.0}
+FILAMENTOS = [{"id": "grilon_pla_00000001", "brand": "Grilon", "type": "PLA", "price_kg": 18500.0}]
+
+
+def cotizar_csv(texto, parametros=PARAMETROS, **opciones):
+    salida = io.StringIO()
+    motor.cotizar_csv(io.StringIO(texto), salida, parametros, **opciones)
+    return list(csv.DictReader(io.StringIO(salida.getvalue())))
+
+
+class CotizarTest(unittest.TestCase):
+    def test_componentes(self):
+        c = motor.cotizar(100, 2, 18500, PARAMETROS)
+        self.assertAlmostEqual(c["material"], 1850)
+        self.assertAlmostEqual(c["luz"], 60)
+        self.assertAlmostEqual(c["desgaste"], 40)
+        self.assertAlmostEqual(c["costo_total"], (1850 + 60 + 40) * 1.1 + 60 * 0.21)
+        self.assertAlmostEqual(c["precio_final"], c["costo_total"] * 1.5 + 3000)
+
+    def test_errores(self):
+        with self.assertRaisesRegex(ValueError, "tiempo"):
+            motor.cotizar(100, 0, 18500, PARAMETROS)
+        with self.assertRaisesRegex(ValueError, "gramos"):
+            motor.cotizar(0, 1, 18500, PARAMETROS)
+
+    def test_sin_vida_util_no_hay_desgaste(self):
+        self.assertEqual(motor.cotizar(10, 1, 18500, dict(PARAMETROS, desgaste_horas=0))["desgaste"], 0)
+
+    def test_parse_float(self):
+        self.assertEqual(motor.parse_float(" 4,5 "), 4.5)
+        self.assertEqual(motor.parse_float("", "1.5"), 1.5)
+        self.assertEqual(motor.horas_desde_tiempo(1, 2, 30, 36), 26.51)
+
+
+class CotizarLoteTest(unittest.TestCase):
+    def setUp(self):
+        try:
+            import numpy  # noqa: F401
+        except ImportError:
+            self.skipTest("falta NumPy")
+
+    def test_igual_que_una_pieza(self):
+        resultado = motor.cotizar_lote([100, 35.5], [2, 0.75], [18500, 21000], PARAMETROS)
+        for i, (g, h, p) in enumerate(((100, 2, 18500), (35.5, 0.75, 21000))):
+            esperado = motor.cotizar(g, h, p, PARAMETROS)
+            for componente in motor.COMPONENTES:
+                self.assertAlmostEqual(resultado[componente][i], esperado[componente], places=9)
+
+    def test_filas_invalidas_no_cortan_el_lote(self):
+        resultado = motor.cotizar_lote([100, 0, 10, 10], [2, 1, -1, 1], [18500, 18500, 18500, float("nan")], PARAMETROS)
+        self.assertEqual(resultado["valido"].tolist(), [True, False, False, False])
+        self.assertEqual([v != v for v in resultado["precio_final"].tolist()], [False, True, True, True])
+
+
+class CotizarCsvTest(unittest.TestCase):
+    def setUp(self):
+        try:
+            import numpy  # noqa: F401
+        except ImportError:
+            self.skipTest("falta NumPy")
+
+    def test_filamento_y_parametros_por_fila(self):
+        filas = cotizar_csv("gramos,horas,minutos,filamento,margen_ganancia_x\n100,1,60,Grilon (PLA),\n"
+                            "100,2,,grilon_pla_00000001,2\n", catalogo=catalogo.CatalogoMemoria(FILAMENTOS), tamano_bloque=1)
+        esperado = motor.cotizar(100, 2, 18500, PARAMETROS)
+        self.assertEqual(filas[0]["precio_final"], f"{esperado['precio_final']:.2f}")
+        self.assertEqual(filas[1]["precio_final"], f"{esperado['costo_total'] * 2 + 3000:.2f}")
+
+    def test_precios_del_tarifario(self):
+        import tarifario
+        cat = catalogo.CatalogoMemoria([dict(f) for f in FILAMENTOS])
+        tarifas = tarifario.compilar({}, cat)
+        cat.actualizar("grilon_pla_00000001", {"price_kg": 1})  # el tarifario conserva el precio compilado
+        filas = cotizar_csv("gramos,horas,filamento\n100,2,Grilon (PLA)\n100,2,No existe\n", catalogo=cat, precios=tarifas,
+                            version=tarifas.version)
+        self.assertEqual(filas[0]["material"], "1850.00")
+        self.assertEqual(filas[0]["version_tarifario"], tarifas.version)
+        self.assertEqual(filas[1]["detalle_error"], motor.ERROR_FILAMENTO)
+
+    def test_errores_por_fila(self):
+        filas = cotizar_csv("gramos,horas,precio_kg\n10,1,18500\n10,0,18500\n0,1,18500\n10,1,abc\n")
+        self.assertEqual([f["detalle_error"] for f in filas],
+                         ["", motor.ERROR_TIEMPO, motor.ERROR_GRAMOS, "Filamento no válido o no seleccionado."])
+
+    def test_columnas_obligatorias(self):
+        for encabezado in ("horas,precio_kg", "gramos,horas", "gramos,precio_kg"):
+            with self.subTest(encabezado=encabezado):
+                with self.assertRaises(ValueError):
+                    cotizar_csv(encabezado + "\n")
+
+    def test_errores_por_fila_sin_tarifa(self):
+        filas = cotizar_csv("gramos,horas,precio_kg\n10,1,18500\n10,0,18500\n10,1,inf\n10,1,abc\n")
+        self.assertEqual(filas[0]["detalle_error"], "")
+        self.assertEqual([f["detalle_error"] for f in filas[1:]], [motor.ERROR_TIEMPO, motor.ERROR_FILAMENTO, motor.ERROR_FILAMENTO])
+
+    def test_errores_por_fila_con_tarifa(self):
+        tarifa = tarifas_luz.TarifaLuz.fija(200)
+        filas = cotizar_csv("gramos,horas,precio_kg,inicio,consumo_w\n10,1,18500,2026-03-09 10:00,\n10,1,18500,ayer,\n"
+                            "10,1,inf,2026-03-09 10:00,\n10,1,18500,2026-03-09 10:00,inf\n", tarifa=tarifa)
+        self.assertEqual(filas[0]["detalle_error"], "")
+        self.assertEqual([f["detalle_error"] for f in filas[1:]], [tarifas_luz.ERROR_INICIO, motor.ERROR_FILAMENTO, motor.ERROR_LUZ])
+
+    def test_inicio_con_zona_horaria(self):
+        filas = cotizar_csv("gramos,horas,precio_kg,inicio\n10,1,18500,2026-01-01T10:00+02:00\n10,1,18500,2026-01-01 10:00\n",
+                            tarifa=tarifas_luz.TarifaLuz.fija(200))
+        self.assertEqual([f["detalle_error"] for f in filas], ["", ""])
+        self.assertEqual(filas[0]["luz"], filas[1]["luz"])
+
+
+if __name__ == "__main__":
+    unittest.main()
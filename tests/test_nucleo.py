@@ -0,0 +1,60 @@
+"""
+Núcleo sin interfaz: que no cargue customtkinter y cómo lee la configuración.
+
+    python -m pytest tests/test_nucleo.py
+"""
+import contextlib
+import io
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+import nucleo
+
+
+class ImportacionTest(unittest.TestCase):
+    def test_no_carga_la_interfaz(self):
+        codigo = "import sys, cotizador, nucleo; print('customtkinter' in sys.modules, 'tkinter' in sys.modules)"
+        proceso = subprocess.run([sys.executable, "-c", codigo], cwd=RAIZ, capture_output=True, text=True, timeout=120)
+        self.assertEqual(proceso.returncode, 0, proceso.stderr)
+        self.assertEqual(proceso.stdout.split(), ["False", "False"])
+
+
+class ConfiguracionTest(unittest.TestCase):
+    def setUp(self):
+        carpeta = tempfile.TemporaryDirectory()
+        self.addCleanup(carpeta.cleanup)
+        self.config = Path(carpeta.name) / "config_impresion3d.json"
+        parche = mock.patch.object(nucleo, "CONFIG_FILE", self.config)
+        parche.start()
+        self.addCleanup(parche.stop)
+
+    def test_sin_archivo_usa_los_valores_por_defecto(self):
+        self.assertEqual(nucleo.load_data(), nucleo.get_default_data())
+
+    def test_completa_claves_nuevas(self):
+        self.config.write_text('{"settings": {"precio_kwh": "100"}, "filaments": []}', encoding="utf-8")
+        settings = nucleo.load_data()["settings"]
+        self.assertEqual(settings["precio_kwh"], "100")
+        self.assertEqual((settings["relleno_pct"], settings["paredes"]), ("15", "2"))
+
+    def test_recupera_desde_el_respaldo(self):
+        data = nucleo.get_default_data()
+        data["settings"]["precio_kwh"] = "123"
+        nucleo.save_data(data)
+        nucleo.save_data(nucleo.get_default_data())  # el anterior pasa a la copia de respaldo
+        self.config.write_text('{"settings": {', encoding="utf-8")  # cortado a mitad de escritura
+        with contextlib.redirect_stdout(io.StringIO()) as salida:
+            recuperada = nucleo.load_data()
+        self.assertEqual(recuperada["settings"]["precio_kwh"], "123")
+        self.assertIn(".1", salida.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+"""
+Perfilado: activación por variable de entorno, procesos hijos y tope de eventos.
+
+    python -m pytest tests/test_perfilado.py
+"""
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+import perfilado
+
+
+def importar(entorno, codigo="pass"):
+    """Corre `import perfilado` y `codigo` en otro intérprete con `entorno`. Devuelve el proceso terminado."""
+    return subprocess.run([sys.executable, "-c", f"import perfilado\n{codigo}"], cwd=RAIZ, capture_output=True,
+                          text=True, timeout=120, env=dict(os.environ, **entorno))
+
+
+class ActivacionTest(unittest.TestCase):
+    def tearDown(self):
+        perfilado.cerrar(io.StringIO())
+
+    def test_umbral_invalido(self):
+        for texto in ("abc", "inf", "-5"):
+            with self.subTest(texto=texto):
+                proceso = importar({perfilado.ENV_PERFIL: "1", perfilado.ENV_UMBRAL: texto},
+                                   "print(perfilado._sesion.umbral_ms)")
+                self.assertEqual(proceso.returncode, 0, proceso.stderr)
+                self.assertEqual(float(proceso.stdout), perfilado.UMBRAL_BLOQUEO_MS)
+                self.assertIn(perfilado.ENV_UMBRAL, proceso.stderr)
+
+    def test_umbral_valido(self):
+        with mock.patch.dict(os.environ, {perfilado.ENV_PERFIL: "1", perfilado.ENV_UMBRAL: "12,5"}):
+            sesion = perfilado.activar_desde_entorno()
+        self.assertEqual(sesion.umbral_ms, 12.5)
+
+    def test_procesos_del_pool_no_perfilan(self):
+        with tempfile.TemporaryDirectory() as carpeta:
+            traza = Path(carpeta) / "traza.json"
+            proceso = importar({perfilado.ENV_PERFIL: str(traza)}, "\n".join((
+                "from concurrent.futures import ProcessPoolExecutor",
+                "import multiprocessing",
+                "if __name__ == '__main__':",
+                "    with ProcessPoolExecutor(2, mp_context=multiprocessing.get_context('spawn')) as pool:",
+                "        print([pool.submit(perfilado.activo).result() for _ in range(2)])",
+                "    perfilado.contar('principal')",
+            )))
+            self.assertEqual(proceso.returncode, 0, proceso.stderr)
+            self.assertEqual(proceso.stdout.strip(), "[False, False]")
+            self.assertEqual(proceso.stderr.count("--- Perfilado ---"), 1)
+            eventos = json.loads(traza.read_text(encoding="utf-8"))["traceEvents"]
+        self.assertIn("principal", [e["name"] for e in eventos])
+
+
+class SesionTest(unittest.TestCase):
+    def test_tope_de_eventos(self):
+        sesion = perfilado.Sesion(max_eventos=5)
+        for i in range(12):
+            sesion.registrar("tramo", i * 1000, i * 1000 + 500)
+        sesion.contar("contador")
+        self.assertEqual(len(sesion.traza()["traceEvents"]) - len(sesion.hilos), 5)
+        self.assertEqual(sesion.tramos["tramo"][0], 12)
+        self.assertEqual(sesion.traza()["traceEvents"][-1]["name"], "contador")
+        self.assertIn("últimos 5 de 13 eventos", sesion.resumen())
+
+
+if __name__ == "__main__":
+    unittest.main()
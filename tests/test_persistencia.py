@@ -0,0 +1,99 @@
+"""
+Guardado de la configuración: escritura atómica, copias de respaldo y guardado diferido.
+
+    python -m pytest tests/test_persistencia.py
+"""
+import json
+import os
+import stat
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+import persistencia
+
+
+class PersistenciaBase(unittest.TestCase):
+    def setUp(self):
+        carpeta = tempfile.TemporaryDirectory()
+        self.addCleanup(carpeta.cleanup)
+        self.ruta = Path(carpeta.name) / "config.json"
+
+    def leer(self, ruta=None):
+        return json.loads((ruta or self.ruta).read_text(encoding="utf-8"))
+
+
+class EscrituraAtomicaTest(PersistenciaBase):
+    def test_rota_respaldos(self):
+        for version in range(5):
+            persistencia.escribir_json_atomico(self.ruta, {"version": version}, copias=2)
+        self.assertEqual(self.leer(), {"version": 4})
+        self.assertEqual([self.leer(r) for r in persistencia.rutas_respaldo(self.ruta, 2)], [{"version": 3}, {"version": 2}])
+        self.assertEqual(sorted(p.name for p in self.ruta.parent.iterdir()), ["config.json", "config.json.1", "config.json.2"])
+
+    def test_falla_sin_tocar_el_original(self):
+        persistencia.escribir_json_atomico(self.ruta, {"version": 1})
+        with self.assertRaises(TypeError):
+            persistencia.escribir_json_atomico(self.ruta, {"no serializable": object()})
+        self.assertEqual(self.leer(), {"version": 1})
+
+    @unittest.skipUnless(os.name == "posix", "permisos POSIX")
+    def test_conserva_los_permisos(self):
+        persistencia.escribir_json_atomico(self.ruta, {"version": 1})
+        self.assertEqual(stat.S_IMODE(self.ruta.stat().st_mode), 0o666 & ~persistencia._UMASK)
+        self.ruta.chmod(0o640)
+        persistencia.escribir_json_atomico(self.ruta, {"version": 2})
+        self.assertEqual(stat.S_IMODE(self.ruta.stat().st_mode), 0o640)
+
+
+class GuardadoDiferidoTest(PersistenciaBase):
+    def test_junta_una_rafaga_en_una_escritura(self):
+        guardado = persistencia.GuardadoDiferido(self.ruta, demora=60)
+        self.addCleanup(guardado.cerrar)
+        with mock.patch.object(persistencia, "escribir_json_atomico", wraps=persistencia.escribir_json_atomico) as escribir:
+            data = {"settings": {"precio_kwh": "0"}}
+            for precio in range(10):
+                data["settings"]["precio_kwh"] = str(precio)
+                guardado.guardar(data)
+            self.assertFalse(self.ruta.exists())
+            self.assertTrue(guardado.flush(5))
+        self.assertEqual(escribir.call_count, 1)
+        self.assertEqual(self.leer(), {"settings": {"precio_kwh": "9"}})
+
+    def test_serializa_una_foto_en_el_hilo_de_escritura(self):
+        guardado = persistencia.GuardadoDiferido(self.ruta, demora=60)
+        self.addCleanup(guardado.cerrar)
+        hilos = []
+        dump = json.dump
+
+        def anotar(*args, **kwargs):
+            hilos.append(threading.current_thread().name)
+            return dump(*args, **kwargs)
+
+        with mock.patch.object(persistencia.json, "dump", anotar):
+            data = {"settings": {"precio_kwh": "1"}, "filaments": [{"id": "a", "price_kg": 1}]}
+            guardado.guardar(data)
+            data["settings"]["precio_kwh"] = "2"  # la ventana sigue editando
+            data["filaments"][0]["price_kg"] = 2
+            data["filaments"].append({"id": "b"})
+            self.assertTrue(guardado.flush(5))
+        self.assertEqual(hilos, ["GuardadoDiferido"])
+        self.assertEqual(self.leer(), {"settings": {"precio_kwh": "1"}, "filaments": [{"id": "a", "price_kg": 1}]})
+
+    def test_cerrar_escribe_lo_pendiente(self):
+        guardado = persistencia.GuardadoDiferido(self.ruta, demora=60)
+        guardado.guardar({"version": 1})
+        guardado.cerrar(5)
+        self.assertEqual(self.leer(), {"version": 1})
+        guardado.guardar({"version": 2})  # ya cerrado: escribe en el acto
+        self.assertEqual(self.leer(), {"version": 2})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+"""
+Planificación de la granja de impresoras: reparto de trabajos, colas y costos por máquina.
+
+    python -m pytest tests/test_planificador.py
+"""
+import sys
+import unittest
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+import motor
+import nucleo
+import planificador
+import tarifas_luz
+
+
+class PlanificadorTest(unittest.TestCase):
+    def setUp(self):
+        self.settings = nucleo.get_default_data()["settings"]
+
+    def impresoras(self, *perfiles):
+        return planificador.impresoras_desde_settings(dict(self.settings, impresoras=list(perfiles)))
+
+    def test_una_impresora_por_defecto(self):
+        [impresora] = planificador.impresoras_desde_settings(self.settings)
+        self.assertEqual(impresora["id"], planificador.IMPRESORA_UNICA["id"])
+        self.assertEqual(impresora["parametros"], motor.parametros_desde_settings(self.settings))
+
+    def test_perfiles_pisan_los_generales(self):
+        ender, bambu = self.impresoras({"id": "p1", "consumo_w": "120", "cola_horas": "3,5"},
+                                       {"id": "p2", "desgaste_horas": "0"})
+        self.assertEqual(ender["parametros"]["consumo_w"], 120.0)
+        self.assertEqual(ender["cola_horas"], 3.5)
+        self.assertEqual(bambu["parametros"]["consumo_w"], motor.parse_float(self.settings["consumo_w"]))
+        self.assertEqual(bambu["desgaste_hora"], 0)
+
+    def test_busqueda_local_mejora_la_lista(self):
+        # Con la lista (LPT) dos máquinas terminan en 12 h; el óptimo es 11 h.
+        impresoras = self.impresoras({"id": "a"}, {"id": "b"})
+        trabajos = [{"horas": h} for h in (6, 5, 4, 4, 3)]
+        lista = planificador.planificar(trabajos, impresoras, mejorar=False)
+        mejorado = planificador.planificar(trabajos, impresoras)
+        self.assertEqual(lista["makespan_h"], 12)
+        self.assertEqual(mejorado["makespan_h"], 11)
+        for plan in (lista, mejorado):
+            self.assertAlmostEqual(sum(plan["cargas"].values()), 22)
+
+    def test_filas_por_impresora(self):
+        impresoras = self.impresoras({"id": "a"}, {"id": "b", "cola_horas": "10"})
+        trabajos = [{"horas": 3, "gramos": 50, "precio_kg": 18500}, {"horas": 1}, {"horas": 2}]
+        plan = planificador.planificar(trabajos, impresoras, colas={"b": 0.5})
+        filas = plan["trabajos"]
+        self.assertEqual(len(filas), 3)
+        for impresora in ("a", "b"):
+            propias = sorted((f for f in filas if f["impresora"] == impresora), key=lambda f: f["inicio_h"])
+            desde = 0.5 if impresora == "b" else 0.0
+            for fila in propias:
+                self.assertAlmostEqual(fila["inicio_h"], desde)
+                desde = fila["fin_h"]
+            self.assertAlmostEqual(plan["cargas"][impresora], desde)
+        parametros = impresoras[0]["parametros"]
+        luz = (parametros["consumo_w"] / 1000) * 3 * parametros["precio_kwh"]
+        self.assertAlmostEqual(filas[0]["luz"], luz)
+        self.assertEqual(filas[0]["cotizacion"], motor.cotizar(50.0, 3.0, 18500.0, parametros, luz))
+        self.assertNotIn("cotizacion", filas[1])
+
+    def test_tarifa_por_franja(self):
+        impresoras = self.impresoras({"id": "a", "consumo_w": "1000"})
+        plan = planificador.planificar([{"horas": 2}], impresoras, tarifa=tarifas_luz.TarifaLuz.fija(100),
+                                       inicio=tarifas_luz.REFERENCIA)
+        self.assertAlmostEqual(plan["trabajos"][0]["luz"], 200)
+
+    def test_errores(self):
+        with self.assertRaisesRegex(ValueError, "impresoras"):
+            planificador.planificar([{"horas": 1}], [])
+        with self.assertRaisesRegex(ValueError, "tiempo"):
+            planificador.planificar([{"horas": 0}], self.impresoras({"id": "a"}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+"""
+Recálculo en vivo: qué nodos se recalculan, dónde se corta la propagación y
+cómo se propagan los campos inválidos.
+
+    python -m pytest tests/test_reactivo.py
+"""
+import sys
+import unittest
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+import motor
+import nucleo
+import reactivo
+
+
+class GrafoTest(unittest.TestCase):
+    def setUp(self):
+        self.llamadas = []
+        self.grafo = reactivo.Grafo()
+        self.grafo.entrada("a", 1)
+        self.grafo.entrada("b", 2)
+        self.grafo.nodo("signo", ("a",), self.registrar("signo", lambda a: a > 0))
+        self.grafo.nodo("suma", ("a", "b"), self.registrar("suma", lambda a, b: a + b))
+        self.grafo.nodo("total", ("signo", "suma"), self.registrar("total", lambda signo, suma: suma if signo else 0))
+        self.assertEqual(self.grafo.calcular(), {"signo": True, "suma": 3, "total": 3})
+        self.llamadas.clear()
+
+    def registrar(self, nombre, funcion):
+        def llamar(*argumentos):
+            self.llamadas.append(nombre)
+            return funcion(*argumentos)
+        return llamar
+
+    def test_sin_cambios_no_recalcula(self):
+        self.grafo.fijar("a", 1)
+        self.assertEqual(self.grafo.calcular(), {})
+        self.assertEqual(self.llamadas, [])
+
+    def test_recalcula_en_orden_y_corta_si_no_cambia(self):
+        self.grafo.fijar("a", 5)
+        self.assertEqual(self.grafo.calcular(), {"suma": 7, "total": 7})
+        self.assertEqual(self.llamadas, ["signo", "suma", "total"])
+        self.llamadas.clear()
+        self.grafo.fijar("a", 4)
+        self.grafo.fijar("b", 3)
+        self.assertEqual(self.grafo.calcular(), {})
+        self.assertEqual(self.llamadas, ["signo", "suma"])
+
+    def test_errores_se_propagan(self):
+        error = reactivo.ErrorCampo("mal", ("b",))
+
+        def fallar(b):
+            raise error
+        self.grafo.nodo("falla", ("b",), fallar)
+        self.assertEqual(self.grafo.calcular(), {"falla": error})
+        self.grafo.nodo("despues", ("falla",), lambda falla: falla)
+        self.assertEqual(self.grafo.calcular(), {"despues": error})
+
+
+class GrafoCotizacionTest(unittest.TestCase):
+    def setUp(self):
+        settings = nucleo.get_default_data()["settings"]
+        precios = {"Grilon (PLA)": 18500.0}
+        self.grafo = reactivo.grafo_cotizacion(precios.get, motor.parse_float(settings["iva_luz_pct"]))
+        for campo in reactivo.CAMPOS_PARAMETROS:
+            self.grafo.fijar(f"texto_{campo}", str(settings[campo]))
+        for campo, texto in zip(reactivo.CAMPOS_TIEMPO, ("0", "4", "30", "0")):
+            self.grafo.fijar(f"texto_{campo}", texto)
+        self.grafo.fijar("texto_gramos", "85,5")
+        self.grafo.fijar("texto_filamento", "Grilon (PLA)")
+        self.grafo.calcular()
+        self.parametros = motor.parametros_desde_settings(settings)
+
+    def test_coincide_con_el_motor(self):
+        esperado = motor.cotizar(85.5, 4.5, 18500.0, self.parametros)
+        for componente in motor.COMPONENTES:
+            self.assertAlmostEqual(self.grafo.valores[componente], esperado[componente], places=9, msg=componente)
+
+    def test_precio_kwh_no_toca_el_material(self):
+        self.grafo.fijar("texto_precio_kwh", str(self.parametros["precio_kwh"] * 2))
+        cambios = self.grafo.calcular()
+        self.assertIn("luz", cambios)
+        self.assertIn("precio_final", cambios)
+        self.assertNotIn("material", cambios)
+        self.assertNotIn("desgaste", cambios)
+
+    def test_campo_invalido(self):
+        self.grafo.fijar("texto_gramos", "abc")
+        cambios = self.grafo.calcular()
+        self.assertIsInstance(cambios["gramos"], reactivo.ErrorCampo)
+        self.assertEqual(cambios["gramos"].campos, ("gramos",))
+        self.assertEqual(cambios["precio_final"], cambios["gramos"])
+        self.assertNotIn("luz", cambios)
+        self.grafo.fijar("texto_gramos", "85.5")
+        self.assertAlmostEqual(self.grafo.calcular()["precio_final"],
+                               motor.cotizar(85.5, 4.5, 18500.0, self.parametros)["precio_final"])
+
+    def test_numeros_no_finitos(self):
+        for campo, texto in (("gramos", "nan"), ("precio_kwh", "inf"), ("tiempo_horas", "-Infinity"), ("costo_envio", "1e400")):
+            with self.subTest(campo=campo, texto=texto):
+                self.grafo.fijar(f"texto_{campo}", texto)
+                error = self.grafo.calcular()[campo]
+                self.assertEqual(error, reactivo.ErrorCampo(f"'{texto}' no es un número válido.", (campo,)))
+                self.grafo.fijar(f"texto_{campo}", "1")
+                self.grafo.calcular()
+
+    def test_filamento_y_tiempo_invalidos(self):
+        self.grafo.fijar("texto_filamento", "No existe")
+        self.grafo.fijar("texto_tiempo_horas", "0")
+        self.grafo.fijar("texto_tiempo_minutos", "0")
+        cambios = self.grafo.calcular()
+        self.assertEqual(cambios["precio_kg"], reactivo.ErrorCampo(motor.ERROR_FILAMENTO, ("filamento",)))
+        self.assertEqual(cambios["horas"], reactivo.ErrorCampo(motor.ERROR_TIEMPO, reactivo.CAMPOS_TIEMPO))
+
+
+if __name__ == "__main__":
+    unittest.main()
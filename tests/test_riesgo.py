@@ -0,0 +1,60 @@
+"""
+Simulación de Monte Carlo del costo real de una impresión.
+
+    python -m pytest tests/test_riesgo.py
+"""
+import sys
+import unittest
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+import riesgo
+
+PARAMETROS = {"precio_kwh": 200.0, "consumo_w": 150.0, "desgaste_horas": 5000.0, "precio_repuestos": 100000.0,
+              "margen_error_pct": 10.0, "iva_luz_pct": 21.0, "margen_ganancia_x": 1.5, "costo_envio": 3000.0}
+SIN_INCERTIDUMBRE = {"riesgo_falla_hora_pct": 0.0, "riesgo_desvio_tiempo_pct": 0.0,
+                     "riesgo_desvio_kwh_pct": 0.0, "riesgo_perdida_objetivo_pct": 5.0}
+
+
+class SimularTest(unittest.TestCase):
+    def setUp(self):
+        try:
+            import numpy  # noqa: F401
+        except ImportError:
+            self.skipTest("falta NumPy")
+
+    def test_sin_incertidumbre_es_la_formula_sin_margen(self):
+        r = riesgo.simular(100, 2, 18500, PARAMETROS, SIN_INCERTIDUMBRE, muestras=1000, semilla=1)
+        for clave in ("p50", "p90", "p99", "costo_medio"):
+            self.assertAlmostEqual(r[clave], 1850 + 60 * 1.21 + 40)
+        self.assertEqual(r["prob_perdida"], 0)
+        self.assertAlmostEqual(r["multiplicador"], r["p50"] / r["cotizacion"]["costo_total"])
+
+    def test_las_fallas_encarecen(self):
+        config = dict(SIN_INCERTIDUMBRE, riesgo_falla_hora_pct=20.0)
+        base = riesgo.simular(100, 2, 18500, PARAMETROS, SIN_INCERTIDUMBRE, muestras=10000, semilla=1)
+        r = riesgo.simular(100, 2, 18500, PARAMETROS, config, muestras=10000, semilla=1)
+        self.assertGreater(r["costo_medio"], base["costo_medio"])
+        self.assertGreaterEqual(r["p99"], r["p90"])
+        self.assertGreaterEqual(r["p90"], r["p50"])
+        self.assertGreater(r["multiplicador"], base["multiplicador"])
+
+    def test_misma_semilla_mismo_resultado(self):
+        config = riesgo.config_desde_settings({})
+        a = riesgo.simular(100, 2, 18500, PARAMETROS, config, muestras=1000, semilla=7)
+        b = riesgo.simular(100, 2, 18500, PARAMETROS, config, muestras=1000, semilla=7)
+        self.assertEqual(a, b)
+
+    def test_config_invalida(self):
+        with self.assertRaisesRegex(ValueError, "falla"):
+            riesgo.simular(100, 2, 18500, PARAMETROS, dict(SIN_INCERTIDUMBRE, riesgo_falla_hora_pct=100.0), muestras=10)
+        with self.assertRaisesRegex(ValueError, "objetivo"):
+            riesgo.simular(100, 2, 18500, PARAMETROS, dict(SIN_INCERTIDUMBRE, riesgo_perdida_objetivo_pct=0.0), muestras=10)
+        with self.assertRaisesRegex(ValueError, "tiempo"):
+            riesgo.simular(100, 0, 18500, PARAMETROS, SIN_INCERTIDUMBRE, muestras=10)
+
+
+if __name__ == "__main__":
+    unittest.main()
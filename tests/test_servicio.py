@@ -0,0 +1,136 @@
+"""
+Servicio HTTP de cotización: endpoints, errores por fila del lote y encabezados mal formados.
+
+    python -m pytest tests/test_servicio.py
+"""
+import asyncio
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+import nucleo
+import servicio
+
+FILAMENTO = {"id": "grilon_pla_00000001", "brand": "Grilon", "type": "PLA", "price_kg": 18500.0}
+
+
+class ServicioBase(unittest.TestCase):
+    def setUp(self):
+        carpeta = tempfile.TemporaryDirectory()
+        self.addCleanup(carpeta.cleanup)
+        config = Path(carpeta.name) / "config_impresion3d.json"
+        parche = mock.patch.object(nucleo, "CONFIG_FILE", config)
+        parche.start()
+        self.addCleanup(parche.stop)
+        data = nucleo.get_default_data()
+        data["filaments"] = [dict(FILAMENTO)]
+        nucleo.save_data(data)
+        self.servicio = servicio.ServicioCotizacion()
+        self.addCleanup(lambda: self.servicio.catalogo.cerrar())
+
+    def pedir(self, *crudos):
+        """Manda los pedidos HTTP `crudos` por una misma conexión y devuelve [(estado, json), ...]."""
+        async def conversar():
+            servidor = await asyncio.start_server(self.servicio.atender, "127.0.0.1", 0)
+            puerto = servidor.sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection("127.0.0.1", puerto)
+            respuestas = []
+            try:
+                for crudo in crudos:
+                    writer.write(crudo)
+                    await writer.drain()
+                    encabezado = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1")
+                    largo = int(encabezado.lower().split("content-length:")[1].split("\r\n")[0])
+                    respuestas.append((int(encabezado.split(" ")[1]), json.loads(await reader.readexactly(largo))))
+            finally:
+                writer.close()
+                servidor.close()
+                await servidor.wait_closed()
+            return respuestas
+        return asyncio.run(conversar())
+
+    def post(self, ruta, cuerpo):
+        datos = json.dumps(cuerpo).encode()
+        return f"POST {ruta} HTTP/1.1\r\nContent-Length: {len(datos)}\r\n\r\n".encode() + datos
+
+
+class CotizarTest(ServicioBase):
+    def test_cotizar_con_nombre_o_id(self):
+        por_nombre = self.servicio.cotizar({"gramos": "85.5", "horas": 4.5, "filamento": "Grilon (PLA)"})
+        por_id = self.servicio.cotizar({"gramos": 85.5, "horas": "4,5", "filamento": FILAMENTO["id"]})
+        self.assertEqual(por_nombre, por_id)
+        self.assertEqual(por_nombre["version_tarifario"], self.servicio.tarifario.version)
+
+    def test_filamento_desconocido(self):
+        with self.assertRaises(servicio.ErrorPedido):
+            self.servicio.cotizar({"gramos": 10, "horas": 1, "filamento": "No existe"})
+
+    def test_lote_con_filas_invalidas(self):
+        try:
+            import numpy  # noqa: F401
+        except ImportError:
+            self.skipTest("falta NumPy")
+        trabajo = {"gramos": 85.5, "horas": 4.5, "filamento": "Grilon (PLA)"}
+        cotizaciones = self.servicio.cotizar_lote([trabajo, {"gramos": "abc", "horas": 1, "precio_kg": 1000}, "texto",
+                                                   {"gramos": 10, "horas": 1, "filamento": "No existe"}, dict(trabajo, margen_ganancia_x=2)])
+        self.assertEqual(cotizaciones[0], self.servicio.cotizar(trabajo))
+        for fila in cotizaciones[1:4]:
+            self.assertEqual(list(fila), ["error"])
+        self.assertEqual(cotizaciones[4]["version_tarifario"], self.servicio.tarifario.version + servicio.tarifario.SUFIJO_AJUSTES)
+
+
+    def test_precios_del_tarifario(self):
+        try:
+            import numpy  # noqa: F401
+        except ImportError:
+            self.skipTest("falta NumPy")
+        trabajo = {"gramos": 100, "horas": 1, "filamento": "Grilon (PLA)"}
+        compilado = self.servicio.cotizar(trabajo)
+        self.servicio.catalogo.actualizar(FILAMENTO["id"], {"price_kg": 1})  # el catálogo cambia, el tarifario todavía no
+        self.assertEqual(self.servicio.cotizar_lote([trabajo])[0], compilado)
+        self.assertAlmostEqual(compilado["material"], 1850)
+        self.assertAlmostEqual(self.servicio.cotizar_lote([dict(trabajo, precio_kg=1000)])[0]["material"], 100)
+
+
+class HttpTest(ServicioBase):
+    def test_keep_alive(self):
+        salud = b"GET /salud HTTP/1.1\r\n\r\n"
+        respuestas = self.pedir(salud, self.post("/cotizar", {"gramos": 10, "horas": 1, "precio_kg": 1000}), salud)
+        self.assertEqual([estado for estado, _ in respuestas], [200, 200, 200])
+        self.assertEqual(respuestas[0][1]["filamentos"], 1)
+
+    def test_content_length_invalido(self):
+        for largo in ("abc", "-5", "1.5"):
+            with self.subTest(largo=largo):
+                [(estado, cuerpo)] = self.pedir(f"POST /cotizar HTTP/1.1\r\nContent-Length: {largo}\r\n\r\n".encode())
+                self.assertEqual(estado, 400)
+                self.assertIn("Content-Length", cuerpo["error"])
+
+    def test_cotizar_trabajo(self):
+        try:
+            import numpy  # noqa: F401
+        except ImportError:
+            self.skipTest("falta NumPy")
+        pieza = {"nombre": "base", "cantidad": 2, "horas": 1, "materiales": {"Grilon (PLA)": 10}}
+        respuestas = self.pedir(self.post("/cotizar/trabajo", {"piezas": [pieza]}),
+                                self.post("/cotizar/trabajo", {"piezas": [dict(pieza, cantidad="1e400")]}),
+                                self.post("/cotizar/trabajo", {"piezas": [dict(pieza, gcode="base.gcode")]}),
+                                self.post("/cotizar/trabajo", ["no", "es", "un", "objeto"]))
+        self.assertEqual([estado for estado, _ in respuestas], [200, 400, 400, 400])
+        self.assertEqual(respuestas[0][1]["impresiones"], 2)
+        self.assertEqual(respuestas[0][1]["version_tarifario"], self.servicio.tarifario.version)
+
+    def test_errores_del_cliente(self):
+        respuestas = self.pedir(b"GET /no-existe HTTP/1.1\r\n\r\n", b"GET /cotizar HTTP/1.1\r\n\r\n",
+                                b"POST /cotizar HTTP/1.1\r\nContent-Length: 3\r\n\r\n{x}")
+        self.assertEqual([estado for estado, _ in respuestas], [404, 405, 400])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+"""
+Tarifario precompilado: cuándo se recompila y cómo cambia su versión.
+
+    python -m pytest tests/test_tarifario.py
+"""
+import sys
+import unittest
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+import catalogo
+import nucleo
+import tarifario
+
+FILAMENTO = {"id": "grilon_pla_00000001", "brand": "Grilon", "type": "PLA", "price_kg": 18500.0}
+
+
+class TarifarioTest(unittest.TestCase):
+    def setUp(self):
+        self.settings = nucleo.get_default_data()["settings"]
+        self.tarifario = tarifario.compilar(self.settings, catalogo.CatalogoMemoria([dict(FILAMENTO)]))
+
+    def test_misma_configuracion_mismo_objeto(self):
+        self.assertIs(self.tarifario.con_settings(dict(self.settings, geometry="800x600")), self.tarifario)
+        self.assertIs(self.tarifario.con_settings(dict(self.settings, precio_kwh="199.7464")), self.tarifario)
+
+    def test_cualquier_cambio_recompila(self):
+        for clave, valor in (("precio_kwh", "199.74641"), ("margen_ganancia_x", "1.6"),
+                             ("fases_consumo", [{"horas": "0.1", "consumo_w": "300"}])):
+            with self.subTest(clave=clave):
+                nuevo = self.tarifario.con_settings(dict(self.settings, **{clave: valor}))
+                self.assertIsNot(nuevo, self.tarifario)
+                self.assertNotEqual(nuevo.version, self.tarifario.version)
+                self.assertEqual(nuevo.precio_gramo(FILAMENTO["id"]), self.tarifario.precio_gramo(FILAMENTO["id"]))
+
+    def test_version(self):
+        parametros, catalogo_ = self.tarifario.version.split(".")
+        self.assertEqual((len(parametros), len(catalogo_)), (16, 16))
+        otro = tarifario.compilar(dict(self.settings), catalogo.CatalogoMemoria([dict(FILAMENTO)]))
+        self.assertEqual(otro.version, self.tarifario.version)
+        self.assertEqual(self.tarifario.con_filamento("otro", 1000).sin_filamento("otro").version, self.tarifario.version)
+
+    def test_ajustes(self):
+        resultado = self.tarifario.cotizar(10, 1, FILAMENTO["id"], ajustes={"margen_ganancia_x": 2})
+        self.assertEqual(resultado["version_tarifario"], self.tarifario.version + tarifario.SUFIJO_AJUSTES)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+"""
+Tarifas de luz por franja horaria.
+
+    python -m pytest tests/test_tarifas_luz.py
+"""
+import sys
+import unittest
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+import tarifas_luz
+
+# Hábiles: barato hasta las 07:00 sólo si la franja viene del día anterior.
+HABILES = [{"desde": "07:00", "precio_kwh": "200"}, {"desde": "23:00", "precio_kwh": "100"}]
+FIN_DE_SEMANA = [{"desde": "10:00", "precio_kwh": "50"}, {"desde": "20:00", "precio_kwh": "80"}]
+
+
+def horas(texto):
+    return tarifas_luz.horas_desde_inicio(texto)
+
+
+class TarifaLuzTest(unittest.TestCase):
+    def setUp(self):
+        self.tarifa = tarifas_luz.TarifaLuz.desde_config(HABILES, FIN_DE_SEMANA)
+
+    def test_el_lunes_arranca_con_la_franja_del_domingo(self):
+        # 2026-03-09 es lunes: de 00:00 a 07:00 rige la última franja del domingo (80).
+        self.assertAlmostEqual(self.tarifa.costo(horas("2026-03-09 00:00"), 1, 1000), 80)
+        self.assertAlmostEqual(self.tarifa.costo(horas("2026-03-09 06:00"), 2, 1000), 80 + 200)
+
+    def test_el_sabado_arranca_con_la_franja_del_viernes(self):
+        # 2026-03-07 es sábado: hasta las 10:00 sigue la franja de las 23:00 del viernes (100).
+        self.assertAlmostEqual(self.tarifa.costo(horas("2026-03-07 09:00"), 2, 1000), 100 + 50)
+
+    def test_entre_dias_hábiles(self):
+        self.assertAlmostEqual(self.tarifa.costo(horas("2026-03-10 22:00"), 10, 1000), 200 + 8 * 100 + 200)
+
+    def test_domingo_a_lunes(self):
+        # Domingo 19:00 -> lunes 08:00: 1 h a 50, 11 h a 80 (hasta las 07:00 del lunes) y 1 h a 200.
+        self.assertAlmostEqual(self.tarifa.costo(horas("2026-03-08 19:00"), 13, 1000), 50 + 11 * 80 + 200)
+
+    def test_semanas_completas(self):
+        semana = self.tarifa.costo(horas("2026-03-09 00:00"), tarifas_luz.HORAS_SEMANA, 1000)
+        self.assertAlmostEqual(self.tarifa.costo(horas("2026-03-04 05:30"), 3 * tarifas_luz.HORAS_SEMANA, 500), 1.5 * semana)
+
+    def test_lote_igual_que_de_a_uno(self):
+        try:
+            import numpy  # noqa: F401
+        except ImportError:
+            self.skipTest("falta NumPy")
+        inicios = [horas(f"2026-03-{d:02d} {h:02d}:30") for d in range(6, 13) for h in range(0, 24, 5)]
+        duraciones = [0.5 + (i % 40) for i in range(len(inicios))]
+        lote = self.tarifa.costo_lote(inicios, duraciones, 150)
+        for inicio, duracion, costo in zip(inicios, duraciones, lote.tolist()):
+            self.assertAlmostEqual(costo, self.tarifa.costo(inicio, duracion, 150))
+
+    def test_fases_de_consumo(self):
+        tarifa = tarifas_luz.TarifaLuz.fija(100, fases=((0.5, 400),))
+        self.assertAlmostEqual(tarifa.costo(0, 2, 100), 0.5 * 0.4 * 100 + 1.5 * 0.1 * 100)
+
+    def test_inicio_invalido(self):
+        with self.assertRaisesRegex(ValueError, "AAAA-MM-DD"):
+            horas("9 de marzo")
+        self.assertEqual(horas(datetime(2024, 1, 2)), 24)
+
+    def test_inicio_con_zona_horaria(self):
+        local = datetime(2026, 1, 1, 8, tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+        self.assertEqual(horas("2026-01-01T10:00+02:00"), horas(local))
+        self.assertEqual(horas(datetime(2026, 1, 1, 10, tzinfo=timezone(timedelta(hours=2)))), horas(local))
+        self.assertAlmostEqual(horas("2026-01-01T10:00+02:00") - horas("2026-01-01T10:00-03:00"), -5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+"""
+Trabajos de varias piezas: lectura del pedido, G-code multiextrusor y cotización.
+
+    python -m pytest tests/test_trabajos.py
+"""
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+import catalogo
+import gcode
+import nucleo
+import tarifario
+import trabajos
+
+FILAMENTOS = [
+    {"id": "grilon_pla_00000001", "brand": "Grilon", "type": "PLA", "price_kg": 18500.0, "density": 1.0},
+    {"id": "printalot_petg_00000002", "brand": "Printalot", "type": "PETG", "price_kg": 21000.0, "density": 2.0},
+]
+# Sin estadísticas del slicer: los largos salen de recorrer los movimientos.
+GCODE_DOS_EXTRUSORES = (
+    "G21\nG90\nM83\n"
+    "T0\nG1 X10 Y0 E100 F600\n"
+    "T1\nG1 X20 Y0 E50 F600\n"
+)
+
+
+class TrabajosBase(unittest.TestCase):
+    def setUp(self):
+        self.catalogo = catalogo.CatalogoMemoria([dict(f) for f in FILAMENTOS])
+        self.tarifario = tarifario.compilar(nucleo.get_default_data()["settings"], self.catalogo)
+
+    def buscar(self, referencia):
+        return self.catalogo.obtener(referencia) or self.catalogo.por_nombre(referencia)
+
+    def leer(self, *piezas, carpeta=None):
+        return trabajos.leer_pedido({"piezas": list(piezas)}, self.buscar, carpeta)
+
+
+class LeerPedidoTest(TrabajosBase):
+    def test_normaliza_referencias(self):
+        [pieza] = self.leer({"nombre": "base", "cantidad": "4", "horas": "2,5",
+                             "materiales": {"Grilon (PLA)": 30, "grilon_pla_00000001": "5,5"}})
+        self.assertEqual(pieza, {"nombre": "base", "cantidad": 4, "placa": None, "horas": 2.5,
+                                 "materiales": {"grilon_pla_00000001": 35.5}})
+
+    def test_valores_no_finitos(self):
+        base = {"nombre": "base", "horas": 1, "materiales": {"Grilon (PLA)": 10}}
+        for pieza, error in (
+                (dict(base, cantidad=float("inf")), trabajos.ERROR_CANTIDAD),
+                (dict(base, cantidad="1e400"), trabajos.ERROR_CANTIDAD),
+                (dict(base, cantidad="nan"), trabajos.ERROR_CANTIDAD),
+                (dict(base, materiales={"Grilon (PLA)": "inf"}), trabajos.ERROR_NO_FINITO),
+                (dict(base, materiales={"Grilon (PLA)": 10, "Printalot (PETG)": "1e400"}), trabajos.ERROR_NO_FINITO),
+                (dict(base, horas="inf"), trabajos.ERROR_NO_FINITO)):
+            with self.subTest(pieza=pieza):
+                with self.assertRaises(ValueError) as contexto:
+                    self.leer(pieza)
+                self.assertEqual(str(contexto.exception), f"Pieza base: {error}")
+
+    def test_errores_por_pieza(self):
+        with self.assertRaisesRegex(ValueError, "^Pieza 2: "):
+            self.leer({"horas": 1, "materiales": {"Grilon (PLA)": 10}}, {"horas": 1, "materiales": {"No existe": 10}})
+        with self.assertRaisesRegex(ValueError, "gcode"):
+            self.leer({"gcode": "pieza.gcode", "materiales": ["Grilon (PLA)"]})
+
+    def test_gcode_con_una_densidad_por_extrusor(self):
+        with tempfile.TemporaryDirectory() as carpeta:
+            (Path(carpeta) / "pieza.gcode").write_text(GCODE_DOS_EXTRUSORES)
+            [pieza] = self.leer({"gcode": "pieza.gcode", "materiales": ["Grilon (PLA)", "Printalot (PETG)"]}, carpeta=carpeta)
+            with self.assertRaisesRegex(ValueError, "2 extrusores"):
+                self.leer({"gcode": "pieza.gcode", "materiales": ["Grilon (PLA)"]}, carpeta=carpeta)
+        materiales = pieza["materiales"]
+        self.assertAlmostEqual(materiales["grilon_pla_00000001"], gcode.gramos_desde_longitud(100, 1.0))
+        self.assertAlmostEqual(materiales["printalot_petg_00000002"], gcode.gramos_desde_longitud(50, 2.0))
+        self.assertGreater(pieza["horas"], 0)
+
+
+class CotizarTrabajoTest(TrabajosBase):
+    def setUp(self):
+        try:
+            import numpy  # noqa: F401
+        except ImportError:
+            self.skipTest("falta NumPy")
+        super().setUp()
+
+    def test_totales_y_materiales(self):
+        piezas = self.leer({"nombre": "base", "cantidad": 3, "horas": 2, "materiales": {"Grilon (PLA)": 30}},
+                           {"nombre": "tapa", "horas": 1, "materiales": {"Grilon (PLA)": 5, "Printalot (PETG)": 10}})
+        resultado = trabajos.cotizar_trabajo(piezas, self.tarifario)
+        base, tapa = resultado["piezas"]
+        suelta = self.tarifario.cotizar(30, 2, "grilon_pla_00000001")
+        self.assertAlmostEqual(base["precio_venta"], suelta["precio_venta"])
+        self.assertAlmostEqual(base["precio_total"], 3 * suelta["precio_venta"])
+        self.assertEqual(resultado["impresiones"], 4)
+        self.assertAlmostEqual(resultado["totales"]["precio_venta"], base["precio_total"] + tapa["precio_total"])
+        self.assertAlmostEqual(resultado["totales"]["precio_final"], resultado["totales"]["precio_venta"] + resultado["totales"]["envio"])
+        self.assertEqual({m["filamento_id"]: m["gramos"] for m in resultado["materiales"]},
+                         {"grilon_pla_00000001": 95.0, "printalot_petg_00000002": 10.0})
+        self.assertEqual(resultado["version_tarifario"], self.tarifario.version)
+
+    def test_placa_compartida(self):
+        sueltas = self.leer({"nombre": "a", "cantidad": 2, "horas": 1, "materiales": {"Grilon (PLA)": 10}})
+        en_placa = self.leer({"nombre": "a", "cantidad": 2, "horas": 1, "placa": "A", "materiales": {"Grilon (PLA)": 10}})
+        resultado = trabajos.cotizar_trabajo(en_placa, self.tarifario)
+        self.assertEqual(resultado["impresiones"], 1)
+        self.assertEqual(trabajos.cotizar_trabajo(sueltas, self.tarifario)["impresiones"], 2)
+        self.assertEqual(resultado["piezas"][0]["placa"], "A")
+
+    def test_sin_piezas(self):
+        with self.assertRaisesRegex(ValueError, trabajos.ERROR_SIN_PIEZAS):
+            trabajos.cotizar_trabajo([], self.tarifario)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,248 @@
+"""
+Cotización de trabajos con varias piezas y varios materiales.
+
+Un trabajo es una lista de piezas, cada una con sus gramos por filamento
+(una impresión multimaterial usa varios, purga incluida), su tiempo de
+impresión por unidad y la cantidad de unidades. Las piezas con la misma
+`placa` se imprimen juntas y comparten el calentamiento de la máquina (las
+`fases_consumo` de la tarifa de luz), que se reparte entre ellas según su
+tiempo; una pieza sin placa es una impresión por unidad. El envío se cobra
+una sola vez por trabajo.
+
+Todas las piezas se cotizan juntas en una pasada vectorizada con el
+tarifario, y el resultado trae el desglose por pieza y por material.
+
+    python trabajos.py pedido.json --salida desglose.csv
+
+El pedido es un JSON como este:
+
+    {"piezas": [
+        {"nombre": "base", "cantidad": 4, "placa": "A", "horas": 2.5,
+         "materiales": {"Grilon (PLA)": 30, "pla_negro_1a2b3c4d": 5.2}},
+        {"nombre": "tapa", "gcode": "tapa.gcode", "materiales": ["Grilon (PLA)", "pla_negro_1a2b3c4d"]}
+    ]}
+
+Con `gcode`, los gramos por extrusor y el tiempo salen del archivo (el tiempo
+se puede pisar) y `materiales` es la lista de filamentos de cada extrusor,
+en orden.
+"""
+import csv
+import json
+import math
+import sys
+from pathlib import Path
+
+import gcode
+import motor
+import tarifas_luz
+
+# --- CONSTANTES ---
+COLUMNAS_TIEMPO = ("dias", "horas", "minutos", "segundos")
+COMPONENTES_PIEZA = tuple(c for c in motor.COMPONENTES if c not in ("envio", "precio_final"))
+ERROR_CANTIDAD = "La cantidad debe ser un número entero mayor a cero."
+ERROR_NO_FINITO = "Los gramos y el tiempo deben ser números finitos."
+ERROR_SIN_PIEZAS = "El trabajo no tiene piezas."
+
+
+# --- PEDIDO ---
+
+def _materiales_gcode(pieza, buscar_filamento, carpeta):
+    referencias = pieza.get("materiales") or []
+    if not isinstance(referencias, list) or not referencias:
+        raise ValueError("Con 'gcode', 'materiales' debe ser la lista de filamentos de cada extrusor.")
+    filamentos = [buscar_filamento(str(r)) for r in referencias]
+    if not all(filamentos):
+        raise ValueError(motor.ERROR_FILAMENTO)
+    try:
+        metricas = gcode.analizar_gcode(Path(carpeta) / pieza["gcode"], motor.densidad_filamento(filamentos[0]))
+    except OSError as e:
+        raise ValueError(f"No se pudo leer {pieza['gcode']}: {e.strerror or e}")
+    gramos = metricas["gramos_por_extrusor"]
+    usados = [i for i, g in enumerate(gramos) if g > 0]
+    if usados and usados[-1] >= len(filamentos):
+        raise ValueError(f"El G-code usa {usados[-1] + 1} extrusores y se indicaron {len(filamentos)} materiales.")
+    if "longitud_mm_por_extrusor" in metricas:
+        # El slicer no informó gramos: cada extrusor se convierte con la densidad de su filamento.
+        longitudes = metricas["longitud_mm_por_extrusor"]
+        gramos = {i: gcode.gramos_desde_longitud(longitudes[i], motor.densidad_filamento(filamentos[i]), metricas["diametro"]) for i in usados}
+    materiales = {}
+    for i in usados:
+        materiales[filamentos[i]["id"]] = materiales.get(filamentos[i]["id"], 0.0) + gramos[i]
+    return materiales, metricas["horas"]
+
+def leer_pieza(pieza, buscar_filamento, carpeta=None):
+    """
+    Normaliza una pieza del pedido a un dict con `nombre`, `cantidad`,
+    `placa` (o None), `horas` por unidad y `materiales` ({id: gramos por
+    unidad}). `buscar_filamento(referencia)` devuelve el filamento del
+    catálogo (por id o nombre visible) o None. Los `gcode` se buscan en
+    `carpeta`; sin carpeta no se aceptan. Lanza ValueError.
+    """
+    if not isinstance(pieza, dict):
+        raise ValueError("Cada pieza debe ser un objeto JSON.")
+    if "gcode" in pieza:
+        if carpeta is None:
+            raise ValueError("Acá no se aceptan piezas con 'gcode'; indique gramos y tiempo.")
+        materiales, horas = _materiales_gcode(pieza, buscar_filamento, carpeta)
+    else:
+        referencias = pieza.get("materiales")
+        if not isinstance(referencias, dict) or not referencias:
+            raise ValueError("'materiales' debe ser un objeto {filamento: gramos}.")
+        materiales = {}
+        for referencia, gramos in referencias.items():
+            filamento = buscar_filamento(str(referencia))
+            if not filamento:
+                raise ValueError(motor.ERROR_FILAMENTO)
+            materiales[filamento["id"]] = materiales.get(filamento["id"], 0.0) + motor.parse_float(gramos)
+        horas = None
+    if any(c in pieza for c in COLUMNAS_TIEMPO):
+        horas = motor.horas_desde_tiempo(*(motor.parse_float(pieza.get(c)) for c in COLUMNAS_TIEMPO))
+    if not all(math.isfinite(g) for g in materiales.values()) or (horas is not None and not math.isfinite(horas)):
+        raise ValueError(ERROR_NO_FINITO)
+    if any(g < 0 for g in materiales.values()) or not sum(materiales.values()) > 0:
+        raise ValueError(motor.ERROR_GRAMOS)
+    if horas is None or not horas > 0:
+        raise ValueError(motor.ERROR_TIEMPO)
+    cantidad = motor.parse_float(pieza.get("cantidad"), "1")
+    if not math.isfinite(cantidad) or cantidad < 1 or cantidad != int(cantidad):
+        raise ValueError(ERROR_CANTIDAD)
+    placa = pieza.get("placa")
+    return {
+        "nombre": str(pieza.get("nombre", "")),
+        "cantidad": int(cantidad),
+        "placa": None if placa in (None, "") else str(placa),
+        "horas": horas,
+        "materiales": materiales,
+    }
+
+def leer_pedido(pedido, buscar_filamento, carpeta=None):
+    """Normaliza todas las piezas de un pedido (dict con `piezas`). Los errores dicen de qué pieza son."""
+    piezas = pedido.get("piezas") if isinstance(pedido, dict) else None
+    if not isinstance(piezas, list):
+        raise ValueError("El pedido debe tener una lista 'piezas'.")
+    normalizadas = []
+    for n, pieza in enumerate(piezas, start=1):
+        try:
+            normalizadas.append(leer_pieza(pieza, buscar_filamento, carpeta))
+        except ValueError as e:
+            nombre = pieza.get("nombre") if isinstance(pieza, dict) else None
+            raise ValueError(f"Pieza {nombre or n}: {e}")
+    return normalizadas
+
+
+# --- COTIZACIÓN ---
+
+def cotizar_trabajo(piezas, tarifas, inicio=None):
+    """
+    Cotiza las piezas de `leer_pedido` con un `tarifario.Tarifario`. Con
+    tarifa de luz por franja, todas las placas se cobran como si empezaran en
+    `inicio` (vacío es ahora); para el orden real está `planificador`.
+
+    Devuelve un dict con:
+    - `piezas`: por pieza, `nombre`, `placa`, `cantidad`, `gramos` y `horas`
+      por unidad, los COMPONENTES_PIEZA por unidad y `precio_total`.
+    - `materiales`: por filamento, `filamento_id`, `gramos` y `costo` del trabajo.
+    - `impresiones`: cuántas veces se calienta la máquina.
+    - `totales`: los COMPONENTES del trabajo completo, con un solo envío.
+    - `version_tarifario`.
+    """
+    import numpy as np
+
+    if not piezas:
+        raise ValueError(ERROR_SIN_PIEZAS)
+    ids = list(dict.fromkeys(fid for p in piezas for fid in p["materiales"]))
+    columna = {fid: j for j, fid in enumerate(ids)}
+    gramos_material = np.zeros((len(piezas), len(ids)))
+    for i, pieza in enumerate(piezas):
+        for fid, g in pieza["materiales"].items():
+            gramos_material[i, columna[fid]] = g
+    precio_gramo = np.array([tarifas.precio_gramo(fid) for fid in ids])
+    horas = np.array([p["horas"] for p in piezas], dtype=np.float64)
+    cantidad = np.array([p["cantidad"] for p in piezas], dtype=np.float64)
+    gramos = gramos_material.sum(axis=1)
+
+    # Cada unidad paga la luz de su impresión en proporción a su tiempo: una
+    # pieza sin placa es su propia impresión; las de una placa comparten una.
+    placas = {}
+    indice_placa = np.array([placas.setdefault(p["placa"], len(placas)) if p["placa"] is not None else -1 for p in piezas])
+    con_placa = indice_placa >= 0
+    horas_placa = np.bincount(indice_placa[con_placa], weights=(horas * cantidad)[con_placa], minlength=len(placas))
+    corrida = horas.copy()
+    corrida[con_placa] = horas_placa[indice_placa[con_placa]]
+    t = tarifas.tasas
+    if tarifas.tarifa is not None:
+        energia = tarifas.tarifa.costo_lote(np.full(len(piezas), tarifas_luz.horas_desde_inicio(inicio)), corrida, t["consumo_w"])
+    else:
+        energia = corrida * t["luz_por_hora"]
+    luz = energia * horas / corrida
+
+    unidad = motor.componentes(gramos, horas, None, dict(t, costo_envio=0.0), material=gramos_material @ precio_gramo, luz=luz)
+    totales = {c: float((np.broadcast_to(unidad[c], cantidad.shape) * cantidad).sum()) for c in COMPONENTES_PIEZA}
+    totales["envio"] = float(t["costo_envio"])
+    totales["precio_final"] = totales["precio_venta"] + totales["envio"]
+    consumo = (gramos_material * cantidad[:, None]).sum(axis=0)
+
+    columnas = {c: np.broadcast_to(unidad[c], cantidad.shape).tolist() for c in COMPONENTES_PIEZA}
+    detalle = []
+    for i, pieza in enumerate(piezas):
+        fila = {"nombre": pieza["nombre"], "placa": pieza["placa"], "cantidad": pieza["cantidad"], "gramos": float(gramos[i]), "horas": pieza["horas"]}
+        fila.update((c, columnas[c][i]) for c in COMPONENTES_PIEZA)
+        fila["precio_total"] = fila["precio_venta"] * pieza["cantidad"]
+        detalle.append(fila)
+    return {
+        "piezas": detalle,
+        "materiales": [{"filamento_id": fid, "gramos": float(g), "costo": float(g * pg)} for fid, g, pg in zip(ids, consumo, precio_gramo)],
+        "impresiones": len(placas) + int(cantidad[~con_placa].sum()),
+        "totales": totales,
+        "version_tarifario": tarifas.version,
+    }
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Cotiza un trabajo con varias piezas y materiales.")
+    parser.add_argument("pedido", help="JSON con la lista de piezas")
+    parser.add_argument("--salida", help="CSV con el desglose por pieza ('-' para stdout)")
+    parser.add_argument("--inicio", help="Inicio de la impresión (AAAA-MM-DD HH:MM) para la tarifa de luz")
+    args = parser.parse_args(argv)
+
+    import tarifario
+    from nucleo import abrir_catalogo, load_data
+    data = load_data()
+    catalogo = abrir_catalogo(data)
+    try:
+        with open(args.pedido, "r", encoding="utf-8") as f:
+            pedido = json.load(f)
+        buscar = lambda referencia: catalogo.obtener(referencia) or catalogo.por_nombre(referencia)
+        piezas = leer_pedido(pedido, buscar, Path(args.pedido).parent)
+        resultado = cotizar_trabajo(piezas, tarifario.compilar(data["settings"], catalogo), args.inicio)
+        nombres = {m["filamento_id"]: catalogo.nombre(m["filamento_id"]) for m in resultado["materiales"]}
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        catalogo.cerrar()
+
+    if args.salida:
+        salida = sys.stdout if args.salida == "-" else open(args.salida, "w", encoding="utf-8", newline="")
+        try:
+            writer = csv.writer(salida, lineterminator="\n")
+            writer.writerow(["pieza", "placa", "cantidad", "gramos", "horas"] + list(COMPONENTES_PIEZA) + ["precio_total"])
+            for fila in resultado["piezas"]:
+                writer.writerow([fila["nombre"], fila["placa"] or "", fila["cantidad"], f"{fila['gramos']:.2f}", f"{fila['horas']:.4f}"]
+                                + [f"{fila[c]:.2f}" for c in COMPONENTES_PIEZA] + [f"{fila['precio_total']:.2f}"])
+        finally:
+            if salida is not sys.stdout:
+                salida.close()
+    informe = sys.stderr if args.salida == "-" else sys.stdout
+    for m in resultado["materiales"]:
+        print(f"{nombres[m['filamento_id']]}: {m['gramos']:,.1f} g, $ {m['costo']:,.2f}", file=informe)
+    totales = resultado["totales"]
+    print(f"{len(resultado['piezas'])} piezas en {resultado['impresiones']} impresiones. "
+          f"Costo: $ {totales['costo_total']:,.2f}  Precio final: $ {totales['precio_final']:,.2f} "
+          f"(tarifario {resultado['version_tarifario']})", file=informe)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())